@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+##
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # ###################################################################
+ ##
+
+
+"""
+Time the thread-parallel sparse matrix-vector product and fused residual
+used by the SciPy solvers, for the matrix of a 2D diffusion problem::
+
+    $ python examples/benchmarking/spmv.py --numberOfElements=1000000 --maxThreads=8
+
+Each line reports the number of threads, the wall-clock time of a
+matrix-vector product and of a residual evaluation, and the speedup of the
+product relative to SciPy's serial kernel.
+"""
+
+import time
+
+from fipy import *
+from fipy.solvers.scipy import LinearPCGSolver
+from fipy.solvers.scipy.threadedOperator import _ThreadedCSROperator
+
+from fipy.tools.parser import parse
+
+numberOfElements = parse('--numberOfElements', action='store',
+                         type='int', default=1000000)
+maxThreads = parse('--maxThreads', action='store',
+                   type='int', default=8)
+repeats = parse('--repeats', action='store',
+                type='int', default=20)
+
+N = int(numerix.sqrt(numberOfElements))
+mesh = Grid2D(nx=N, ny=N)
+var = CellVariable(mesh=mesh, value=numerix.random.random(mesh.numberOfCells))
+
+eq = DiffusionTerm() + ImplicitSourceTerm(coeff=1.)
+solver = eq._prepareLinearSystem(var=var, solver=LinearPCGSolver(),
+                                 boundaryConditions=(), dt=1.)
+A = solver.matrix.matrix
+x = numerix.array(var)
+b = numerix.array(solver.RHSvector)
+
+def wallclock(fn):
+    fn()
+    start = time.time()
+    for i in range(repeats):
+        fn()
+    return (time.time() - start) / repeats
+
+serial = wallclock(lambda: A * x)
+
+print "threads\tmatvec / s\tresidual / s\tspeedup"
+print "%d\t%g\t%g\t%g" % (0, serial, wallclock(lambda: numerix.L2norm(A * x - b)), 1.)
+
+threads = 1
+while threads <= maxThreads:
+    op = _ThreadedCSROperator(A, threads=threads)
+    matvec = wallclock(lambda: op.matvec(x))
+    residual = wallclock(lambda: op.residualAndNorm(x, b))
+    print "%d\t%g\t%g\t%g" % (threads, matvec, residual, serial / matvec)
+    threads *= 2
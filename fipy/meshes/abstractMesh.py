@@ -49,6 +49,83 @@ from fipy.meshes.topologies.abstractTopology import _AbstractTopology
 class MeshAdditionError(Exception):
     pass
 
+def _rowKeys(rows):
+    """
+    View each row of the 2D integer array `rows` as a single opaque value,
+    so that whole rows can be sorted and searched for.
+    """
+    rows = numerix.ascontiguousarray(rows, dtype=numerix.int64)
+    return rows.view(numerix.dtype((numerix.void, rows.dtype.itemsize * rows.shape[-1]))).ravel()
+
+def _matchVertices(coords, otherCoords, tolerance):
+    """
+    Find the closest of `coords` to each of `otherCoords`, if it is within
+    `tolerance`.
+
+    The coordinates are hashed into buckets of size `tolerance`, so only
+    the points in the neighboring buckets are compared, rather than all
+    pairs of points.
+
+        >>> coords = numerix.array(((0., 1., 2., 1.), (0., 0., 0., 1.)))
+        >>> otherCoords = numerix.array(((1.001, 5., 2., 0.999, 0.), (0., 5., 0.001, 0.999, 0.)))
+        >>> print _matchVertices(coords, otherCoords, tolerance=0.01)
+        (array([1, 2, 3, 0]), array([0, 2, 3, 4]))
+
+    Points that straddle a bucket boundary are still matched
+
+        >>> print _matchVertices(numerix.array(((0.0099,),)), numerix.array(((0.0101,),)), tolerance=0.01)
+        (array([0]), array([0]))
+
+    :Parameters:
+      - `coords`: A (D, N) array of coordinates.
+      - `otherCoords`: A (D, M) array of coordinates.
+      - `tolerance`: How close points must be to match.
+
+    :Returns:
+      The indices of the matching points of `coords` and of `otherCoords`.
+    """
+    import itertools
+
+    coords = numerix.asarray(coords)
+    otherCoords = numerix.asarray(otherCoords)
+
+    N = coords.shape[-1]
+    M = otherCoords.shape[-1]
+
+    if N == 0 or M == 0 or not tolerance > 0:
+        return numerix.zeros((0,), 'l'), numerix.zeros((0,), 'l')
+
+    origin = coords.min(axis=-1)[..., numerix.newaxis]
+
+    def buckets(points):
+        return numerix.floor((points - origin) / tolerance).astype(numerix.int64)
+
+    keys = _rowKeys(buckets(coords).swapaxes(0, 1))
+    order = numerix.argsort(keys, kind='mergesort')
+    keys = keys[order]
+
+    otherBuckets = buckets(otherCoords)
+    closest = -numerix.ones(M, 'l')
+    distances = numerix.empty(M)
+    distances.fill(numerix.inf)
+
+    # a point within `tolerance` is in the same or an adjacent bucket
+    for offset in itertools.product((-1, 0, 1), repeat=coords.shape[0]):
+        otherKeys = _rowKeys((otherBuckets + numerix.array(offset)[..., numerix.newaxis]).swapaxes(0, 1))
+        first = numerix.searchsorted(keys, otherKeys, side='left')
+        count = numerix.searchsorted(keys, otherKeys, side='right') - first
+        for i in range(count.max()):
+            candidates = numerix.nonzero(count > i)[0]
+            IDs = order[first[candidates] + i]
+            tmp = coords[..., IDs] - otherCoords[..., candidates]
+            distance = numerix.sqrtDot(tmp, tmp)
+            closer = distance < distances[candidates]
+            closest[candidates[closer]] = IDs[closer]
+            distances[candidates[closer]] = distance[closer]
+
+    close = numerix.nonzero(distances < tolerance)[0]
+    return closest[close], close
+
 class AbstractMesh(object):
     """
     A class encapsulating all commonalities among meshes in FiPy.
@@ -281,6 +358,7 @@ class AbstractMesh(object):
         faceCellIDs = MA.take(self.faceCellIDs[0], faces1)
         ## get all the adjacent faces for those particular cells
         cellFaceIDs = numerix.take(self.cellFaceIDs, faceCellIDs, axis=1)
+        allCellFaceIDs = self.cellFaceIDs.copy()
         for i in range(cellFaceIDs.shape[0]):
             ## if the faces is a member of faces1 then change the face to point at
             ## faces0
@@ -288,7 +366,8 @@ class AbstractMesh(object):
                                       faces0,
                                       cellFaceIDs[i])
             ## add those faces back to the main self.cellFaceIDs
-            numerix.put(self.cellFaceIDs[i], faceCellIDs, cellFaceIDs[i])
+            numerix.put(allCellFaceIDs[i], faceCellIDs, cellFaceIDs[i])
+        self.cellFaceIDs = allCellFaceIDs
 
         ## calculate new topology
         self._setTopology()
@@ -374,16 +453,12 @@ class AbstractMesh(object):
         self_XvertexCoords = selfc.vertexCoords[..., self_Xvertices]
         other_XvertexCoords = otherc.vertexCoords[..., other_Xvertices]
 
-        closest = numerix.nearest(self_XvertexCoords, other_XvertexCoords)
-
-        # just because they're closest, doesn't mean they're close
-        tmp = self_XvertexCoords[..., closest] - other_XvertexCoords
-        distance = numerix.sqrtDot(tmp, tmp)
         # only want vertex pairs that are 100x closer than the smallest
         # cell-to-cell distance
-        close = distance < resolution * min(selfc._cellToCellDistances.min(),
-                                            otherc._cellToCellDistances.min())
-        vertexCorrelates = numerix.array((self_Xvertices[closest[close]],
+        closest, close = _matchVertices(self_XvertexCoords, other_XvertexCoords,
+                                        tolerance=resolution * min(selfc._cellToCellDistances.min(),
+                                                                   otherc._cellToCellDistances.min()))
+        vertexCorrelates = numerix.array((self_Xvertices[closest],
                                           other_Xvertices[close]))
 
         # warn if meshes don't touch, but allow it
@@ -430,29 +505,24 @@ class AbstractMesh(object):
 
         # calculate hashes of faceVertexIDs for comparing Faces
 
-        if self_matchingFaces.shape[-1] == 0:
-            self_faceHash = numerix.empty(self_matchingFaces.shape[:-1] + (0,), dtype="str")
-        else:
-            # sort each of self's Face's vertexIDs for canonical comparison
-            self_faceHash = numerix.sort(self_faceVertexIDs[..., self_matchingFaces], axis=0)
-            # then hash the Faces for comparison (NumPy set operations are only for 1D arrays)
-            self_faceHash = numerix.apply_along_axis(str, axis=0, arr=self_faceHash)
+        # sort each of self's Face's vertexIDs for canonical comparison
+        self_faceHash = numerix.sort(MA.filled(self_faceVertexIDs[..., self_matchingFaces], -1), axis=0)
+        # then hash the Faces for comparison (NumPy set operations are only for 1D arrays)
+        self_faceHash = _rowKeys(self_faceHash.swapaxes(0, 1))
 
-        face_sort = numerix.argsort(self_faceHash)
+        face_sort = numerix.argsort(self_faceHash, kind='mergesort')
         self_faceHash = self_faceHash[face_sort]
         self_matchingFaces = self_matchingFaces[face_sort]
 
-        if other_matchingFaces.shape[-1] == 0:
-            other_faceHash = numerix.empty(other_matchingFaces.shape[:-1] + (0,), dtype="str")
-        else:
-            # convert each of other's Face's vertexIDs to new IDs
-            other_faceHash = vertex_map[other_faceVertexIDs[..., other_matchingFaces]]
-            # sort each of other's Face's vertexIDs for canonical comparison
-            other_faceHash = numerix.sort(other_faceHash, axis=0)
-            # then hash the Faces for comparison (NumPy set operations are only for 1D arrays)
-            other_faceHash = numerix.apply_along_axis(str, axis=0, arr=other_faceHash)
-
-        face_sort = numerix.argsort(other_faceHash)
+        # convert each of other's Face's vertexIDs to new IDs
+        other_faceHash = MA.filled(other_faceVertexIDs[..., other_matchingFaces], -1)
+        other_faceHash = numerix.where(other_faceHash >= 0, vertex_map[other_faceHash], -1)
+        # sort each of other's Face's vertexIDs for canonical comparison
+        other_faceHash = numerix.sort(other_faceHash, axis=0)
+        # then hash the Faces for comparison (NumPy set operations are only for 1D arrays)
+        other_faceHash = _rowKeys(other_faceHash.swapaxes(0, 1))
+
+        face_sort = numerix.argsort(other_faceHash, kind='mergesort')
         other_faceHash = other_faceHash[face_sort]
         other_matchingFaces = other_matchingFaces[face_sort]
 
@@ -1004,11 +1074,8 @@ class AbstractMesh(object):
 
     @property
     def _VTKCellType(self):
-        try:
-            from tvtk.api import tvtk
-        except ImportError, e:
-            from enthought.tvtk.api import tvtk
-        return tvtk.ConvexPointSet().cell_type
+        # VTK_CONVEX_POINT_SET, as numbered by VTK, so that TVTK is not needed to find it
+        return 41
 
     @property
     def VTKCellDataSet(self):
@@ -87,12 +87,11 @@ class CylindricalNonUniformGrid1D(NonUniformGrid1D):
         self.vertexCoords += origin
         self.args['origin'] = origin
 
-    def _calcFaceCenters(self):
-        faceCenters = super(CylindricalNonUniformGrid1D, self)._calcFaceCenters()
-        return faceCenters + self.origin
+        # any geometry calculated so far is of the unshifted vertices
+        self.releaseGeometry()
 
     def _calcFaceAreas(self):
-        return self._calcFaceCenters()[0]
+        return self._faceCenters[0]
 
     def _calcCellVolumes(self):
         return super(CylindricalNonUniformGrid1D, self)._calcCellVolumes() / 2.
@@ -60,25 +60,19 @@ class CylindricalNonUniformGrid2D(NonUniformGrid2D):
         super(CylindricalNonUniformGrid2D, self).__init__(dx=dx, dy=dy, nx=nx, ny=ny, overlap=overlap,
                         communicator=communicator, *args, **kwargs)
 
-        self._faceAreas *= self.faceCenters[0]
-
-        self._scaledFaceAreas = self._scale['area'] * self._faceAreas
-        self._areaProjections = self.faceNormals * self._faceAreas
-        self._orientedAreaProjections = self._calcOrientedAreaProjections()
-        self._faceAspectRatios = self._calcFaceAspectRatios()
-
-        self._cellAreas = self._calcCellAreas()
-        self._cellNormals = self._calcCellNormals()
-
         self.vertexCoords += self.origin
         self.args['origin'] = self.origin
 
-    def _calcFaceCenters(self):
-        return super(CylindricalNonUniformGrid2D, self)._calcFaceCenters() + self.origin
+        # any geometry calculated so far is of the unshifted vertices
+        self.releaseGeometry()
+
+    def _calcFaceAreas(self):
+        return super(CylindricalNonUniformGrid2D, self)._calcFaceAreas() \
+          * self._faceCenters[0]
 
     def _calcCellVolumes(self):
-        return super(CylindricalNonUniformGrid2D, self)._calcCellVolumes() \
-          * self._calcCellCenters()[0]
+        # the integral of r over the planar cell, by the divergence theorem
+        return super(CylindricalNonUniformGrid2D, self)._calcCellVolumes() / 2.
 
     def _translate(self, vector):
         return CylindricalNonUniformGrid2D(dx=self.args['dx'], nx=self.args['nx'],
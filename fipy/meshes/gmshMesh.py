@@ -39,7 +39,12 @@
 
 __docformat__ = 'restructuredtext'
 
+import ast
+import hashlib
+import mmap
 import os
+import re
+import shutil
 from subprocess import Popen, PIPE
 import sys
 import tempfile
@@ -169,7 +174,7 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
             filetype = f.readline().strip()
             f.close()
             if filetype == "$MeshFormat":
-                geoFile = None
+                geoFile = cache = None
                 mshFile = name
                 gmshOutput = ""
             elif filetype == "$NOD":
@@ -197,7 +202,31 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
                 else: # gmsh version is adequate for partitioning
                     gmshFlags += ["-part", "%d" % communicator.Nproc]
 
-            gmshFlags += ["-format", "msh"]
+            # binary MSH 2.2 files are smaller and faster to read
+            if version < StrictVersion("4.0"):
+                gmshFlags += ["-format", "msh", "-bin"]
+            else:
+                gmshFlags += ["-format", "msh22", "-bin"]
+
+            cache = _MeshCache.fromEnvironment()
+            if cache is not None:
+                cachePath = cache.path(cache.key(geoFile=geoFile,
+                                                 dimensions=dimensions,
+                                                 coordDimensions=coordDimensions,
+                                                 order=order,
+                                                 background=background,
+                                                 version=version,
+                                                 communicator=communicator),
+                                       communicator=communicator)
+                if cache.contains(cachePath, communicator=communicator):
+                    if communicator.procID == 0 and not os.path.exists(name):
+                        os.unlink(geoFile)
+
+                    return _CachedMSHFile(filename=cachePath,
+                                          cache=cache,
+                                          dimensions=dimensions,
+                                          coordDimensions=coordDimensions,
+                                          communicator=communicator)
 
             if background is not None:
                 if communicator.procID == 0:
@@ -248,16 +277,24 @@ def openMSHFile(name, dimensions=None, coordDimensions=None, communicator=parall
     elif mode.startswith('w'):
         mshFile = name
         gmshOutput = ""
+        geoFile = cache = None
     else:
         raise ValueError("mode string must begin with one of 'r' or 'w', not '%s'" % mode[0])
 
-    return MSHFile(filename=mshFile,
-                   dimensions=dimensions,
-                   coordDimensions=coordDimensions,
-                   communicator=communicator,
-                   gmshOutput=gmshOutput,
-                   mode=mode,
-                   fileIsTemporary=fileIsTemporary)
+    f = MSHFile(filename=mshFile,
+                dimensions=dimensions,
+                coordDimensions=coordDimensions,
+                communicator=communicator,
+                gmshOutput=gmshOutput,
+                mode=mode,
+                fileIsTemporary=fileIsTemporary)
+
+    if mode.startswith('r') and geoFile is not None and cache is not None:
+        # store the topology once it has been parsed
+        f._cache = cache
+        f._cachePath = cachePath
+
+    return f
 
 def openPOSFile(name, communicator=parallelComm, mode='w'):
     """Open a Gmsh POS post-processing file
@@ -482,6 +519,98 @@ class POSFile(GmshFile):
         data += [[str(value)] * numNodes]
         self.fileobj.write("\n".join([" ".join(datum) for datum in data]) + "\n")
 
+def _uniqueRows(rows):
+    """
+    Return the index of the first occurrence of each distinct row of the
+    2D array `rows`, in order of first occurrence, and, for every row, the
+    position of its first occurrence in that list.
+
+    >>> first, inverse = _uniqueRows(nx.array([[1, 2], [0, 3], [1, 2], [-1, 2], [0, 3]]))
+    >>> print first
+    [0 1 3]
+    >>> print inverse
+    [0 1 0 2 1]
+    """
+    rows = nx.asarray(rows)
+    if len(rows) == 0:
+        return nx.zeros((0,), 'l'), nx.zeros((0,), 'l')
+
+    # lexsort is stable, so the first row of each run of equal rows
+    # is the first occurrence of that row
+    order = nx.lexsort(rows.swapaxes(0,1)[::-1])
+    sortedRows = rows[order]
+    isNew = nx.concatenate(([True], (sortedRows[1:] != sortedRows[:-1]).any(axis=-1)))
+    runs = nx.cumsum(isNew) - 1
+    first = order[isNew]
+
+    rank = nx.argsort(first)
+    renumber = nx.empty(len(first), 'l')
+    renumber[rank] = nx.arange(len(first))
+    inverse = nx.empty(len(rows), 'l')
+    inverse[order] = renumber[runs]
+
+    return first[rank], inverse
+
+# number of nodes of each Gmsh element type
+_numNodesForElementType = { 1: 2,  2: 3,  3: 4,  4: 4,  5: 8,  6: 6,  7: 5,  8: 3,
+                            9: 6, 10: 9, 11: 10, 12: 27, 13: 18, 14: 14, 15: 1, 16: 8,
+                           17: 20, 18: 15, 19: 13, 20: 9, 21: 10, 22: 12, 23: 15, 24: 15,
+                           25: 21, 26: 4, 27: 5, 28: 6, 29: 20, 30: 35, 31: 56, 92: 64,
+                           93: 125}
+
+class _BinaryReader(object):
+    """
+    Reads consecutive ints, doubles, and sizes from the data of a binary
+    MSH section.
+    """
+    def __init__(self, data, byteOrder, sizeSize):
+        self.data = data
+        self.pos = 0
+        self.intType = nx.dtype(byteOrder + "i4")
+        self.doubleType = nx.dtype(byteOrder + "f8")
+        self.sizeType = nx.dtype(byteOrder + "u%d" % sizeSize)
+
+    def _read(self, dtype, count):
+        if self.pos + count * dtype.itemsize > len(self.data):
+            raise GmshException("Unexpected end of binary section")
+        values = nx.frombuffer(self.data, dtype=dtype, count=count, offset=self.pos)
+        self.pos += count * dtype.itemsize
+        return values
+
+    def ints(self, count):
+        return self._read(self.intType, count).astype('l')
+
+    def doubles(self, count):
+        return self._read(self.doubleType, count).astype(float)
+
+    def sizes(self, count):
+        return self._read(self.sizeType, count).astype('l')
+
+class _ASCIIReader(object):
+    """
+    Reads consecutive ints, doubles, and sizes from the data of an ASCII
+    MSH section.
+    """
+    def __init__(self, data):
+        self.data = nx.fromstring(data, sep=" ")
+        self.pos = 0
+
+    def _read(self, count):
+        if self.pos + count > len(self.data):
+            raise GmshException("Unexpected end of section")
+        values = self.data[self.pos:self.pos + count]
+        self.pos += count
+        return values
+
+    def ints(self, count):
+        return self._read(count).astype('l')
+
+    def doubles(self, count):
+        return self._read(count)
+
+    def sizes(self, count):
+        return self._read(count).astype('l')
+
 class MSHFile(GmshFile):
     """
     Class responsible for parsing a Gmsh file and then readying
@@ -492,11 +621,18 @@ class MSHFile(GmshFile):
     partitions matching `Nproc`, or the mesh must be specified with a geo file
     or multiline string.
 
+    Reads ASCII and binary files in MSH 2.2 and MSH 4.1 formats. MSH 4.1
+    files cannot be read in parallel.
+
     Does not support gmsh versions < 2. If partitioning, gmsh
     version must be >= 2.5.
 
-    TODO: Refactor face extraction functions.
     """
+
+    # `_MeshCache` in which `read()` should store the topology
+    _cache = None
+    _cachePath = None
+
     def __init__(self, filename,
                        dimensions,
                        coordDimensions=None,
@@ -530,167 +666,157 @@ class MSHFile(GmshFile):
         """
         Extracts gmshVersion, file-type, and data-size in that
         order.
-        """
-        self._seekForHeader("MeshFormat")
-        metaData = self.fileobj.readline().split()
-        self.fileobj.seek(0)
-        return [float(x) for x in metaData]
 
-    def _isolateData(self, title):
+        Binary files are followed by the integer 1, which reveals their
+        byte order.
         """
-        Gets all data between $[title] and $End[title], writes
-        it out to its own file.
-        """
-        newF, newPath = tempfile.mkstemp(title, text=True)
-        newF = os.fdopen(newF, 'w')
-        try:
-            self._seekForHeader(title)
-        except Exception, e:
-            newF.close()
-            os.unlink(newPath)
-            raise
+        metaData, data = self._sectionData("MeshFormat").split("\n", 1)
+        version, fileType, dataSize = [float(x) for x in metaData.split()[:3]]
 
-        # extract the actual data within section
-        while True:
-            line = self.fileobj.readline()
-            if ("$End%s" % title) not in line:
-                newF.write(line)
-            else: break
+        if fileType == 1:
+            if nx.frombuffer(data[:4], dtype='<i4')[0] == 1:
+                self._byteOrder = '<'
+            else:
+                self._byteOrder = '>'
+
+        if version >= 4 and version < 4.1:
+            raise GmshException("Gmsh MSH file format version %g is not supported. Use version 2.2 or 4.1" % version)
 
-        self.fileobj.seek(0)
-        newF.close()
-        return newPath
+        return version, fileType, dataSize
 
-    def _seekForHeader(self, title):
+    _sectionHeader = re.compile(r"^\$(\w+)[ \t]*\r?$", re.MULTILINE)
+
+    def _mapSections(self):
         """
-        Iterate through a file until we end up at the section header
-        for `title`. Function has obvious side-effects on `self.fileobj`.
+        Memory-map the file and record where the data of each $[title]
+        ... $End[title] section starts and ends.
         """
+        self._map = mmap.mmap(self.fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        self._sections = {}
+
+        pos = 0
         while True:
-            line = self.fileobj.readline()
-            if len(line) == 0:
-                raise EOFError("No `%s' header found!" % title)
+            header = self._sectionHeader.search(self._map, pos)
+            if header is None:
                 break
-            elif (("$%s" % title) not in line):
-                continue
-            else:
-                break # found header
+            title = header.group(1)
+            start = self._map.find("\n", header.end()) + 1
+            end = self._map.find("$End%s" % title, start)
+            if end < 0:
+                raise EOFError("No `$End%s' found!" % title)
+            # only the first section of each kind is read
+            self._sections.setdefault(title, (start, end))
+            pos = end + len("$End%s" % title)
+
+    def _unmapSections(self):
+        self._map.close()
+        self._map = None
+
+    def _sectionData(self, title):
+        """
+        Gets all data between $[title] and $End[title].
+        """
+        if title not in self._sections:
+            raise EOFError("No `%s' header found!" % title)
+        start, end = self._sections[title]
+        return self._map[start:end]
+
+    # vertex orderings of the faces of each shape, padded at the front with -1
+    # when faces of a shape have different lengths
+    _hexahedronFaces = [[0, 1, 2, 3], # ordering of vertices gleaned from
+                        [4, 5, 6, 7], # a one-cube Grid3D example
+                        [0, 1, 5, 4],
+                        [3, 2, 6, 7],
+                        [0, 3, 7, 4],
+                        [1, 2, 6, 5]]
+    _prismFaces = [[-1, 0, 1, 2],
+                   [-1, 5, 4, 3],
+                   [3, 4, 1, 0],
+                   [4, 5, 2, 1],
+                   [5, 3, 0, 2]]
+    _pyramidFaces = [[0, 1, 2, 3],
+                     [-1, 0, 1, 4],
+                     [-1, 1, 2, 4],
+                     [-1, 2, 3, 4],
+                     [-1, 3, 0, 4]]
+
+    def _faceOrderings(self, shapeType):
+        """
+        Return an array of the positions, within a cell of `shapeType`, of
+        the vertices of each of its faces.
+        """
+        if shapeType in [5, 12, 17]: # hexahedron
+            return nx.array(self._hexahedronFaces)
+        elif shapeType in [6, 13, 18]: # prism
+            return nx.array(self._prismFaces)
+        elif shapeType in [7, 14, 19]: # pyramid
+            return nx.array(self._pyramidFaces)
+        else:
+            if shapeType in [2, 9, 20, 21, 22, 23, 24, 25]:
+                faceLength = 2 # triangle
+            elif shapeType in [3, 10, 16]:
+                faceLength = 2 # quadrangle
+            elif shapeType in [4, 11, 29, 30, 31]:
+                faceLength = 3 # tetrahedron
+
+            # faces of regular poly(gon|hedra) are runs of consecutive
+            # corner vertices, wrapping around the cell
+            facesPerCell = self.numFacesPerCell[shapeType]
+            return (nx.arange(facesPerCell)[..., nx.newaxis]
+                    + nx.arange(faceLength)[nx.newaxis, ...]) % facesPerCell
 
     def _deriveCellsAndFaces(self, cellsToVertIDs, shapeTypes, numCells):
         """
         Uses element information obtained from `_parseElementFile` to deliver
         `facesToVertices` and `cellsToFaces`.
-        """
-
-        allShapes  = nx.unique(shapeTypes).tolist()
-        maxFaces   = max([self.numFacesPerCell[x] for x in allShapes])
 
-        # `cellsToFaces` must be padded with -1; see mesh.py
-        currNumFaces = 0
-        cellsToFaces = nx.ones((numCells, maxFaces), 'l') * -1
-        facesDict    = {}
-        uniqueFaces  = []
-
-        # we now build `cellsToFaces` and `uniqueFaces`,
-        # the latter will result in `facesToVertices`.
-        for cellIdx in range(numCells):
-            shapeType = shapeTypes[cellIdx]
-            cell = cellsToVertIDs[cellIdx]
-
-            if shapeType in [5, 12, 17]: # hexahedron
-                faces = self._extractOrderedFaces(cell=cell,
-                                                  faceOrderings=[[0, 1, 2, 3], # ordering of vertices gleaned from
-                                                                 [4, 5, 6, 7], # a one-cube Grid3D example
-                                                                 [0, 1, 5, 4],
-                                                                 [3, 2, 6, 7],
-                                                                 [0, 3, 7, 4],
-                                                                 [1, 2, 6, 5]])
-            elif shapeType in [6, 13, 18]: # prism
-                faces = self._extractOrderedFaces(cell=cell,
-                                                  faceOrderings=[[0, 1, 2],
-                                                                 [5, 4, 3],
-                                                                 [3, 4, 1, 0],
-                                                                 [4, 5, 2, 1],
-                                                                 [5, 3, 0, 2]])
-            elif shapeType in [7, 14, 19]: # pyramid
-                faces = self._extractOrderedFaces(cell=cell,
-                                                  faceOrderings=[[0, 1, 2, 3],
-                                                                 [0, 1, 4],
-                                                                 [1, 2, 4],
-                                                                 [2, 3, 4],
-                                                                 [3, 0, 4]])
-            else:
-                if shapeType in [2, 9, 20, 21, 22, 23, 24, 25]:
-                    faceLength = 2 # triangle
-                elif shapeType in [3, 10, 16]:
-                    faceLength = 2 # quadrangle
-                elif shapeType in [4, 11, 29, 30, 31]:
-                    faceLength = 3 # tetrahedron
-
-                faces = self._extractRegularFaces(cell=cell,
-                                                  faceLength=faceLength,
-                                                  facesPerCell=self.numFacesPerCell[shapeType])
-
-            for faceIdx in range(len(faces)):
-                # NB: currFace is sorted for the key to spot duplicates
-                currFace = faces[faceIdx]
-                keyStr   = ' '.join([str(x) for x in sorted(currFace)])
-
-                if keyStr in facesDict:
-                    cellsToFaces[cellIdx][faceIdx] = facesDict[keyStr]
-                else: # new face
-                    facesDict[keyStr] = currNumFaces
-                    cellsToFaces[cellIdx][faceIdx] = currNumFaces
-                    uniqueFaces.append(currFace)
-                    currNumFaces += 1
-
-        # pad short faces with -1
-        maxFaceLen = max([len(f) for f in uniqueFaces])
-        uniqueFaces = [[-1] * (maxFaceLen - len(f)) + f for f in uniqueFaces]
-
-        facesToVertices = nx.array(uniqueFaces, dtype=nx.INT_DTYPE)
-
-        return facesToVertices.swapaxes(0,1)[::-1], cellsToFaces.swapaxes(0,1).copy('C'), facesDict
+        The faces of every cell are generated at once for each shape type
+        and duplicates are found by sorting. Faces are numbered in the order
+        they are first encountered.
 
-    def _translateNodesToVertices(self, entitiesNodes, vertexMap):
-        """Translates entitiesNodes from Gmsh node IDs to `vertexCoords` indices.
+        Also returns the sorted vertex IDs of each face, padded with -1, for
+        identifying the Gmsh faces.
         """
-        entitiesVertices = []
+        shapeTypes = nx.asarray(shapeTypes)
+        allShapes  = nx.unique(shapeTypes).tolist()
+        orderings  = dict((shape, self._faceOrderings(shape)) for shape in allShapes)
+        maxFaces   = max([orderings[shape].shape[0] for shape in allShapes])
+        maxFaceLen = max([orderings[shape].shape[1] for shape in allShapes])
+
+        # every face of every cell, with its vertex IDs padded with -1
+        candidates = -nx.ones((numCells, maxFaces, maxFaceLen), dtype=nx.INT_DTYPE)
+        isFace = nx.zeros((numCells, maxFaces), dtype=bool)
+        for shape in allShapes:
+            cellIDs = nx.nonzero(shapeTypes[:numCells] == shape)[0]
+            cells = cellsToVertIDs[cellIDs]
+            ordering = orderings[shape]
+            numFaces, faceLen = ordering.shape
+            faces = nx.where(ordering >= 0, cells[..., nx.maximum(ordering, 0)], -1)
+            candidates[cellIDs, :numFaces, maxFaceLen - faceLen:] = faces
+            isFace[cellIDs, :numFaces] = True
+
+        candidates = candidates[isFace]
+
+        keys = nx.sort(candidates, axis=-1)
+        firstIDs, inverse = _uniqueRows(keys)
 
-        for entity in entitiesNodes:
-            try:
-                vertIndices = vertexMap[nx.array(entity)]
-            except IndexError:
-                vertIndices = nx.ones((len(entity),), 'l') * -1
-            entitiesVertices.append(vertIndices)
+        # `cellsToFaces` must be padded with -1; see mesh.py
+        cellsToFaces = -nx.ones((numCells, maxFaces), 'l')
+        cellsToFaces[isFace] = inverse
 
-        return entitiesVertices
+        facesToVertices = candidates[firstIDs]
 
-    def _extractRegularFaces(self, cell, faceLength, facesPerCell):
-        """Return faces for a regular poly(gon|hedron)
+        return facesToVertices.swapaxes(0,1)[::-1], cellsToFaces.swapaxes(0,1).copy('C'), keys[firstIDs]
 
-        Given `cell`, defined by node IDs, returns an array of
-        `facesPerCell` faces of length `faceLength` in terms of nodes.
-        """
-        faces = []
-        for i in range(facesPerCell):
-            aFace = []
-            for j in range(faceLength):
-                aVertex = (i + j) % len(cell) # we may wrap
-                aFace.append(int(cell[aVertex]))
-            faces.append(aFace)
-        return faces
+    def _translateNodesToVertices(self, entitiesNodes, vertexMap):
+        """Translates entitiesNodes from Gmsh node IDs to `vertexCoords` indices.
 
-    def _extractOrderedFaces(self, cell, faceOrderings):
-        """Return faces for a 8-node hexahedron cell.
+        Padding, and nodes that are not in `vertexMap`, become -1.
         """
-        def orderingToFace(vertList):
-            aFace = []
-            for i in vertList:
-                aFace.append(int(cell[i]))
-            return aFace
+        entitiesNodes = nx.asarray(entitiesNodes)
+        known = (entitiesNodes >= 0) & (entitiesNodes < len(vertexMap))
 
-        return [orderingToFace(o) for o in faceOrderings]
+        return nx.where(known, vertexMap[nx.where(known, entitiesNodes, 0)], -1)
 
     def read(self):
         """
@@ -701,163 +827,145 @@ class MSHFile(GmshFile):
         3. Build faces
         4. Build cellsToFaces
 
-        Isolate relevant data into three files, store in
-        `self.nodesPath` for $Nodes,
-        `self.elemsPath` for $Elements.
-        `self.namesFile` for $PhysicalNames.
+        The file is memory-mapped and the $Nodes, $Elements, and
+        $PhysicalNames sections are each parsed in bulk. In parallel, only
+        the first processor parses the file. It writes a shard for each
+        processor with that processor's cells, ghost cells, faces, and
+        nodes, and each processor reads only its own shard. The shards are
+        kept for the next run that reads the same file on as many
+        processors.
 
         Returns vertexCoords, facesToVertexID, cellsToFaceID,
                 cellGlobalIDMap, ghostCellGlobalIDMap.
         """
-        self.version, self.fileType, self.dataSize = self._getMetaData()
-        self.nodesPath = self._isolateData("Nodes")
-        self.elemsPath = self._isolateData("Elements")
-        try:
-            self.namesPath = self._isolateData("PhysicalNames")
-        except EOFError, e:
-            self.namesPath = None
+        if self.communicator.Nproc > 1:
+            nodeIDs, nodeCoords, blocks, names, offsets = self._readShard()
+        else:
+            nodeIDs, nodeCoords, blocks, names, offsets = self._readSections()
+
+        parprint("Parsing elements.")
+        (cellsData,
+         ghostsData,
+         facesData) = self._parseElementFile(blocks, offsets)
+
+        allData          = cellsData + ghostsData
+        cellsToGmshVerts = allData.nodes
+        numCellsTotal    = len(allData)
+        allShapeTypes    = allData.shapes
+        self.physicalCellMap = allData.physicalEntities
+        self.geometricalCellMap = allData.geometricalEntities
+
+        if numCellsTotal < 1:
+            errStr = "Gmsh hasn't produced any cells! Check your Gmsh code."
+            errStr += "\n\nGmsh output:\n%s" % "".join(self.gmshOutput).rstrip()
+            raise GmshException(errStr)
+
+        parprint("Recovering coords.")
+        parprint("numcells %d" % numCellsTotal)
+        vertexCoords, vertIDtoIdx = self._vertexCoordsAndMap(cellsToGmshVerts,
+                                                             nodeIDs, nodeCoords)
+
+        # translate Gmsh IDs to `vertexCoord` indices
+        cellsToVertIDs = self._translateNodesToVertices(cellsToGmshVerts,
+                                                        vertIDtoIdx)
+
+        parprint("Building cells and faces.")
+        (facesToV,
+         cellsToF,
+         faceKeys) = self._deriveCellsAndFaces(cellsToVertIDs,
+                                               allShapeTypes,
+                                               numCellsTotal)
+
+        # cell entities were easy to record on parsing
+        # but we don't use Gmsh faces, so we need to correlate the nodes
+        # that make up the Gmsh faces with the vertex IDs of the FiPy faces
+        # so that we can check if any are named
+
+        # translate Gmsh IDs to `vertexCoord` indices
+        facesToVertIDs = self._translateNodesToVertices(facesData.nodes,
+                                                        vertIDtoIdx)
+
+        self.physicalFaceMap = nx.zeros(facesToV.shape[-1:], 'l')
+        self.geometricalFaceMap = nx.zeros(facesToV.shape[-1:], 'l')
+
+        if len(facesData) > 0:
+            # Gmsh faces with more nodes than any FiPy face, or with nodes
+            # that are not in this mesh, cannot match a FiPy face
+            width = faceKeys.shape[-1]
+            valid = ((facesData.numNodes <= width)
+                     & ((facesToVertIDs < 0).sum(axis=-1) == facesToVertIDs.shape[-1] - facesData.numNodes))
+            gmshFaceKeys = -nx.ones((len(facesData), width), 'l')
+            gmshFaceKeys[..., :min(width, facesToVertIDs.shape[-1])] = facesToVertIDs[..., :width]
+            gmshFaceKeys = nx.sort(gmshFaceKeys[valid], axis=-1)
+
+            # the FiPy faces are distinct, so they are numbered first;
+            # Gmsh faces that match one of them share its number
+            IDs = _uniqueRows(nx.concatenate((faceKeys, gmshFaceKeys)))[1][len(faceKeys):]
+            tagged = IDs < len(faceKeys)
+
+            # not all faces are necessarily tagged
+            self.physicalFaceMap[IDs[tagged]] = facesData.physicalEntities[valid][tagged]
+            self.geometricalFaceMap[IDs[tagged]] = facesData.geometricalEntities[valid][tagged]
+
+        self.physicalNames = self._parseNamesFile(names)
+
+
+        # convert padded cell vertices to a properly oriented masked array
+        cellsToVertIDs = nx.MA.masked_equal(cellsToVertIDs, value=-1).swapaxes(0,1)
 
-        try:
-            if self.dimensions is None:
-                nodesFile = open(self.nodesPath, 'r')
-                nodesFile.readline() # skip number of nodes
+        parprint("Done with cells and faces.")
+        topology = (vertexCoords, facesToV, cellsToF,
+                    cellsData.idmap, ghostsData.idmap,
+                    cellsToVertIDs)
 
-                # We assume we have a 2D file unless we find a node
-                # with a non-zero Z coordinate
-                self.dimensions = 2
-                for node in nodesFile:
-                    line   = node.split()
+        if self._cache is not None:
+            self._cache.store(self._cachePath, mshFile=self, topology=topology)
 
-                    newVert = [float(x) for x in line]
+        return topology
 
-                    if newVert[2] != 0.0:
-                        self.dimensions = 3
-                        break
+    def _renumber(self, topology, method):
+        """
+        Renumber the cells, faces, and vertices of the `topology` returned
+        by `read`, and the entity maps that go with them, so that
+        neighboring elements are stored close together. Ghost cells stay
+        behind the local cells.
 
-                nodesFile.close()
-
-            self.coordDimensions = self.coordDimensions or self.dimensions
-
-            # we need a conditional here so we don't pick up 2D shapes in 3D
-            if self.dimensions == 2:
-                self.numVertsPerFace = {1: 2, # 2-node line
-                                        8: 2} # 3-node line
-                self.numFacesPerCell = { 2: 3, # 3-node triangle (3 faces)
-                                         9: 3, # 6-node triangle (we only read 1st 3)
-                                        20: 3, # 9-node triangle (we only read 1st 3)
-                                        21: 3, # 10-node triangle (we only read 1st 3)
-                                        22: 3, # 12-node triangle (we only read 1st 3)
-                                        23: 3, # 15-node triangle (we only read 1st 3)
-                                        24: 3, # 15-node triangle (we only read 1st 3)
-                                        25: 3, # 21-node triangle (we only read 1st 3)
-                                         3: 4, # 4-node quadrangle (4 faces)
-                                        10: 4, # 9-node quadrangle (we only read 1st 4)
-                                        16: 4} # 8-node quadrangle (we only read 1st 4)
-            elif self.dimensions == 3:
-                self.numVertsPerFace = { 2: 3, # 3-node triangle (3 vertices)
-                                         9: 3, # 6-node triangle (we only read 1st 3)
-                                        20: 3, # 9-node triangle (we only read 1st 3)
-                                        21: 3, # 10-node triangle (we only read 1st 3)
-                                        22: 3, # 12-node triangle (we only read 1st 3)
-                                        23: 3, # 15-node triangle (we only read 1st 3)
-                                        24: 3, # 15-node triangle (we only read 1st 3)
-                                        25: 3, # 21-node triangle (we only read 1st 3)
-                                         3: 4, # 4-node quadrangle (4 vertices)
-                                        10: 4, # 9-node quadrangle (we only read 1st 4)
-                                        16: 4} # 8-node quadrangle (we only read 1st 4)
-                self.numFacesPerCell = { 4: 4, # 4-node tetrahedron (4 faces)
-                                        11: 4, # 10-node tetrahedron (we only read 1st 4)
-                                        29: 4, # 20-node tetrahedron (we only read 1st 4)
-                                        30: 4, # 35-node tetrahedron (we only read 1st 4)
-                                        31: 4, # 56-node tetrahedron (we only read 1st 4)
-                                         5: 6, # 8-node hexahedron (6 faces)
-                                        12: 6, # 27-node tetrahedron (we only read 1st 6)
-                                        17: 6, # 20-node tetrahedron (we only read 1st 6)
-                                         6: 5, # 6-node prism (5 faces)
-                                        13: 5, # 18-node prism (we only read 1st 6)
-                                        18: 5, # 15-node prism (we only read 1st 6)
-                                         7: 5, # 5-node pyramid (5 faces)
-                                        14: 5, # 14-node pyramid (we only read 1st 5)
-                                        19: 5} # 13-node pyramid (we only read 1st 5)
-            else:
-                raise GmshException("Mesh has fewer than 2 or more than 3 dimensions")
-
-            parprint("Parsing elements.")
-            (cellsData,
-             ghostsData,
-             facesData) = self._parseElementFile()
-
-            cellsToGmshVerts = cellsData.nodes + ghostsData.nodes
-            numCellsTotal    = len(cellsData.nodes) + len(ghostsData.nodes)
-            allShapeTypes    = cellsData.shapes + ghostsData.shapes
-            allShapeTypes    = nx.array(allShapeTypes)
-            allShapeTypes    = nx.delete(allShapeTypes, nx.s_[numCellsTotal:])
-            self.physicalCellMap = nx.array(cellsData.physicalEntities
-                                            + ghostsData.physicalEntities)
-            self.geometricalCellMap = nx.array(cellsData.geometricalEntities
-                                               + ghostsData.geometricalEntities)
-
-            if numCellsTotal < 1:
-                errStr = "Gmsh hasn't produced any cells! Check your Gmsh code."
-                errStr += "\n\nGmsh output:\n%s" % "".join(self.gmshOutput).rstrip()
-                raise GmshException(errStr)
-
-            parprint("Recovering coords.")
-            parprint("numcells %d" % numCellsTotal)
-            vertexCoords, vertIDtoIdx = self._vertexCoordsAndMap(cellsToGmshVerts)
-
-            # translate Gmsh IDs to `vertexCoord` indices
-            cellsToVertIDs = self._translateNodesToVertices(cellsToGmshVerts,
-                                                            vertIDtoIdx)
-
-            parprint("Building cells and faces.")
-            (facesToV,
-             cellsToF,
-             facesDict) = self._deriveCellsAndFaces(cellsToVertIDs,
-                                                    allShapeTypes,
-                                                    numCellsTotal)
-
-            # cell entities were easy to record on parsing
-            # but we don't use Gmsh faces, so we need to correlate the nodes
-            # that make up the Gmsh faces with the vertex IDs of the FiPy faces
-            # so that we can check if any are named
-            faceEntitiesDict = dict()
-
-            # translate Gmsh IDs to `vertexCoord` indices
-            facesToVertIDs = self._translateNodesToVertices(facesData.nodes,
-                                                            vertIDtoIdx)
-
-            for face, physicalEntity, geometricalEntity in zip(facesToVertIDs,
-                                                               facesData.physicalEntities,
-                                                               facesData.geometricalEntities):
-                faceEntitiesDict[' '.join([str(x) for x in sorted(face)])] = (physicalEntity, geometricalEntity)
-
-            self.physicalFaceMap = nx.zeros(facesToV.shape[-1:], 'l')
-            self.geometricalFaceMap = nx.zeros(facesToV.shape[-1:], 'l')
-            for face in facesDict.keys():
-                # not all faces are necessarily tagged
-                if face in faceEntitiesDict:
-                    self.physicalFaceMap[facesDict[face]] = faceEntitiesDict[face][0]
-                    self.geometricalFaceMap[facesDict[face]] = faceEntitiesDict[face][1]
-
-            self.physicalNames = self._parseNamesFile()
+        Returns the renumbered `topology` and the original IDs of the
+        vertices, faces, and cells, in their new order.
 
-        finally:
-            os.unlink(self.nodesPath)
-            os.unlink(self.elemsPath)
-            if self.namesPath is not None:
-                os.unlink(self.namesPath)
-
-        # convert lists of cell vertices to a properly oriented masked array
-        maxVerts = max([len(v) for v in cellsToVertIDs])
-        # ticket:539 - NumPy 1.7 casts to array before concatenation and empty array defaults to float
-        cellsToVertIDs = [nx.concatenate((v, nx.array([-1] * (maxVerts-len(v)), dtype=nx.INT_DTYPE))) for v in cellsToVertIDs]
-        cellsToVertIDs = nx.MA.masked_equal(cellsToVertIDs, value=-1).swapaxes(0,1)
+        :Parameters:
+          - `method`: Either ``"rcm"`` or ``"morton"``. See
+            `fipy.meshes.renumbering`.
+        """
+        from fipy.meshes.renumbering import _renumber, _relabel
 
-        parprint("Done with cells and faces.")
-        return (vertexCoords, facesToV, cellsToF,
-                cellsData.idmap, ghostsData.idmap,
-                cellsToVertIDs)
+        (vertexCoords, facesToV, cellsToF,
+         cellGlobalIDs, gCellGlobalIDs,
+         cellsToVertIDs) = topology
+
+        numberOfLocalCells = len(cellGlobalIDs)
+        (vertexOrder, faceOrder, cellOrder,
+         vertexCoords, facesToV, cellsToF) = _renumber(vertexCoords, facesToV, cellsToF,
+                                                       method=method,
+                                                       numberOfLocalCells=numberOfLocalCells)
+
+        if self.communicator.Nproc > 1:
+            # cells keep the global IDs that the other processors know them by
+            globalIDs = nx.array(cellGlobalIDs + gCellGlobalIDs, 'l')[cellOrder].tolist()
+        else:
+            # in serial, values in global order are taken to be in storage order
+            globalIDs = cellGlobalIDs + gCellGlobalIDs
+
+        self.physicalCellMap = self.physicalCellMap[cellOrder]
+        self.geometricalCellMap = self.geometricalCellMap[cellOrder]
+        self.physicalFaceMap = self.physicalFaceMap[faceOrder]
+        self.geometricalFaceMap = self.geometricalFaceMap[faceOrder]
+
+        topology = (vertexCoords, facesToV, cellsToF,
+                    globalIDs[:numberOfLocalCells], globalIDs[numberOfLocalCells:],
+                    _relabel(cellsToVertIDs[..., cellOrder], vertexOrder))
+
+        return topology, (vertexOrder, faceOrder, cellOrder)
 
     def write(self, obj, time=0.0, timeindex=0):
         if not self.formatWritten:
@@ -986,160 +1094,619 @@ class MSHFile(GmshFile):
 
         self.fileobj.write("$EndElementData\n")
 
-    def _vertexCoordsAndMap(self, cellsToGmshVerts):
+    def _vertexCoordsAndMap(self, cellsToGmshVerts, nodeIDs, nodeCoords):
         """
         Returns `vertexCoords` and mapping from Gmsh ID to `vertexCoords`
         indices (same as in MSHFile).
 
-        Unlike parent, doesn't use genfromtxt
-        because we want to avoid loading the entire msh file into memory.
+        Only the nodes used by `cellsToGmshVerts` are retained.
         """
-        allVerts     = [v for c in cellsToGmshVerts for v in c] # flatten
-        allVerts     = nx.unique(nx.array(allVerts, dtype=nx.INT_DTYPE)) # remove dups
-        allVerts     = nx.sort(allVerts)
+        allVerts     = nx.unique(cellsToGmshVerts[cellsToGmshVerts >= 0]) # sorted, no dups
         maxVertIdx   = allVerts[-1] + 1 # add one to offset zero
         vertGIDtoIdx = nx.ones(maxVertIdx, 'l') * -1 # gmsh ID -> vertexCoords idx
-        vertexCoords = nx.empty((len(allVerts), self.coordDimensions))
-        nodeCount    = 0
 
         # establish map. This works because allVerts is a sorted set.
         vertGIDtoIdx[allVerts] = nx.arange(len(allVerts))
 
-        nodesFile = open(self.nodesPath, 'r')
-        nodesFile.readline() # skip number of nodes
+        # find the rows of the $Nodes section that hold `allVerts`
+        order = nx.argsort(nodeIDs, kind='mergesort')
+        rows = nx.searchsorted(nodeIDs[order], allVerts)
+        rows = order[nx.minimum(rows, len(order) - 1)]
+        if len(nodeIDs) == 0 or (nodeIDs[rows] != allVerts).any():
+            raise GmshException("Elements refer to nodes missing from the $Nodes section")
 
-        # now we walk through node file with a sorted unique list of vertices
-        # in hand. When we encounter 0th element in `allVerts`, save it
-        # to `vertexCoords` then pop its ID off `allVerts`.
-        for node in nodesFile:
-            line   = node.split()
-            nodeID = int(line[0])
-
-            if nodeID == allVerts[nodeCount]:
-                newVert = [float(x) for x in line[1:self.coordDimensions+1]]
-                vertexCoords[nodeCount,:] = nx.array(newVert)
-                nodeCount += 1
-
-            if len(allVerts) == nodeCount:
-                break
-
-        nodesFile.close()
+        vertexCoords = nodeCoords[rows, :self.coordDimensions]
 
         # transpose for FiPy
         transCoords = vertexCoords.swapaxes(0,1)
         return transCoords, vertGIDtoIdx
 
-    def _parseElementFile(self):
+    def _sectionReader(self, title):
         """
-        Return three objects, the first for non-ghost cells, the second for
-        ghost cells, and the third for faces.
+        Return a reader for the numbers in a MSH 4 section.
+        """
+        if self.fileType == 1:
+            return _BinaryReader(self._sectionData(title), byteOrder=self._byteOrder,
+                                 sizeSize=int(self.dataSize))
+        else:
+            return _ASCIIReader(self._sectionData(title))
 
-        All nastiness concerning ghost cell
-        calculation is consolidated here: if we were ever to need to CALCULATE
-        GHOST CELLS OURSELVES, the only code we'd have to change is in here.
+    def _parseNodes(self):
         """
+        Return the Gmsh IDs and the coordinates of all nodes.
+        """
+        if self.version >= 4:
+            return self._parseNodes4()
+
+        numNodes, data = self._sectionData("Nodes").split("\n", 1)
+        numNodes = int(numNodes)
+
+        if self.fileType == 1:
+            # each node is an int followed by three doubles
+            nodeType = nx.dtype([("ID", self._byteOrder + "i4"),
+                                 ("coords", self._byteOrder + "f8", (3,))])
+            if len(data) < numNodes * nodeType.itemsize:
+                raise GmshException("Expected %d nodes in $Nodes section" % numNodes)
+            nodes = nx.frombuffer(data, dtype=nodeType, count=numNodes)
+
+            return nodes["ID"].astype('l'), nodes["coords"].astype(float)
+
+        nodes = nx.fromstring(data, sep=" ")
+        if len(nodes) != 4 * numNodes:
+            raise GmshException("Expected %d nodes in $Nodes section" % numNodes)
+        nodes = nodes.reshape((numNodes, 4))
+
+        return nodes[..., 0].astype('l'), nodes[..., 1:]
+
+    def _parseNodes4(self):
+        """
+        Return the Gmsh IDs and the coordinates of all nodes of a MSH 4.1
+        file, whose nodes are grouped by geometrical entity.
+        """
+        reader = self._sectionReader("Nodes")
+        numBlocks, numNodes, minTag, maxTag = reader.sizes(4)
+
+        nodeIDs = []
+        nodeCoords = []
+        for block in range(numBlocks):
+            entityDim, entityTag, parametric = reader.ints(3)
+            numNodesInBlock = reader.sizes(1)[0]
+            nodeIDs.append(reader.sizes(numNodesInBlock))
+            # parametric coordinates follow x, y, z
+            numCoords = 3 + (parametric and entityDim)
+            coords = reader.doubles(numNodesInBlock * numCoords)
+            nodeCoords.append(coords.reshape((numNodesInBlock, numCoords))[..., :3])
+
+        if numBlocks == 0:
+            return nx.zeros((0,), 'l'), nx.zeros((0, 3))
+
+        return nx.concatenate(nodeIDs), nx.concatenate(nodeCoords)
+
+    def _parseEntities4(self):
+        """
+        Return a dictionary of the physical entity of each (dimension,
+        tag) geometrical entity of a MSH 4.1 file.
+        """
+        physicalEntities = {}
+        if "Entities" not in self._sections:
+            return physicalEntities
+
+        reader = self._sectionReader("Entities")
+        numEntities = reader.sizes(4)
+        for dim in range(4):
+            for entity in range(numEntities[dim]):
+                tag = reader.ints(1)[0]
+                if dim == 0:
+                    reader.doubles(3) # point coordinates
+                else:
+                    reader.doubles(6) # bounding box
+                physicalTags = reader.ints(reader.sizes(1)[0])
+                if len(physicalTags) > 0:
+                    physicalEntities[(dim, tag)] = physicalTags[0]
+                if dim > 0:
+                    reader.ints(reader.sizes(1)[0]) # bounding entities
+
+        return physicalEntities
+
+    def _elementBlocks(self):
+        """
+        Parse the $Elements section in bulk and yield runs of consecutive
+        elements that share an element type and a number of tags, as 2D
+        arrays with one element per row.
+
+        Each row holds the element ID, its type, its number of tags, its
+        tags, and its nodes, as in an ASCII MSH 2 file, whatever the format
+        of the file.
+        """
+        if self.version >= 4:
+            for block in self._elementBlocks4():
+                yield block
+            return
+        elif self.fileType == 1:
+            for block in self._binaryElementBlocks():
+                yield block
+            return
+
+        numElements, data = self._sectionData("Elements").split("\n", 1)
+        records = nx.fromstring(data, dtype='l', sep=" ")
+
+        pos = 0
+        while pos < len(records):
+            elemType, numTags = records[pos + 1], records[pos + 2]
+            if elemType not in _numNodesForElementType:
+                raise GmshException("Unknown Gmsh element type %d" % elemType)
+            length = 3 + numTags + _numNodesForElementType[elemType]
+
+            remaining = (len(records) - pos) // length
+            if remaining < 1:
+                raise GmshException("Truncated $Elements section")
+
+            # gallop to the end of the run
+            count = 1
+            while count < remaining:
+                trial = min(2 * count, remaining)
+                block = records[pos:pos + trial * length].reshape((trial, length))
+                differs = (block[..., 1] != elemType) | (block[..., 2] != numTags)
+                if differs.any():
+                    count = nx.argmax(differs)
+                    break
+                count = trial
+
+            yield records[pos:pos + count * length].reshape((count, length))
+            pos += count * length
+
+    def _binaryElementBlocks(self):
+        """
+        Binary MSH 2 files group elements in blocks, each preceded by the
+        element type, the number of elements, and the number of tags.
+        """
+        numElements, data = self._sectionData("Elements").split("\n", 1)
+        reader = _BinaryReader(data, byteOrder=self._byteOrder, sizeSize=4)
+
+        numElements = int(numElements)
+        while numElements > 0:
+            elemType, count, numTags = reader.ints(3)
+            if elemType not in _numNodesForElementType:
+                raise GmshException("Unknown Gmsh element type %d" % elemType)
+            length = 1 + numTags + _numNodesForElementType[elemType]
+            records = reader.ints(count * length).reshape((count, length)).astype('l')
+
+            yield nx.concatenate((records[..., :1],
+                                  nx.ones((count, 1), 'l') * elemType,
+                                  nx.ones((count, 1), 'l') * numTags,
+                                  records[..., 1:]), axis=1)
+            numElements -= count
+
+    def _elementBlocks4(self):
+        """
+        MSH 4.1 files group elements by geometrical entity. Physical
+        entities are properties of the geometrical entities, listed in
+        the $Entities section.
+        """
+        if self.communicator.Nproc > 1:
+            raise GmshException("Gmsh MSH file format version %g cannot be read in parallel. Use version 2.2" % self.version)
+
+        physicalEntities = self._parseEntities4()
+
+        reader = self._sectionReader("Elements")
+        numBlocks, numElements, minTag, maxTag = reader.sizes(4)
+
+        for block in range(numBlocks):
+            entityDim, entityTag, elemType = reader.ints(3)
+            count = reader.sizes(1)[0]
+            if elemType not in _numNodesForElementType:
+                raise GmshException("Unknown Gmsh element type %d" % elemType)
+            length = 1 + _numNodesForElementType[elemType]
+            records = reader.sizes(count * length).reshape((count, length))
+
+            # tags are the physical and geometrical entities, as in MSH 2
+            yield nx.concatenate((records[..., :1],
+                                  nx.ones((count, 1), 'l') * elemType,
+                                  nx.ones((count, 1), 'l') * 2,
+                                  nx.ones((count, 1), 'l') * physicalEntities.get((entityDim, entityTag), 0),
+                                  nx.ones((count, 1), 'l') * entityTag,
+                                  records[..., 1:]), axis=1)
+
+    def _setElementTypes(self, nodeCoords):
+        """
+        Determine the dimensions of the mesh, if not given, and which
+        element types are cells and which are faces.
+        """
+        if self.dimensions is None:
+            # We assume we have a 2D file unless we find a node
+            # with a non-zero Z coordinate
+            if (nodeCoords[..., 2] != 0.).any():
+                self.dimensions = 3
+            else:
+                self.dimensions = 2
+
+        self.coordDimensions = self.coordDimensions or self.dimensions
+
+        # we need a conditional here so we don't pick up 2D shapes in 3D
+        if self.dimensions == 2:
+            self.numVertsPerFace = {1: 2, # 2-node line
+                                    8: 2} # 3-node line
+            self.numFacesPerCell = { 2: 3, # 3-node triangle (3 faces)
+                                     9: 3, # 6-node triangle (we only read 1st 3)
+                                    20: 3, # 9-node triangle (we only read 1st 3)
+                                    21: 3, # 10-node triangle (we only read 1st 3)
+                                    22: 3, # 12-node triangle (we only read 1st 3)
+                                    23: 3, # 15-node triangle (we only read 1st 3)
+                                    24: 3, # 15-node triangle (we only read 1st 3)
+                                    25: 3, # 21-node triangle (we only read 1st 3)
+                                     3: 4, # 4-node quadrangle (4 faces)
+                                    10: 4, # 9-node quadrangle (we only read 1st 4)
+                                    16: 4} # 8-node quadrangle (we only read 1st 4)
+        elif self.dimensions == 3:
+            self.numVertsPerFace = { 2: 3, # 3-node triangle (3 vertices)
+                                     9: 3, # 6-node triangle (we only read 1st 3)
+                                    20: 3, # 9-node triangle (we only read 1st 3)
+                                    21: 3, # 10-node triangle (we only read 1st 3)
+                                    22: 3, # 12-node triangle (we only read 1st 3)
+                                    23: 3, # 15-node triangle (we only read 1st 3)
+                                    24: 3, # 15-node triangle (we only read 1st 3)
+                                    25: 3, # 21-node triangle (we only read 1st 3)
+                                     3: 4, # 4-node quadrangle (4 vertices)
+                                    10: 4, # 9-node quadrangle (we only read 1st 4)
+                                    16: 4} # 8-node quadrangle (we only read 1st 4)
+            self.numFacesPerCell = { 4: 4, # 4-node tetrahedron (4 faces)
+                                    11: 4, # 10-node tetrahedron (we only read 1st 4)
+                                    29: 4, # 20-node tetrahedron (we only read 1st 4)
+                                    30: 4, # 35-node tetrahedron (we only read 1st 4)
+                                    31: 4, # 56-node tetrahedron (we only read 1st 4)
+                                     5: 6, # 8-node hexahedron (6 faces)
+                                    12: 6, # 27-node tetrahedron (we only read 1st 6)
+                                    17: 6, # 20-node tetrahedron (we only read 1st 6)
+                                     6: 5, # 6-node prism (5 faces)
+                                    13: 5, # 18-node prism (we only read 1st 6)
+                                    18: 5, # 15-node prism (we only read 1st 6)
+                                     7: 5, # 5-node pyramid (5 faces)
+                                    14: 5, # 14-node pyramid (we only read 1st 5)
+                                    19: 5} # 13-node pyramid (we only read 1st 5)
+        else:
+            raise GmshException("Mesh has fewer than 2 or more than 3 dimensions")
+
+    def _readSections(self):
+        """
+        Parse the whole file.
 
-        def _parseTags(offset, currLineInts):
-            if offset == -1:
-                # if first valid shape
-                offset = currLineInts[0]
+        Returns the IDs and coordinates of the nodes, the element blocks,
+        the $PhysicalNames section, and `None`, as there are no fixed
+        element ID offsets.
+        """
+        self._mapSections()
+
+        try:
+            self.version, self.fileType, self.dataSize = self._getMetaData()
 
-            numTags = currLineInts[2]
-            tags    = currLineInts[3:(3+numTags)]
+            nodeIDs, nodeCoords = self._parseNodes()
 
-            # the partition tags for don't seem to always be present
-            # and don't always make much sense when they are
+            self._setElementTypes(nodeCoords)
 
-            if len(tags) >= 2:
-                physicalEntity = tags.pop(0)
-                geometricalEntity = tags.pop(0)
+            blocks = list(self._elementBlocks())
+
+            if "PhysicalNames" in self._sections:
+                names = self._sectionData("PhysicalNames")
             else:
-                physicalEntity = geometricalEntity = -1
+                names = None
+        finally:
+            self._unmapSections()
+
+        return nodeIDs, nodeCoords, blocks, names, None
+
+    def _partitionTags(self, block):
+        """
+        Return the physical entity, the geometrical entity, and the
+        partition tags of each element of `block`.
+        """
+        numTags = block[0, 2]
+        tags    = block[..., 3:3 + numTags]
+
+        # the partition tags for don't seem to always be present
+        # and don't always make much sense when they are
+
+        if numTags >= 2:
+            physicalEntities = tags[..., 0]
+            geometricalEntities = tags[..., 1]
+            tags = tags[..., 2:]
+        else:
+            physicalEntities = geometricalEntities = -nx.ones(len(block), 'l')
+
+        if tags.shape[-1] > 0 and block[0, 1] in self.numFacesPerCell.keys():
+            # next item is a count
+            disagree = tags[..., 0] != tags.shape[-1] - 1
+            if disagree.any():
+                warnings.warn("Partition count %d does not agree with number of remaining tags %d." % (tags[disagree][0, 0], tags.shape[-1] - 1),
+                              SyntaxWarning, stacklevel=3)
+            tags = tags[..., 1:]
+
+        return physicalEntities, geometricalEntities, tags
+
+    def _shardKey(self):
+        """
+        Return a hash of the MSH file and of the number of partitions, which
+        identifies the shards written from it.
+        """
+        sha = hashlib.sha1()
+        f = open(self.filename, 'rb')
+        try:
+            chunk = f.read(2**20)
+            while chunk:
+                sha.update(chunk)
+                chunk = f.read(2**20)
+        finally:
+            f.close()
+        sha.update(repr((self.dimensions, self.communicator.Nproc)))
+
+        return sha.hexdigest()
+
+    def _writeShards(self, paths):
+        """
+        Parse the whole file and write a shard to `paths[procID]` for each
+        processor with the elements and nodes it needs.
+
+        A processor needs the cells of its partition, its ghost cells, and
+        the nodes of those cells. Of the other elements, it only needs the
+        faces made up of those nodes. Cells, nodes, and faces are each
+        assigned to their processors in one pass, as sorted pairs of
+        element and processor.
+        """
+        nodeIDs, nodeCoords, blocks, names, offsets = self._readSections()
+
+        Nproc = self.communicator.Nproc
+
+        cellOffset = faceOffset = 0
+        cellBlocks = [block for block in blocks if block[0, 1] in self.numFacesPerCell.keys()]
+        faceBlocks = [block for block in blocks if block[0, 1] in self.numVertsPerFace.keys()]
+        if len(cellBlocks) > 0:
+            cellOffset = cellBlocks[0][0, 0]
+        if len(faceBlocks) > 0:
+            faceOffset = faceBlocks[0][0, 0]
+
+        def byProcessor(elements, procs):
+            # the `elements` of each processor, in their original order
+            order = nx.argsort(procs, kind='mergesort')
+            bounds = nx.concatenate(([0], nx.cumsum(nx.bincount(procs, minlength=Nproc))))
+            return [elements[order[bounds[procID]:bounds[procID + 1]]] for procID in range(Nproc)]
+
+        # a cell belongs to the processor of each of its partition tags,
+        # either as a local cell or as a ghost cell
+        shardBlocks = [[] for procID in range(Nproc)]
+        nodeProcs = [nx.zeros((0,), 'l')]
+        for block in cellBlocks:
+            procs = abs(self._partitionTags(block)[2]) - 1
+            cells, tags = nx.nonzero((procs >= 0) & (procs < Nproc))
+            codes = nx.unique(cells * Nproc + procs[cells, tags])
+            cells, procs = codes // Nproc, codes % Nproc
+
+            for procID, shardCells in enumerate(byProcessor(cells, procs)):
+                if len(shardCells) > 0:
+                    shardBlocks[procID].append(block[shardCells])
+
+            nodes = block[cells, 3 + block[0, 2]:]
+            nodeProcs.append((nodes * Nproc + procs[..., nx.newaxis]).ravel())
+
+        # the sorted (node, processor) pairs of the nodes each processor needs
+        nodeProcs = nx.unique(nx.concatenate(nodeProcs))
+        pairNodes, pairProcs = nodeProcs // Nproc, nodeProcs % Nproc
+
+        for block in faceBlocks:
+            nodes = block[..., 3 + block[0, 2]:]
+            numNodes = nodes.shape[-1]
+            nodes = nodes.ravel()
+
+            # every processor that needs each node of each face
+            first = nx.searchsorted(pairNodes, nodes, side='left')
+            counts = nx.searchsorted(pairNodes, nodes, side='right') - first
+            pairs = (nx.arange(counts.sum())
+                     - nx.repeat(nx.cumsum(counts) - counts, counts)
+                     + nx.repeat(first, counts))
+            faces = nx.repeat(nx.arange(len(nodes)) // numNodes, counts)
+
+            # a processor needs a face if it needs all of the face's nodes
+            codes, numKnown = nx.unique(faces * Nproc + pairProcs[pairs], return_counts=True)
+            codes = codes[numKnown == numNodes]
+
+            for procID, shardFaces in enumerate(byProcessor(codes // Nproc, codes % Nproc)):
+                if len(shardFaces) > 0:
+                    shardBlocks[procID].append(block[shardFaces])
+
+        nodeSorter = nx.argsort(nodeIDs)
+        for procID, (shardNodes, path) in enumerate(zip(byProcessor(pairNodes, pairProcs), paths)):
+            nodes = nx.searchsorted(nodeIDs, shardNodes, sorter=nodeSorter)
+            nodes = nodeSorter[nodes[nodes < len(nodeIDs)]]
+            nodes = nx.sort(nodes[nx.in1d(nodeIDs[nodes], shardNodes)])
+
+            shard = dict(("block%d" % i, block) for i, block in enumerate(shardBlocks[procID]))
+
+            # write to a temporary file, so that a shard is never read
+            # partially written
+            f, tmpPath = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+            f = os.fdopen(f, 'wb')
+            try:
+                nx.savez_compressed(f,
+                                    numBlocks=len(shardBlocks[procID]),
+                                    nodeIDs=nodeIDs[nodes],
+                                    nodeCoords=nodeCoords[nodes],
+                                    names=nx.array(names or ""),
+                                    hasNames=names is not None,
+                                    offsets=nx.array([cellOffset, faceOffset]),
+                                    metaData=nx.array([self.version, self.fileType, self.dataSize]),
+                                    dimensions=self.dimensions,
+                                    **shard)
+            finally:
+                f.close()
+            os.rename(tmpPath, path)
+
+    def _shardPaths(self):
+        """
+        Return the directory for the shards of this file, the shard of each
+        processor, and whether the directory is temporary.
+
+        The shards of a mesh file are kept in `<filename>.shards`, so that
+        the file is only parsed once for any number of partitions.
+        Temporary mesh files, which no later run can read again, have their
+        shards in a temporary directory instead.
+        """
+        directory = self.filename + ".shards"
+        isTemporary = self.fileIsTemporary
+        if not isTemporary:
+            try:
+                if not os.path.exists(directory):
+                    os.makedirs(directory)
+            except OSError:
+                isTemporary = True
+
+        if isTemporary:
+            try:
+                directory = tempfile.mkdtemp(suffix=".shards",
+                                             dir=os.path.dirname(os.path.abspath(self.filename)))
+            except OSError:
+                directory = tempfile.mkdtemp(suffix=".shards")
+            key = "shard"
+        else:
+            key = self._shardKey()
+
+        paths = [os.path.join(directory, "%s-%d.npz" % (key, procID))
+                 for procID in range(self.communicator.Nproc)]
+
+        return directory, paths, isTemporary
+
+    def _readShard(self):
+        """
+        Read this processor's shard, written by the first processor unless
+        an earlier run already did so.
+
+        Returns the same as `_readSections()`, but with the element ID
+        offsets of the whole file.
+        """
+        if self.communicator.procID == 0:
+            try:
+                directory, paths, isTemporary = self._shardPaths()
+                if not all([os.path.exists(path) for path in paths]):
+                    # remove shards of an earlier version of the file or
+                    # for another number of processors
+                    for name in os.listdir(directory):
+                        if name.endswith(".npz"):
+                            os.unlink(os.path.join(directory, name))
+                    self._writeShards(paths)
+                error = None
+            except Exception, e:
+                directory = paths = isTemporary = None
+                error = "%s: %s" % (e.__class__.__name__, e)
+        else:
+            directory = paths = isTemporary = error = None
+
+        directory, paths, isTemporary, error = self.communicator.bcast((directory, paths, isTemporary, error))
+        if error is not None:
+            raise GmshException(error)
+
+        data = nx.load(paths[self.communicator.procID])
+        try:
+            self.version, self.fileType, self.dataSize = data["metaData"].tolist()
+            self.dimensions = int(data["dimensions"])
+            nodeIDs = data["nodeIDs"]
+            nodeCoords = data["nodeCoords"]
+            blocks = [data["block%d" % i] for i in range(int(data["numBlocks"]))]
+            if bool(data["hasNames"]):
+                names = str(data["names"])
+            else:
+                names = None
+            offsets = tuple(data["offsets"].tolist())
+        finally:
+            data.close()
+
+        if isTemporary:
+            self.communicator.Barrier()
+            if self.communicator.procID == 0:
+                shutil.rmtree(directory)
+
+        self._setElementTypes(nodeCoords)
 
-            return offset, tags, physicalEntity, geometricalEntity
+        return nodeIDs, nodeCoords, blocks, names, offsets
 
+    def _parseElementFile(self, blocks, offsets=None):
+        """
+        Return three objects, the first for non-ghost cells, the second for
+        ghost cells, and the third for faces.
+
+        All nastiness concerning ghost cell
+        calculation is consolidated here: if we were ever to need to CALCULATE
+        GHOST CELLS OURSELVES, the only code we'd have to change is in here.
+        """
 
         cellsData = _ElementData()
         ghostsData = _ElementData()
         facesData = _ElementData()
 
-        cellOffset = -1 # this will be subtracted from gmsh ID to obtain global ID
-        faceOffset = -1 # this will be subtracted from gmsh ID to obtain global ID
+        # these will be subtracted from gmsh ID to obtain global ID
+        if offsets is None:
+            cellOffset = faceOffset = None
+        else:
+            cellOffset, faceOffset = offsets
         pid = self.communicator.procID + 1
 
-        elemsFile = open(self.elemsPath, 'r')
+        for block in blocks:
+            elemType = block[0, 1]
+            numTags  = block[0, 2]
+            IDs      = block[..., 0]
+            nodes    = block[..., 3 + numTags:]
 
-        elemsFile.readline() # skip number of elements
-        for el in elemsFile:
-            currLineInts = [int(x) for x in el.split()]
-            elemType     = currLineInts[1]
+            physicalEntities, geometricalEntities, tags = self._partitionTags(block)
 
             if elemType in self.numFacesPerCell.keys():
-                # element is a cell
-
-                (cellOffset,
-                 tags,
-                 physicalEntity,
-                 geometricalEntity) = _parseTags(offset=cellOffset,
-                                                 currLineInts=currLineInts)
-                currLineInts[0] -= cellOffset
-
-                if len(tags) > 0:
-                    # next item is a count
-                    if tags[0] != len(tags) - 1:
-                        warnings.warn("Partition count %d does not agree with number of remaining tags %d." % (tags[0], len(tags) - 1),
-                                      SyntaxWarning, stacklevel=2)
-                    tags = tags[1:]
+                # elements are cells
+
+                if cellOffset is None:
+                    # if first valid shape
+                    cellOffset = IDs[0]
 
                 if self.communicator.Nproc > 1:
-                    for tag in tags:
-                        if -tag == pid:
-                            # if we're collecting ghost cells and this is our ghost cell
-                            ghostsData.add(currLine=currLineInts, elType=elemType,
-                                           physicalEntity=physicalEntity,
-                                           geometricalEntity=geometricalEntity)
-                        elif tag == pid:
-                            # el is in this processor's partition or we collect all cells
-                            cellsData.add(currLine=currLineInts, elType=elemType,
-                                          physicalEntity=physicalEntity,
-                                          geometricalEntity=geometricalEntity)
+                    # collect this processor's ghost cells
+                    ghosts = (tags == -pid).any(axis=-1)
+                    ghostsData.add(nodes=nodes[ghosts], elType=elemType,
+                                   IDs=IDs[ghosts] - cellOffset,
+                                   physicalEntities=physicalEntities[ghosts],
+                                   geometricalEntities=geometricalEntities[ghosts])
+
+                    # collect cells in this processor's partition
+                    owned = (tags == pid).any(axis=-1)
+                    cellsData.add(nodes=nodes[owned], elType=elemType,
+                                  IDs=IDs[owned] - cellOffset,
+                                  physicalEntities=physicalEntities[owned],
+                                  geometricalEntities=geometricalEntities[owned])
                 else:
                     # we collect all cells
-                    cellsData.add(currLine=currLineInts, elType=elemType,
-                                  physicalEntity=physicalEntity,
-                                  geometricalEntity=geometricalEntity)
+                    cellsData.add(nodes=nodes, elType=elemType,
+                                  IDs=IDs - cellOffset,
+                                  physicalEntities=physicalEntities,
+                                  geometricalEntities=geometricalEntities)
             elif elemType in self.numVertsPerFace.keys():
-                # element is a face
+                # elements are faces
 
-                (faceOffset,
-                 tags,
-                 physicalEntity,
-                 geometricalEntity) = _parseTags(offset=faceOffset,
-                                                 currLineInts=currLineInts)
-                currLineInts[0] -= faceOffset
+                if faceOffset is None:
+                    faceOffset = IDs[0]
 
-                facesData.add(currLine=currLineInts, elType=elemType,
-                              physicalEntity=physicalEntity,
-                              geometricalEntity=geometricalEntity)
-
-        elemsFile.close()
+                facesData.add(nodes=nodes, elType=elemType,
+                              IDs=IDs - faceOffset,
+                              physicalEntities=physicalEntities,
+                              geometricalEntities=geometricalEntities)
 
         return cellsData, ghostsData, facesData
 
 
-    def _parseNamesFile(self):
+    def _parseNamesFile(self, names):
         physicalNames = {
             0: dict(),
             1: dict(),
             2: dict(),
             3: dict()
         }
-        if self.namesPath is not None:
-            namesFile = open(self.namesPath, 'r')
-
-            namesFile.readline() # skip number of elements
-            for nm in namesFile:
+        if names is not None:
+            for nm in names.splitlines()[1:]: # skip number of names
                 nm = nm.split()
+                if len(nm) == 0:
+                    continue
                 if self.version > 2.0:
                     dim = [int(nm.pop(0))]
                 else:
@@ -1152,8 +1719,6 @@ class MSHFile(GmshFile):
                 for d in dim:
                     physicalNames[d][name] = int(num)
 
-            namesFile.close()
-
         return physicalNames
 
     def makeMapVariables(self, mesh):
@@ -1253,35 +1818,533 @@ class MSHFile(GmshFile):
         ...     p = Popen(["gmsh", os.path.join(dir, "cyl.msh")]) # doctest: +GMSH
         ...     doctest_raw_input("CylindricalGrid2D... Press enter.")
 
+        Test reading a mesh of mixed hexahedron, pyramid, prism, and
+        tetrahedron cells, with some tagged faces, one of which is tagged
+        twice and one of which is not a face of any cell
+
+        >>> from fipy.tools import serialComm
+        >>> f = open(os.path.join(dir, "mixed.msh"), 'w')
+        >>> f.write('''$MeshFormat
+        ... 2.2 0 8
+        ... $EndMeshFormat
+        ... $PhysicalNames
+        ... 2
+        ... 2 1 "bottom"
+        ... 3 7 "body"
+        ... $EndPhysicalNames
+        ... $Nodes
+        ... 12
+        ... 1 0 0 0
+        ... 2 1 0 0
+        ... 3 1 1 0
+        ... 4 0 1 0
+        ... 5 0 0 1
+        ... 6 1 0 1
+        ... 7 1 1 1
+        ... 8 0 1 1
+        ... 9 0.5 0.5 2
+        ... 10 2 0 0
+        ... 11 2 0 1
+        ... 12 2 1 0
+        ... $EndNodes
+        ... $Elements
+        ... 8
+        ... 1 3 2 1 2 1 2 3 4
+        ... 2 2 2 3 4 2 10 3
+        ... 3 2 2 5 4 1 2 9
+        ... 4 2 2 6 4 2 10 3
+        ... 5 5 2 7 1 1 2 3 4 5 6 7 8
+        ... 6 7 2 7 1 5 6 7 8 9
+        ... 7 6 2 8 1 2 10 3 6 11 7
+        ... 8 4 2 8 1 10 12 3 11
+        ... $EndElements
+        ... ''')
+        >>> f.close()
+
+        >>> f = MSHFile(filename=os.path.join(dir, "mixed.msh"), dimensions=None,
+        ...             communicator=serialComm)
+        >>> (vertexCoords, facesToVertices, cellsToFaces,
+        ...  cellIDs, ghostCellIDs, cellsToVertices) = f.read()
+        >>> f.close()
+        >>> print f.dimensions, vertexCoords.shape, facesToVertices.shape, cellsToFaces.shape
+        3 (3, 12) (4, 18) (6, 4)
+        >>> print cellIDs, ghostCellIDs
+        [0, 1, 2, 3] []
+        >>> print f.physicalCellMap
+        [7 7 8 8]
+        >>> print f.physicalFaceMap
+        [1 0 0 0 0 0 0 0 0 0 6 0 0 0 0 0 0 0]
+        >>> print f.physicalNames[2], f.physicalNames[3]
+        {'bottom': 1} {'body': 7}
+
+        The same cells in MSH 4.1 format, where elements are grouped by
+        geometrical entity and physical entities belong to the geometrical
+        entities
+
+        >>> f = open(os.path.join(dir, "mixed4.msh"), 'w')
+        >>> f.write('''$MeshFormat
+        ... 4.1 0 8
+        ... $EndMeshFormat
+        ... $Entities
+        ... 0 0 1 2
+        ... 4 0 0 0 2 1 0 1 3 0
+        ... 1 0 0 0 1 1 2 1 7 0
+        ... 2 1 0 0 2 1 1 1 8 0
+        ... $EndEntities
+        ... $Nodes
+        ... 2 12 1 12
+        ... 3 1 0 9
+        ... 1
+        ... 2
+        ... 3
+        ... 4
+        ... 5
+        ... 6
+        ... 7
+        ... 8
+        ... 9
+        ... 0 0 0
+        ... 1 0 0
+        ... 1 1 0
+        ... 0 1 0
+        ... 0 0 1
+        ... 1 0 1
+        ... 1 1 1
+        ... 0 1 1
+        ... 0.5 0.5 2
+        ... 3 2 0 3
+        ... 10
+        ... 11
+        ... 12
+        ... 2 0 0
+        ... 2 0 1
+        ... 2 1 0
+        ... $EndNodes
+        ... $Elements
+        ... 5 5 1 5
+        ... 2 4 2 1
+        ... 1 2 10 3
+        ... 3 1 5 1
+        ... 2 1 2 3 4 5 6 7 8
+        ... 3 1 7 1
+        ... 3 5 6 7 8 9
+        ... 3 2 6 1
+        ... 4 2 10 3 6 11 7
+        ... 3 2 4 1
+        ... 5 10 12 3 11
+        ... $EndElements
+        ... ''')
+        >>> f.close()
+
+        >>> f = MSHFile(filename=os.path.join(dir, "mixed4.msh"), dimensions=None,
+        ...             communicator=serialComm)
+        >>> (vertexCoords, facesToVertices, cellsToFaces,
+        ...  cellIDs, ghostCellIDs, cellsToVertices) = f.read()
+        >>> f.close()
+        >>> print f.version, vertexCoords.shape, facesToVertices.shape, cellsToFaces.shape
+        4.1 (3, 12) (4, 18) (6, 4)
+        >>> print f.physicalCellMap, f.geometricalCellMap
+        [7 7 8 8] [1 1 2 2]
+        >>> print f.physicalFaceMap.sum(), f.geometricalFaceMap.sum()
+        3 4
+
+        and a binary MSH 2.2 file of two triangles, which is arranged in
+        blocks of elements of the same type
+
+        >>> import struct
+        >>> f = open(os.path.join(dir, "binary.msh"), 'wb')
+        >>> f.write("$MeshFormat\\n2.2 1 8\\n" + struct.pack("<i", 1) + "\\n$EndMeshFormat\\n")
+        >>> f.write("$Nodes\\n4\\n")
+        >>> for node in [(1, 0., 0., 0.), (2, 1., 0., 0.), (3, 1., 1., 0.), (4, 0., 1., 0.)]:
+        ...     f.write(struct.pack("<iddd", *node))
+        >>> f.write("\\n$EndNodes\\n$Elements\\n3\\n")
+        >>> f.write(struct.pack("<3i", 1, 1, 2) + struct.pack("<5i", 1, 5, 3, 1, 2))
+        >>> f.write(struct.pack("<3i", 2, 2, 2) + struct.pack("<12i", 2, 6, 1, 1, 2, 3,
+        ...                                                             3, 6, 1, 1, 3, 4))
+        >>> f.write("\\n$EndElements\\n")
+        >>> f.close()
+
+        >>> f = MSHFile(filename=os.path.join(dir, "binary.msh"), dimensions=2,
+        ...             communicator=serialComm)
+        >>> (vertexCoords, facesToVertices, cellsToFaces,
+        ...  cellIDs, ghostCellIDs, cellsToVertices) = f.read()
+        >>> f.close()
+        >>> print vertexCoords
+        [[ 0.  1.  1.  0.]
+         [ 0.  0.  1.  1.]]
+        >>> print cellsToFaces
+        [[0 2]
+         [1 3]
+         [2 4]]
+        >>> print f.physicalCellMap, f.physicalFaceMap
+        [6 6] [5 0 0 0 0]
+
         >>> import shutil
         >>> shutil.rmtree(dir)
         """
         pass
 
+class _MeshCache(object):
+    """
+    A directory of mesh topologies that were parsed from MSH files generated
+    by Gmsh.
+
+    Entries are identified by a hash of the geometry script, the mesh
+    dimensions and order, the background field, the Gmsh version, and the
+    number of partitions, so a mesh is only generated and parsed once for
+    any combination of these. Files that are included or merged by the
+    geometry script are not part of the hash.
+
+    The cache is enabled by setting :envvar:`FIPY_GMSH_CACHE` to a
+    directory. When the files in that directory exceed
+    :envvar:`FIPY_GMSH_CACHE_SIZE` megabytes (1024 by default), the least
+    recently used are deleted.
+
+    >>> import os
+    >>> import tempfile
+    >>> import shutil
+    >>> from fipy.tools import serialComm
+
+    >>> dir = tempfile.mkdtemp()
+    >>> geo = os.path.join(dir, "square.geo")
+    >>> f = open(geo, 'w')
+    >>> f.write("Rectangle(1) = {0, 0, 0, 1, 1};")
+    >>> f.close()
+    >>> msh = os.path.join(dir, "square.msh")
+    >>> f = open(msh, 'w')
+    >>> f.write('''$MeshFormat
+    ... 2.2 0 8
+    ... $EndMeshFormat
+    ... $PhysicalNames
+    ... 1
+    ... 2 1 "square"
+    ... $EndPhysicalNames
+    ... $Nodes
+    ... 4
+    ... 1 0 0 0
+    ... 2 1 0 0
+    ... 3 1 1 0
+    ... 4 0 1 0
+    ... $EndNodes
+    ... $Elements
+    ... 3
+    ... 1 1 2 5 3 1 2
+    ... 2 2 2 1 6 1 2 3
+    ... 3 2 2 1 6 1 3 4
+    ... $EndElements
+    ... ''')
+    >>> f.close()
+
+    >>> cache = _MeshCache(directory=os.path.join(dir, "cache"), maxSize=1e6)
+    >>> key = cache.key(geoFile=geo, dimensions=2, order=1, background=None,
+    ...                 version="2.8.5", communicator=serialComm)
+    >>> key == cache.key(geoFile=geo, dimensions=2, order=2, background=None,
+    ...                  version="2.8.5", communicator=serialComm)
+    False
+    >>> key == cache.key(geoFile=geo, dimensions=2, coordDimensions=3,
+    ...                  order=1, background=None, version="2.8.5",
+    ...                  communicator=serialComm)
+    False
+    >>> path = cache.path(key, communicator=serialComm)
+    >>> cache.contains(path, communicator=serialComm)
+    False
+
+    Parsing a mesh stores its topology
+
+    >>> f = MSHFile(filename=msh, dimensions=2, communicator=serialComm)
+    >>> f._cache, f._cachePath = cache, path
+    >>> topology = f.read()
+    >>> f.close()
+    >>> cache.contains(path, communicator=serialComm)
+    True
+
+    and the same topology is retrieved without the MSH file
+
+    >>> cached = _CachedMSHFile(filename=path, cache=cache, dimensions=2,
+    ...                         communicator=serialComm)
+    >>> cachedTopology = cached.read()
+    >>> print [nx.allclose(a, b) for a, b in zip(topology, cachedTopology)]
+    [True, True, True, True, True, True]
+    >>> print (cachedTopology[-1].mask == topology[-1].mask).all()
+    True
+    >>> print cached.physicalFaceMap, cached.physicalCellMap, cached.physicalNames[2]
+    [5 0 0 0 0] [1 1] {'square': 1}
+
+    Entries beyond the size limit are evicted, least recently used first
+
+    >>> cache.maxSize = 0
+    >>> cache.store(path + "-newer.npz", mshFile=f, topology=topology)
+    >>> cache.contains(path, communicator=serialComm)
+    False
+    >>> cache.contains(path + "-newer.npz", communicator=serialComm)
+    True
+
+    The same geometry script, meshed in two and in three dimensional space,
+    is cached as two entries
+
+    >>> environ = os.environ.get('FIPY_GMSH_CACHE')
+    >>> os.environ['FIPY_GMSH_CACHE'] = os.path.join(dir, "meshes")
+    >>> square = '''
+    ... Point(1) = {0, 0, 0, 0.5};
+    ... Point(2) = {1, 0, 0, 0.5};
+    ... Point(3) = {1, 1, 0, 0.5};
+    ... Point(4) = {0, 1, 0, 0.5};
+    ... Line(1) = {1, 2};
+    ... Line(2) = {2, 3};
+    ... Line(3) = {3, 4};
+    ... Line(4) = {4, 1};
+    ... Line Loop(1) = {1, 2, 3, 4};
+    ... Plane Surface(1) = {1};
+    ... '''
+    >>> print Gmsh2D(square).vertexCoords.shape[0] # doctest: +GMSH
+    2
+    >>> print Gmsh2DIn3DSpace(square).vertexCoords.shape[0] # doctest: +GMSH
+    3
+    >>> print Gmsh2D(square).vertexCoords.shape[0] # doctest: +GMSH
+    2
+    >>> if environ is None:
+    ...     del os.environ['FIPY_GMSH_CACHE']
+    ... else:
+    ...     os.environ['FIPY_GMSH_CACHE'] = environ
+
+    >>> shutil.rmtree(dir)
+    """
+    def __init__(self, directory, maxSize):
+        """
+        :Parameters:
+          - `directory`: where to store the parsed topologies
+          - `maxSize`: the number of bytes the stored files may occupy
+        """
+        self.directory = directory
+        self.maxSize = maxSize
+
+    @classmethod
+    def fromEnvironment(cls):
+        """
+        Return the cache configured by :envvar:`FIPY_GMSH_CACHE`, or `None`.
+        """
+        directory = os.environ.get('FIPY_GMSH_CACHE')
+        if not directory:
+            return None
+
+        maxSize = float(os.environ.get('FIPY_GMSH_CACHE_SIZE', 1024)) * 1024**2
+
+        return cls(directory=os.path.expanduser(directory), maxSize=maxSize)
+
+    def key(self, geoFile, dimensions, order, background, version, communicator, coordDimensions=None):
+        """
+        Return a hash of everything that determines the mesh generated from
+        `geoFile`.
+        """
+        coordDimensions = coordDimensions or dimensions
+
+        if background is not None:
+            # collective in parallel
+            backgroundValue = nx.ascontiguousarray(background.globalValue)
+            backgroundCenters = nx.ascontiguousarray(background.mesh.cellCenters.globalValue)
+
+        if communicator.procID == 0:
+            sha = hashlib.sha1()
+            f = open(geoFile, 'r')
+            sha.update(f.read())
+            f.close()
+            sha.update(repr((dimensions, coordDimensions, order, str(version), communicator.Nproc)))
+            if background is not None:
+                sha.update(backgroundValue.tostring())
+                sha.update(backgroundCenters.tostring())
+            key = sha.hexdigest()
+        else:
+            key = None
+
+        return communicator.bcast(key)
+
+    def path(self, key, communicator):
+        """
+        Return the file that holds this processor's partition of the mesh
+        identified by `key`.
+        """
+        return os.path.join(self.directory, "%s-%d.npz" % (key, communicator.procID))
+
+    def contains(self, path, communicator):
+        return bool(communicator.all(nx.array(os.path.exists(path))))
+
+    def store(self, path, mshFile, topology):
+        """
+        Save the `topology` returned by `mshFile.read()`, along with the
+        entity maps and names of `mshFile`.
+        """
+        if not os.path.exists(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                # another processor created it
+                pass
+
+        (vertexCoords, facesToVertices, cellsToFaces,
+         cellIDs, ghostCellIDs, cellsToVertices) = topology
+
+        # write to a temporary file, so that other runs never see a
+        # partial entry
+        f, tmpPath = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        f = os.fdopen(f, 'wb')
+        try:
+            nx.savez(f,
+                     vertexCoords=vertexCoords,
+                     facesToVertices=facesToVertices,
+                     cellsToFaces=cellsToFaces,
+                     cellIDs=nx.array(cellIDs, dtype='l'),
+                     ghostCellIDs=nx.array(ghostCellIDs, dtype='l'),
+                     cellsToVertices=nx.MA.filled(cellsToVertices, -1),
+                     physicalCellMap=nx.asarray(mshFile.physicalCellMap),
+                     geometricalCellMap=nx.asarray(mshFile.geometricalCellMap),
+                     physicalFaceMap=nx.asarray(mshFile.physicalFaceMap),
+                     geometricalFaceMap=nx.asarray(mshFile.geometricalFaceMap),
+                     physicalNames=nx.array(repr(mshFile.physicalNames)),
+                     dimensions=nx.array(mshFile.dimensions),
+                     coordDimensions=nx.array(mshFile.coordDimensions))
+        finally:
+            f.close()
+        os.rename(tmpPath, path)
+
+        self._evict(keep=path)
+
+    def load(self, path, mshFile):
+        """
+        Return the topology stored in `path` and set the entity maps and
+        names of `mshFile`.
+        """
+        # record the use, for eviction
+        os.utime(path, None)
+
+        data = nx.load(path)
+        try:
+            mshFile.dimensions = int(data["dimensions"])
+            mshFile.coordDimensions = int(data["coordDimensions"])
+            mshFile.physicalCellMap = data["physicalCellMap"]
+            mshFile.geometricalCellMap = data["geometricalCellMap"]
+            mshFile.physicalFaceMap = data["physicalFaceMap"]
+            mshFile.geometricalFaceMap = data["geometricalFaceMap"]
+            mshFile.physicalNames = ast.literal_eval(str(data["physicalNames"]))
+
+            return (data["vertexCoords"],
+                    data["facesToVertices"],
+                    data["cellsToFaces"],
+                    data["cellIDs"].tolist(),
+                    data["ghostCellIDs"].tolist(),
+                    nx.MA.masked_equal(data["cellsToVertices"], value=-1))
+        finally:
+            data.close()
+
+    def _evict(self, keep):
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if name.endswith(".npz") and entry != keep:
+                try:
+                    stat = os.stat(entry)
+                except OSError:
+                    # evicted by another processor
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+
+        size = sum([entrySize for mtime, entrySize, entry in entries]) + os.path.getsize(keep)
+
+        for mtime, entrySize, entry in sorted(entries):
+            if size <= self.maxSize:
+                break
+            try:
+                os.unlink(entry)
+            except OSError:
+                pass
+            size -= entrySize
+
+class _CachedMSHFile(MSHFile):
+    """
+    Stands in for an `MSHFile` whose topology was stored in a `_MeshCache`.
+    """
+    def __init__(self, filename, cache, dimensions, coordDimensions=None, communicator=parallelComm):
+        self.filename = filename
+        self.communicator = communicator
+        self.dimensions = dimensions
+        self.coordDimensions = coordDimensions
+        self.gmshOutput = ""
+        self.fileIsTemporary = False
+
+        self.mesh = None
+        self.meshWritten = False
+
+        self.cache = cache
+
+    def read(self):
+        return self.cache.load(self.filename, mshFile=self)
+
+    def close(self):
+        pass
+
 class _ElementData(object):
     """
     Bookkeeping for cells. Declared as own class for generality.
 
-    "nodes": A Python list of the vertices that make up this element
-    "shapes": A shapeTypes Python list
+    Elements are added in blocks of the same type.
+
+    "nodes": An array of the vertices that make up each element, padded with -1
+    "numNodes": An array of the number of vertices of each element
+    "shapes": An array of the shape type of each element
     "idmap": A Python list which maps vertexCoords idx -> global ID
-    "physicalEntities": A Python list of the Gmsh physical entities each element is in
-    "geometricalEntities": A Python list of the Gmsh geometrical entities each element is in
+    "physicalEntities": An array of the Gmsh physical entities each element is in
+    "geometricalEntities": An array of the Gmsh geometrical entities each element is in
     """
-    def __init__(self):
-        self.nodes = []
-        self.shapes = []
-        self.idmap = [] # vertexCoords idx -> gmsh ID (global ID)
-        self.physicalEntities = []
-        self.geometricalEntities = []
-
-    def add(self, currLine, elType, physicalEntity, geometricalEntity):
-        numTags = currLine[2]
-        self.nodes.append(currLine[(numTags+3):])
-        self.shapes.append(elType)
-        self.idmap.append(currLine[0])
-        self.physicalEntities.append(physicalEntity)
-        self.geometricalEntities.append(geometricalEntity)
+    def __init__(self, blocks=()):
+        self.blocks = list(blocks)
+
+    def add(self, nodes, elType, IDs, physicalEntities, geometricalEntities):
+        if len(IDs) > 0:
+            self.blocks.append((nodes, elType, IDs, physicalEntities, geometricalEntities))
+
+    def __add__(self, other):
+        return _ElementData(self.blocks + other.blocks)
+
+    def __len__(self):
+        return sum([len(IDs) for nodes, elType, IDs, physical, geometrical in self.blocks])
+
+    def _concatenate(self, field):
+        if len(self.blocks) == 0:
+            return nx.zeros((0,), 'l')
+        return nx.concatenate([block[field] for block in self.blocks])
+
+    @property
+    def nodes(self):
+        numNodes = [block[0].shape[-1] for block in self.blocks]
+        nodes = -nx.ones((len(self), max(numNodes + [0])), 'l')
+        start = 0
+        for block in self.blocks:
+            nodes[start:start + len(block[0]), :block[0].shape[-1]] = block[0]
+            start += len(block[0])
+        return nodes
+
+    @property
+    def numNodes(self):
+        if len(self.blocks) == 0:
+            return nx.zeros((0,), 'l')
+        return nx.concatenate([nx.ones(len(block[0]), 'l') * block[0].shape[-1] for block in self.blocks])
+
+    @property
+    def shapes(self):
+        if len(self.blocks) == 0:
+            return nx.zeros((0,), 'l')
+        return nx.concatenate([nx.ones(len(block[0]), 'l') * block[1] for block in self.blocks])
+
+    @property
+    def idmap(self):
+        return self._concatenate(2).tolist() # vertexCoords idx -> gmsh ID (global ID)
+
+    @property
+    def physicalEntities(self):
+        return self._concatenate(3)
+
+    @property
+    def geometricalEntities(self):
+        return self._concatenate(4)
 
 class _GmshTopology(_MeshTopology):
 
@@ -1554,6 +2617,10 @@ class Gmsh2D(Mesh2D):
       - `order`: ???
       - `background`: a `CellVariable` that specifies the desired characteristic
         lengths of the mesh cells
+      - `renumber`: if ``"rcm"`` or ``"morton"``, store the cells, faces,
+        and vertices in that order (see `fipy.meshes.renumbering`) rather
+        than as Gmsh delivers them; `cellPermutation`, `facePermutation`,
+        and `vertexPermutation` then give their original IDs
     """
 
     def __init__(self,
@@ -1561,7 +2628,8 @@ class Gmsh2D(Mesh2D):
                  coordDimensions=2,
                  communicator=parallelComm,
                  order=1,
-                 background=None):
+                 background=None,
+                 renumber=None):
 
         self.mshFile = openMSHFile(arg,
                                    dimensions=2,
@@ -1571,12 +2639,20 @@ class Gmsh2D(Mesh2D):
                                    mode='r',
                                    background=background)
 
+        topology = self.mshFile.read()
+
+        if renumber is not None:
+            (topology,
+             (self.vertexPermutation,
+              self.facePermutation,
+              self.cellPermutation)) = self.mshFile._renumber(topology, method=renumber)
+
         (verts,
          faces,
          cells,
          self.cellGlobalIDs,
          self.gCellGlobalIDs,
-         self._orderedCellVertexIDs_data) = self.mshFile.read()
+         self._orderedCellVertexIDs_data) = topology
 
         self.mshFile.close()
 
@@ -1653,6 +2729,38 @@ class Gmsh2D(Mesh2D):
         >>> print rect.cellVolumes[0] > 0 # doctest: +GMSH
         True
 
+        Renumbering stores the same cells and faces in a different order
+
+        >>> rectGeo = '''
+        ... cellSize = 2;
+        ... radius   = 10;
+        ... Point(2) = {-radius, radius, 0, cellSize};
+        ... Point(3) = {radius, radius, 0, cellSize};
+        ... Point(4) = {radius, -radius, 0, cellSize};
+        ... Point(5) = {-radius, -radius, 0, cellSize};
+        ... Line(6) = {2, 3};
+        ... Line(7) = {3, 4};
+        ... Line(8) = {4, 5};
+        ... Line(9) = {5, 2};
+        ... Line Loop(10) = {6, 7, 8, 9};
+        ... Plane Surface(11) = {10};
+        ... Physical Line("top") = {6};
+        ... Physical Surface("inside") = {11};
+        ... '''
+        >>> rect = Gmsh2D(rectGeo) # doctest: +GMSH
+        >>> for method in ("rcm", "morton"):
+        ...     renumbered = Gmsh2D(rectGeo, renumber=method) # doctest: +GMSH
+        ...     cells = renumbered.cellPermutation # doctest: +GMSH
+        ...     faces = renumbered.facePermutation # doctest: +GMSH
+        ...     print nx.allclose(renumbered.cellCenters.value,
+        ...                       rect.cellCenters.value[..., cells]), # doctest: +GMSH
+        ...     print nx.allclose(renumbered.faceCenters.value,
+        ...                       rect.faceCenters.value[..., faces]), # doctest: +GMSH
+        ...     print nx.allequal(renumbered.physicalFaces["top"].value,
+        ...                       rect.physicalFaces["top"].value[faces]) # doctest: +GMSH, +SERIAL
+        True True True
+        True True True
+
         Testing multiple shape types within a mesh;
 
         >>> circle = Gmsh2D('''
@@ -1846,14 +2954,19 @@ class Gmsh2DIn3DSpace(Gmsh2D):
       - `order`: ???
       - `background`: a `CellVariable` that specifies the desired characteristic
         lengths of the mesh cells
+      - `renumber`: if ``"rcm"`` or ``"morton"``, store the cells, faces,
+        and vertices in that order (see `fipy.meshes.renumbering`) rather
+        than as Gmsh delivers them; `cellPermutation`, `facePermutation`,
+        and `vertexPermutation` then give their original IDs
     """
-    def __init__(self, arg, communicator=parallelComm, order=1, background=None):
+    def __init__(self, arg, communicator=parallelComm, order=1, background=None, renumber=None):
         Gmsh2D.__init__(self,
                         arg,
                         coordDimensions=3,
                         communicator=communicator,
                         order=order,
-                        background=background)
+                        background=background,
+                        renumber=renumber)
 
     def _test(self):
         """
@@ -1921,8 +3034,12 @@ class Gmsh3D(Mesh):
       - `order`: ???
       - `background`: a `CellVariable` that specifies the desired characteristic
         lengths of the mesh cells
+      - `renumber`: if ``"rcm"`` or ``"morton"``, store the cells, faces,
+        and vertices in that order (see `fipy.meshes.renumbering`) rather
+        than as Gmsh delivers them; `cellPermutation`, `facePermutation`,
+        and `vertexPermutation` then give their original IDs
     """
-    def __init__(self, arg, communicator=parallelComm, order=1, background=None):
+    def __init__(self, arg, communicator=parallelComm, order=1, background=None, renumber=None):
         self.mshFile  = openMSHFile(arg,
                                     dimensions=3,
                                     communicator=communicator,
@@ -1930,12 +3047,20 @@ class Gmsh3D(Mesh):
                                     mode='r',
                                     background=background)
 
+        topology = self.mshFile.read()
+
+        if renumber is not None:
+            (topology,
+             (self.vertexPermutation,
+              self.facePermutation,
+              self.cellPermutation)) = self.mshFile._renumber(topology, method=renumber)
+
         (verts,
          faces,
          cells,
          self.cellGlobalIDs,
          self.gCellGlobalIDs,
-         self._orderedCellVertexIDs_data) = self.mshFile.read()
+         self._orderedCellVertexIDs_data) = topology
 
         self.mshFile.close()
 
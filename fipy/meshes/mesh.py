@@ -53,6 +53,207 @@ __all__ = ["MeshAdditionError", "Mesh"]
 class MeshAdditionError(Exception):
     pass
 
+def _indexType(*counts):
+    """
+    The smallest integer type that can index `counts` of each entity.
+    """
+    if max(counts + (0,)) < numerix.iinfo(numerix.int32).max:
+        return numerix.int32
+    else:
+        return numerix.int_
+
+def _csrIDs(IDs, dtype):
+    """
+    Return the offsets and the indices, stored as `dtype`, of the entries of
+    the -1 padded `IDs`, element by element.
+
+        >>> IDs = MA.masked_values(((0, 2, 4), (1, 3, -1), (5, -1, -1)), -1)
+        >>> offsets, indices = _csrIDs(IDs, numerix.int32)
+        >>> print offsets, indices
+        [0 3 5 6] [0 1 5 2 3 4]
+    """
+    IDs = numerix.asarray(MA.filled(IDs, -1), dtype=dtype).swapaxes(0, 1)
+    present = IDs != -1
+    offsets = numerix.concatenate(([0], numerix.cumsum(present.sum(axis=-1))))
+    return offsets.astype(_indexType(offsets[-1])), IDs[present]
+
+def _paddedPositions(offsets):
+    """
+    Return the position of each entry stored with `offsets` within its
+    element, and the element that it belongs to.
+    """
+    counts = numerix.diff(offsets)
+    elements = numerix.repeat(numerix.arange(len(counts)), counts)
+    entries = numerix.arange(offsets[-1]) - numerix.repeat(offsets[:-1], counts)
+    return entries, elements
+
+def _paddedIDs(offsets, indices, depth):
+    """
+    Return the IDs stored as `offsets` and `indices` as a masked array,
+    `depth` entries deep.
+
+        >>> print _paddedIDs(numerix.array((0, 3, 5, 6)),
+        ...                  numerix.array((0, 1, 5, 2, 3, 4)), 3)
+        [[0 2 4]
+         [1 3 --]
+         [5 -- --]]
+    """
+    numberOfElements = len(offsets) - 1
+    if len(indices) == depth * numberOfElements:
+        # every element is full, so there is nothing to pad
+        IDs = indices.reshape((numberOfElements, depth)).swapaxes(0, 1).copy()
+    else:
+        IDs = -numerix.ones((depth, numberOfElements), dtype=indices.dtype)
+        IDs[_paddedPositions(offsets)] = indices
+    return MA.masked_values(IDs, -1)
+
+def _paddedValues(offsets, values, depth):
+    """
+    Return the `values` of the entries stored with `offsets`, along their
+    last axis, as a masked array, `depth` entries deep, that is masked
+    where there is no entry.
+
+        >>> print _paddedValues(numerix.array((0, 3, 5, 6)),
+        ...                     numerix.array((1, -1, 1, -1, 1, -1)), 3)
+        [[1 -1 -1]
+         [-1 1 --]
+         [1 -- --]]
+    """
+    values = numerix.asarray(values)
+    entries, elements = _paddedPositions(offsets)
+    padded = numerix.zeros(values.shape[:-1] + (depth, len(offsets) - 1), dtype=values.dtype)
+    padded[..., entries, elements] = values
+    mask = numerix.ones(padded.shape, dtype=bool)
+    mask[..., entries, elements] = False
+    return MA.array(padded, mask=mask)
+
+class _CompressedIDs(object):
+    """
+    The IDs of the entities of each element of a `Mesh`, such as the faces
+    of each cell, stored as offsets and indices. The `Mesh` only keeps
+    those; the padded masked array that FiPy uses is built afresh each
+    time it is requested, so the `Mesh` itself works from the offsets and
+    indices.
+
+    Changing the masked array in place does not change the stored IDs;
+    assign it back instead.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, mesh, cls):
+        if mesh is None:
+            return self
+        return _paddedIDs(*mesh.__dict__[self.name + "CSR"])
+
+    def __set__(self, mesh, IDs):
+        if self.name + "CSR" in mesh.__dict__:
+            # keep the index type that the mesh was built with
+            dtype = mesh.__dict__[self.name + "CSR"][1].dtype
+        else:
+            dtype = numerix.asarray(MA.filled(IDs, -1)).dtype
+        self.store(mesh, IDs, dtype)
+
+    def store(self, mesh, IDs, dtype):
+        """
+        Store the -1 padded `IDs` of `mesh` as `dtype`.
+        """
+        offsets, indices = _csrIDs(IDs, dtype)
+        mesh.__dict__[self.name + "CSR"] = (offsets, indices, numerix.shape(IDs)[0])
+
+    def numberOfElements(self, mesh):
+        """
+        Return the number of elements of `mesh`.
+        """
+        return len(mesh.__dict__[self.name + "CSR"][0]) - 1
+
+    def counts(self, mesh):
+        """
+        Return the number of IDs of each element of `mesh`.
+        """
+        return numerix.diff(mesh.__dict__[self.name + "CSR"][0])
+
+    def depth(self, mesh):
+        """
+        Return the number of entries of each element in the padded array.
+        """
+        return mesh.__dict__[self.name + "CSR"][2]
+
+    def ragged(self, mesh):
+        """
+        Return the IDs of each element of `mesh`, in order, the element
+        that each belongs to, and the number of elements.
+        """
+        offsets, indices, depth = mesh.__dict__[self.name + "CSR"]
+        numberOfElements = len(offsets) - 1
+        elements = numerix.repeat(numerix.arange(numberOfElements), numerix.diff(offsets))
+        return indices, elements, numberOfElements
+
+    def padded(self, mesh, values):
+        """
+        Return the `values` of the IDs of each element of `mesh`, in the
+        order of `ragged`, as a masked array the shape of the padded IDs.
+        """
+        offsets, indices, depth = mesh.__dict__[self.name + "CSR"]
+        return _paddedValues(offsets, values, depth)
+
+    def leading(self, mesh, count, fill):
+        """
+        Return the first `count` IDs of each element of `mesh`, with `fill`
+        where an element has fewer, like the first `count` rows of the
+        filled padded IDs.
+        """
+        offsets, indices, depth = mesh.__dict__[self.name + "CSR"]
+        counts = numerix.diff(offsets)
+        IDs = numerix.empty((min(count, depth), len(counts)), dtype=indices.dtype)
+        for entry in range(len(IDs)):
+            present = counts > entry
+            IDs[entry] = fill
+            IDs[entry, present] = indices[offsets[:-1][present] + entry]
+        return IDs
+
+def _raggedIDs(IDs):
+    """
+    Return the unmasked entries of the padded `IDs`, element by element,
+    and the element that each belongs to.
+
+        >>> IDs = MA.masked_values(((0, 2, 4), (1, 3, -1), (5, -1, -1)), -1)
+        >>> print _raggedIDs(IDs)
+        (array([0, 1, 5, 2, 3, 4]), array([0, 0, 0, 1, 1, 2]))
+    """
+    present = ~MA.getmaskarray(IDs).swapaxes(0, 1)
+    return MA.filled(IDs).swapaxes(0, 1)[present], numerix.nonzero(present)[0]
+
+def _raggedSum(values, elements, numberOfElements):
+    """
+    Sum the last axis of `values` by element.
+    """
+    values = numerix.asarray(values)
+    sums = [numerix.bincount(elements, weights=row, minlength=numberOfElements)
+            for row in values.reshape((-1, values.shape[-1]))]
+    return numerix.reshape(sums, values.shape[:-1] + (numberOfElements,))
+
+class _GeometricQuantity(object):
+    """
+    A geometric quantity of a `Mesh` that is calculated by the method named
+    `calc` when it is first needed, and then cached in the `Mesh`.
+
+    If `calc` returns several quantities at once, `group` names all of
+    them, in order.
+    """
+    def __init__(self, name, calc, group=None):
+        self.name = name
+        self.calc = calc
+        self.group = group or (name,)
+
+    def __get__(self, mesh, cls):
+        if mesh is None:
+            return self
+        return mesh._getGeometricQuantity(self)
+
+    def __set__(self, mesh, value):
+        mesh._setGeometricQuantity(self.name, value)
+
 class Mesh(AbstractMesh):
     """Generic mesh class using numerix to do the calculations
 
@@ -69,15 +270,21 @@ class Mesh(AbstractMesh):
         """faceVertexIds and cellFacesIds must be padded with minus ones."""
 
         self.vertexCoords = vertexCoords
-        self.faceVertexIDs = MA.masked_values(faceVertexIDs, -1)
-        self.cellFaceIDs = MA.masked_values(cellFaceIDs, -1)
+
+        # the IDs are stored as offsets and indices, as compactly as the
+        # mesh size allows
+        indexType = _indexType(numerix.shape(vertexCoords)[-1],
+                               numerix.shape(faceVertexIDs)[-1],
+                               numerix.shape(cellFaceIDs)[-1])
+        Mesh.faceVertexIDs.store(self, faceVertexIDs, indexType)
+        Mesh.cellFaceIDs.store(self, cellFaceIDs, indexType)
 
         self.dim = self.vertexCoords.shape[0]
 
         if not hasattr(self, "numberOfFaces"):
-            self.numberOfFaces = self.faceVertexIDs.shape[-1]
+            self.numberOfFaces = Mesh.faceVertexIDs.numberOfElements(self)
         if not hasattr(self, "numberOfCells"):
-            self.numberOfCells = self.cellFaceIDs.shape[-1]
+            self.numberOfCells = Mesh.cellFaceIDs.numberOfElements(self)
         if not hasattr(self, "globalNumberOfCells"):
             self.globalNumberOfCells = self.numberOfCells
         if not hasattr(self, "globalNumberOfFaces"):
@@ -128,8 +335,9 @@ class Mesh(AbstractMesh):
         return interiorCellIDs, exteriorCellIDs
 
     def _calcCellToFaceOrientations(self):
-        tmp = numerix.take(self.faceCellIDs[0], self.cellFaceIDs)
-        return (tmp == MA.indices(tmp.shape)[-1]) * 2 - 1
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        orientations = (MA.filled(self.faceCellIDs[0])[faceIDs] == cells) * 2 - 1
+        return Mesh.cellFaceIDs.padded(self, orientations.astype(faceIDs.dtype))
 
     def _calcAdjacentCellIDs(self):
         return (MA.filled(self.faceCellIDs[0]),
@@ -138,15 +346,19 @@ class Mesh(AbstractMesh):
                                              self.faceCellIDs[1])))
 
     def _calcCellToCellIDs(self):
-        cellToCellIDs = numerix.take(self.faceCellIDs, self.cellFaceIDs, axis=1)
-        cellToCellIDs = MA.where(self._cellToFaceOrientations == 1,
-                                 cellToCellIDs[1], cellToCellIDs[0])
-        return cellToCellIDs
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        faceCellIDs = MA.filled(self.faceCellIDs)[:, faceIDs]
+        # the cell across each face, if there is one
+        first = faceCellIDs[0] == cells
+        cellToCellIDs = Mesh.cellFaceIDs.padded(self, numerix.where(first, faceCellIDs[1],
+                                                                          faceCellIDs[0]))
+        exterior = Mesh.cellFaceIDs.padded(self, first & MA.getmaskarray(self.faceCellIDs[1])[faceIDs])
+        return MA.masked_where(MA.filled(exterior, False), cellToCellIDs)
 
     def _calcCellToCellIDsFilled(self):
         N = self.numberOfCells
         M = self._maxFacesPerCell
-        cellIDs = numerix.repeat(numerix.arange(N)[numerix.newaxis, ...], M, axis=0)
+        cellIDs = numerix.repeat(numerix.arange(N, dtype=self._cellToCellIDs.dtype)[numerix.newaxis, ...], M, axis=0)
         return MA.where(MA.getmaskarray(self._cellToCellIDs), cellIDs,
                         self._cellToCellIDs)
 
@@ -154,64 +366,175 @@ class Mesh(AbstractMesh):
     Geometry set and calc
     """
 
+    """
+    The geometric quantities are only calculated when they are first
+    needed. While a quantity is calculated, any others that it uses are
+    recorded as its dependencies, so that assigning a new value to a
+    quantity releases everything that was calculated from the old one.
+    """
+
+    _faceCenters = _GeometricQuantity("_faceCenters", "_calcFaceCenters")
+    _faceAreas = _GeometricQuantity("_faceAreas", "_calcFaceAreas")
+    _cellCenters = _GeometricQuantity("_cellCenters", "_calcCellCenters")
+    _internalFaceToCellDistances = _GeometricQuantity("_internalFaceToCellDistances", "_calcFaceToCellDistAndVec",
+                                                      group=("_internalFaceToCellDistances", "_cellToFaceDistanceVectors"))
+    _cellToFaceDistanceVectors = _GeometricQuantity("_cellToFaceDistanceVectors", "_calcFaceToCellDistAndVec",
+                                                    group=("_internalFaceToCellDistances", "_cellToFaceDistanceVectors"))
+    _internalCellDistances = _GeometricQuantity("_internalCellDistances", "_calcCellDistAndVec",
+                                                group=("_internalCellDistances", "_cellDistanceVectors"))
+    _cellDistanceVectors = _GeometricQuantity("_cellDistanceVectors", "_calcCellDistAndVec",
+                                              group=("_internalCellDistances", "_cellDistanceVectors"))
+    faceNormals = _GeometricQuantity("faceNormals", "_calcFaceNormals")
+    _orientedFaceNormals = _GeometricQuantity("_orientedFaceNormals", "_calcOrientedFaceNormals")
+    _cellVolumes = _GeometricQuantity("_cellVolumes", "_calcCellVolumes")
+    _faceCellToCellNormals = _GeometricQuantity("_faceCellToCellNormals", "_calcFaceCellToCellNormals")
+    _faceTangents1 = _GeometricQuantity("_faceTangents1", "_calcFaceTangents",
+                                        group=("_faceTangents1", "_faceTangents2"))
+    _faceTangents2 = _GeometricQuantity("_faceTangents2", "_calcFaceTangents",
+                                        group=("_faceTangents1", "_faceTangents2"))
+    _cellToCellDistances = _GeometricQuantity("_cellToCellDistances", "_calcCellToCellDist")
+    _cellAreas = _GeometricQuantity("_cellAreas", "_calcCellAreas")
+    _cellNormals = _GeometricQuantity("_cellNormals", "_calcCellNormals")
+
+    faceVertexIDs = _CompressedIDs("faceVertexIDs")
+    cellFaceIDs = _CompressedIDs("cellFaceIDs")
+
+    _fixedGeometry = frozenset()
+
+    _lengthScale = _areaScale = _volumeScale = 1.
+
     def _setGeometry(self, scaleLength = 1.):
-        self._faceCenters = self._calcFaceCenters()
-        self._faceAreas = self._calcFaceAreas()
-        self._cellCenters = self._calcCellCenters()
-        (self._internalFaceToCellDistances,
-         self._cellToFaceDistanceVectors) = self._calcFaceToCellDistAndVec()
-        (self._internalCellDistances,
-         self._cellDistanceVectors) = self._calcCellDistAndVec()
-        self.faceNormals = self._calcFaceNormals()
-        self._orientedFaceNormals = self._calcOrientedFaceNormals()
-        self._cellVolumes = self._calcCellVolumes()
-        self._faceCellToCellNormals = self._calcFaceCellToCellNormals()
-        (self._faceTangents1,
-         self._faceTangents2) = self._calcFaceTangents()
-        self._cellToCellDistances = self._calcCellToCellDist()
+        # forget the geometry of any earlier initialization
+        self.__dict__.pop("_fixedGeometry", None)
+        self.__dict__.pop("_geometryDependents", None)
+        self.releaseGeometry()
 
         self._setScaledGeometry(self.scale['length'])
 
-        self._cellAreas = self._calcCellAreas()
-        self._cellNormals = self._calcCellNormals()
+    @property
+    def _geometricQuantities(self):
+        names = set()
+        for cls in self.__class__.__mro__:
+            names.update([name for name, attr in vars(cls).items()
+                          if isinstance(attr, _GeometricQuantity)])
+        return sorted(names)
+
+    def _getGeometricQuantity(self, quantity):
+        calculating = self.__dict__.setdefault("_calculatingGeometry", [])
+        if len(calculating) > 0:
+            # whatever is being calculated depends on this quantity
+            dependents = self.__dict__.setdefault("_geometryDependents", {})
+            dependents.setdefault(quantity.name, set()).update(calculating[-1])
+
+        if quantity.name not in self.__dict__:
+            calculating.append(quantity.group)
+            try:
+                values = getattr(self, quantity.calc)()
+            finally:
+                calculating.pop()
+
+            if len(quantity.group) == 1:
+                values = (values,)
+            for name, value in zip(quantity.group, values):
+                self.__dict__.setdefault(name, value)
+
+        return self.__dict__[quantity.name]
+
+    def _setGeometricQuantity(self, name, value):
+        self._releaseGeometry(self.__dict__.get("_geometryDependents", {}).get(name, ()))
+        self.__dict__[name] = value
+
+    def _releaseGeometry(self, names):
+        """
+        Release `names` and everything calculated from them, so that they
+        are recalculated when next needed.
+        """
+        dependents = self.__dict__.get("_geometryDependents", {})
+        for name in names:
+            if name not in self._fixedGeometry:
+                self.__dict__.pop(name, None)
+                self._releaseGeometry(dependents.pop(name, ()))
+
+    def _fixGeometry(self):
+        """
+        Calculate all of the geometry and keep it from being released, as
+        it can no longer be recalculated once the topology is altered.
+        """
+        for name in self._geometricQuantities:
+            getattr(self, name)
+        self._fixedGeometry = frozenset(self._geometricQuantities)
+
+    def releaseGeometry(self, *names):
+        """
+        Free the memory held by geometric quantities that are rarely used.
+        They are recalculated if they are needed again.
+
+            >>> from fipy import *
+            >>> mesh = Tri2D(nx=2, ny=2)
+            >>> tangents = numerix.array(mesh._faceTangents1)
+            >>> volumes = numerix.array(mesh.cellVolumes)
+            >>> mesh.releaseGeometry("_faceTangents1", "_faceTangents2", "_cellNormals")
+            >>> print "_faceTangents1" in mesh.__dict__
+            False
+            >>> print numerix.allequal(tangents, mesh._faceTangents1)
+            True
+
+        With no arguments, all of the geometry is released
+
+            >>> mesh.releaseGeometry()
+            >>> print "_cellVolumes" in mesh.__dict__
+            False
+            >>> print numerix.allequal(volumes, mesh.cellVolumes)
+            True
+
+            >>> mesh.releaseGeometry("cellVolumes")
+            Traceback (most recent call last):
+            ...
+            ValueError: cellVolumes is not a geometric quantity of the mesh
+
+        The geometry of meshes with connected faces, such as the periodic
+        grids, is not released, as it cannot be recalculated from the
+        altered topology.
+
+        :Parameters:
+          - `names`: The names of the quantities to release, such as
+            "_faceTangents1", "_cellNormals", or "_areaProjections".
+        """
+        if len(names) == 0:
+            names = self._geometricQuantities
+
+        for name in names:
+            if name not in self._geometricQuantities:
+                raise ValueError("%s is not a geometric quantity of the mesh" % name)
+            if name not in self._fixedGeometry:
+                self.__dict__.pop(name, None)
 
     def _calcFaceAreas(self):
-        faceVertexIDs = MA.filled(self.faceVertexIDs, -1)
-        substitute = numerix.repeat(faceVertexIDs[numerix.newaxis, 0],
-                                    faceVertexIDs.shape[0], axis=0)
-        faceVertexIDs = numerix.where(MA.getmaskarray(self.faceVertexIDs),
-                                      substitute, faceVertexIDs)
-        faceVertexCoords = numerix.take(self.vertexCoords, faceVertexIDs, axis=1)
-        faceOrigins = numerix.repeat(faceVertexCoords[:,0], faceVertexIDs.shape[0], axis=0)
-        faceOrigins = numerix.reshape(faceOrigins, MA.shape(faceVertexCoords))
-        faceVertexCoords = faceVertexCoords - faceOrigins
-        left = range(faceVertexIDs.shape[0])
-        right = left[1:] + [left[0]]
-        cross = numerix.sum(numerix.cross(faceVertexCoords,
-                                          numerix.take(faceVertexCoords, right, 1),
-                                          axis=0),
-                            1)
+        vertexIDs, faces, numberOfFaces = Mesh.faceVertexIDs.ragged(self)
+        offsets = self.__dict__["faceVertexIDsCSR"][0]
+        faceVertexCoords = numerix.take(self.vertexCoords, vertexIDs, axis=1)
+        faceVertexCoords = faceVertexCoords - faceVertexCoords[:, offsets[:-1][faces]]
+        # each vertex and the next one around its face
+        right = numerix.arange(1, len(vertexIDs) + 1)
+        nonempty = offsets[1:] > offsets[:-1]
+        right[offsets[1:][nonempty] - 1] = offsets[:-1][nonempty]
+        cross = _raggedSum(numerix.cross(faceVertexCoords,
+                                         faceVertexCoords[:, right],
+                                         axis=0),
+                           faces, numberOfFaces)
         return numerix.sqrtDot(cross, cross) / 2.
 
     def _calcFaceCenters(self):
-        maskedFaceVertexIDs = MA.filled(self.faceVertexIDs, 0)
-
-        faceVertexCoords = numerix.take(self.vertexCoords, maskedFaceVertexIDs, axis=1)
-
-        if MA.getmask(self.faceVertexIDs) is False:
-            faceVertexCoordsMask = numerix.zeros(numerix.shape(faceVertexCoords), 'l')
-        else:
-            faceVertexCoordsMask = \
-              numerix.repeat(MA.getmaskarray(self.faceVertexIDs)[numerix.newaxis,...],
-                             self.dim, axis=0)
+        vertexIDs, faces, numberOfFaces = Mesh.faceVertexIDs.ragged(self)
 
-        faceVertexCoords = MA.array(data=faceVertexCoords, mask=faceVertexCoordsMask)
+        faceVertexCoords = numerix.take(self.vertexCoords, vertexIDs, axis=1)
 
-        return MA.filled(MA.average(faceVertexCoords, axis=1))
+        return (_raggedSum(faceVertexCoords, faces, numberOfFaces)
+                / numerix.bincount(faces, minlength=numberOfFaces))
 
     @property
     def _rightHandOrientation(self):
-        faceVertexIDs = MA.filled(self.faceVertexIDs, 0)
+        faceVertexIDs = Mesh.faceVertexIDs.leading(self, 3, 0)
         faceVertexCoords = numerix.take(self.vertexCoords, faceVertexIDs, axis=1)
         t1 = faceVertexCoords[:,1,:] - faceVertexCoords[:,0,:]
         t2 = faceVertexCoords[:,2,:] - faceVertexCoords[:,1,:]
@@ -225,7 +548,7 @@ class Mesh(AbstractMesh):
         return 1 - 2 * (numerix.dot(faceNormals, self.cellDistanceVectors) < 0)
 
     def _calcFaceNormals(self):
-        faceVertexIDs = MA.filled(self.faceVertexIDs, 0)
+        faceVertexIDs = Mesh.faceVertexIDs.leading(self, 3, 0)
         faceVertexCoords = numerix.take(self.vertexCoords, faceVertexIDs, axis=1)
         t1 = faceVertexCoords[:,1,:] - faceVertexCoords[:,0,:]
         t2 = faceVertexCoords[:,2,:] - faceVertexCoords[:,1,:]
@@ -258,12 +581,15 @@ class Mesh(AbstractMesh):
 
     def _calcCellVolumes(self):
         tmp = self._faceCenters[0] * self._faceAreas * self.faceNormals[0]
-        tmp = numerix.take(tmp, self.cellFaceIDs) * self._cellToFaceOrientations
-        return MA.filled(MA.sum(tmp, 0))
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        orientations = (MA.filled(self.faceCellIDs[0])[faceIDs] == cells) * 2 - 1
+        return _raggedSum(numerix.take(tmp, faceIDs) * orientations,
+                          cells, numberOfCells)
 
     def _calcCellCenters(self):
-        tmp = numerix.take(self._faceCenters, self.cellFaceIDs, axis=1)
-        return MA.filled(MA.average(tmp, 1))
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        return (_raggedSum(numerix.take(self._faceCenters, faceIDs, axis=1), cells, numberOfCells)
+                / numerix.bincount(cells, minlength=numberOfCells))
 
     def _calcFaceToCellDistAndVec(self):
         tmp = MA.repeat(self._faceCenters[...,numerix.NewAxis,:], 2, 1)
@@ -283,9 +609,9 @@ class Mesh(AbstractMesh):
         return cellDistances, cellDistanceVectors
 
     def _calcFaceTangents(self):
-        faceVertexCoord = numerix.array(numerix.take(self.vertexCoords,
-                                                     self.faceVertexIDs[0],
-                                                     axis=1))
+        faceVertexCoord = numerix.take(self.vertexCoords,
+                                       Mesh.faceVertexIDs.leading(self, 1, 0)[0],
+                                       axis=1)
         tmp = self._faceCenters - faceVertexCoord
         faceTangents1 = tmp / numerix.sqrtDot(tmp, tmp)
         tmp = numerix.cross(faceTangents1, self.faceNormals, axis=0)
@@ -293,23 +619,17 @@ class Mesh(AbstractMesh):
         return faceTangents1, faceTangents2
 
     def _calcCellToCellDist(self):
-        return numerix.take(self._cellDistances, self.cellFaceIDs)
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        return Mesh.cellFaceIDs.padded(self, numerix.take(self._cellDistances, faceIDs))
 
     def _calcCellAreas(self):
-        from fipy.tools.numerix import take
-        return take(self._faceAreas, self.cellFaceIDs)
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        return Mesh.cellFaceIDs.padded(self, numerix.take(self._faceAreas, faceIDs))
 
     def _calcCellNormals(self):
-        cellNormals = numerix.take(self.faceNormals, self.cellFaceIDs, axis=1)
-        cellFaceCellIDs = numerix.take(self.faceCellIDs[0], self.cellFaceIDs)
-        cellIDs = numerix.repeat(numerix.arange(self.numberOfCells)[numerix.newaxis,...],
-                                 self._maxFacesPerCell,
-                                 axis=0)
-        direction = (cellFaceCellIDs == cellIDs) * 2 - 1
-        if self._maxFacesPerCell > 0:
-            return direction[numerix.newaxis, ...] * cellNormals
-        else:
-            return cellNormals
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        direction = (MA.filled(self.faceCellIDs[0])[faceIDs] == cells) * 2 - 1
+        return Mesh.cellFaceIDs.padded(self, direction * numerix.take(self.faceNormals, faceIDs, axis=1))
 
     """settable geometry properties"""
     def _getFaceToCellDistances(self):
@@ -317,7 +637,6 @@ class Mesh(AbstractMesh):
 
     def _setFaceToCellDistances(self, v):
         self._internalFaceToCellDistances = v
-        self._setScaledValues()
 
     _faceToCellDistances = property(_getFaceToCellDistances,
                                     _setFaceToCellDistances)
@@ -327,7 +646,6 @@ class Mesh(AbstractMesh):
 
     def _setCellDistances(self, v):
         self._internalCellDistances = v
-        self._setScaledValues()
 
     _cellDistances = property(_getCellDistances, _setCellDistances)
 
@@ -356,22 +674,61 @@ class Mesh(AbstractMesh):
 
         self._scale['area'] = self._calcAreaScale()
         self._scale['volume'] = self._calcVolumeScale()
+
+        # the scaled geometry is calculated later, but with this scale
+        self._lengthScale = self._scale['length']
+        self._areaScale = self._scale['area']
+        self._volumeScale = self._scale['volume']
+
         self._setScaledValues()
 
+    _scaledFaceAreas = _GeometricQuantity("_scaledFaceAreas", "_calcScaledFaceAreas")
+    _scaledCellVolumes = _GeometricQuantity("_scaledCellVolumes", "_calcScaledCellVolumes")
+    _scaledCellCenters = _GeometricQuantity("_scaledCellCenters", "_calcScaledCellCenters")
+    _scaledFaceToCellDistances = _GeometricQuantity("_scaledFaceToCellDistances", "_calcScaledFaceToCellDistances")
+    _scaledCellDistances = _GeometricQuantity("_scaledCellDistances", "_calcScaledCellDistances")
+    _scaledCellToCellDistances = _GeometricQuantity("_scaledCellToCellDistances", "_calcScaledCellToCellDistances")
+    _areaProjections = _GeometricQuantity("_areaProjections", "_calcAreaProjections")
+    _orientedAreaProjections = _GeometricQuantity("_orientedAreaProjections", "_calcOrientedAreaProjections")
+    _faceToCellDistanceRatio = _GeometricQuantity("_faceToCellDistanceRatio", "_calcFaceToCellDistanceRatio")
+    _faceAspectRatios = _GeometricQuantity("_faceAspectRatios", "_calcFaceAspectRatios")
+
+    _scaledGeometry = ("_scaledFaceAreas",
+                       "_scaledCellVolumes",
+                       "_scaledCellCenters",
+                       "_scaledFaceToCellDistances",
+                       "_scaledCellDistances")
+
+    _faceDependentGeometry = ("_scaledCellToCellDistances",
+                              "_areaProjections",
+                              "_orientedAreaProjections",
+                              "_faceToCellDistanceRatio",
+                              "_faceAspectRatios")
+
     def _setScaledValues(self):
-        self._scaledFaceAreas = self._scale['area'] * self._faceAreas
-        self._scaledCellVolumes = self._scale['volume'] * self._cellVolumes
-        self._scaledCellCenters = self._scale['length'] * self._cellCenters
-        self._scaledFaceToCellDistances = self._scale['length'] * self._faceToCellDistances
-        self._scaledCellDistances = self._scale['length'] * self._cellDistances
+        self._releaseGeometry(self._scaledGeometry)
         self._setFaceDependentScaledValues()
 
     def _setFaceDependentScaledValues(self):
-        self._scaledCellToCellDistances = self._scale['length'] * self._cellToCellDistances
-        self._areaProjections = self._calcAreaProjections()
-        self._orientedAreaProjections = self._calcOrientedAreaProjections()
-        self._faceToCellDistanceRatio = self._calcFaceToCellDistanceRatio()
-        self._faceAspectRatios = self._calcFaceAspectRatios()
+        self._releaseGeometry(self._faceDependentGeometry)
+
+    def _calcScaledFaceAreas(self):
+        return self._areaScale * self._faceAreas
+
+    def _calcScaledCellVolumes(self):
+        return self._volumeScale * self._cellVolumes
+
+    def _calcScaledCellCenters(self):
+        return self._lengthScale * self._cellCenters
+
+    def _calcScaledFaceToCellDistances(self):
+        return self._lengthScale * self._faceToCellDistances
+
+    def _calcScaledCellDistances(self):
+        return self._lengthScale * self._cellDistances
+
+    def _calcScaledCellToCellDistances(self):
+        return self._lengthScale * self._cellToCellDistances
 
     def _calcAreaScale(self):
         return self.scale['length']**2
@@ -434,6 +791,306 @@ class Mesh(AbstractMesh):
 
     __rmul__ = __mul__
 
+    def renumbered(self, method="rcm"):
+        """
+        Return a copy of the `Mesh` whose cells, faces, and vertices are
+        stored so that neighbors are close together in memory, as described
+        in `fipy.meshes.renumbering`.
+
+            >>> from fipy import *
+            >>> mesh = Tri2D(nx=3, ny=3)
+            >>> renumbered = mesh.renumbered()
+            >>> print renumbered.__class__.__name__
+            Mesh2D
+
+        The `cellPermutation`, `facePermutation`, and `vertexPermutation`
+        of the copy hold the original IDs of its cells, faces, and vertices
+
+            >>> print numerix.allclose(renumbered.cellVolumes,
+            ...                        mesh.cellVolumes[renumbered.cellPermutation])
+            True
+            >>> print numerix.allclose(renumbered.faceCenters,
+            ...                        mesh.faceCenters[..., renumbered.facePermutation])
+            True
+
+        so that a solution can be exported in the original order
+
+            >>> def solve(mesh):
+            ...     var = CellVariable(mesh=mesh)
+            ...     var.constrain(1., mesh.facesLeft)
+            ...     DiffusionTerm().solve(var)
+            ...     return var
+            >>> var = solve(renumbered)
+            >>> original = var.value[..., numerix.argsort(renumbered.cellPermutation)]
+            >>> print numerix.allclose(original, solve(mesh)) # doctest: +SERIAL
+            True
+
+        Renumbering again keeps track of the original IDs
+
+            >>> again = renumbered.renumbered(method="morton")
+            >>> print numerix.allclose(again.cellVolumes,
+            ...                        mesh.cellVolumes[again.cellPermutation])
+            True
+
+        :Parameters:
+          - `method`: Either ``"rcm"``, for the reverse Cuthill-McKee
+            ordering of the cells, or ``"morton"``, for the Morton ordering
+            of the cell centers.
+        """
+        from fipy.meshes.mesh1D import Mesh1D
+        from fipy.meshes.mesh2D import Mesh2D
+        from fipy.meshes.renumbering import _renumber
+
+        for meshClass in (Mesh1D, Mesh2D, Mesh):
+            if isinstance(self, meshClass):
+                break
+
+        (vertexOrder, faceOrder, cellOrder,
+         vertexCoords, faceVertexIDs, cellFaceIDs) = _renumber(self.vertexCoords,
+                                                               self.faceVertexIDs,
+                                                               self.cellFaceIDs,
+                                                               method=method)
+
+        newmesh = meshClass(vertexCoords=vertexCoords,
+                            faceVertexIDs=faceVertexIDs,
+                            cellFaceIDs=cellFaceIDs)
+
+        # a `Mesh` that was already renumbered refers back to its own original
+        if hasattr(self, "cellPermutation"):
+            vertexOrder = self.vertexPermutation[vertexOrder]
+            faceOrder = self.facePermutation[faceOrder]
+            cellOrder = self.cellPermutation[cellOrder]
+
+        (newmesh.vertexPermutation,
+         newmesh.facePermutation,
+         newmesh.cellPermutation) = (vertexOrder, faceOrder, cellOrder)
+
+        return newmesh
+
+    # what `Mesh.save` stores, besides the IDs and the geometric quantities
+    _savedTopology = ("vertexCoords", "faceCellIDs",
+                      "_cellToFaceOrientations", "_cellToCellIDs", "_cellToCellIDsFilled",
+                      "_adjacentCellIDs", "_interiorCellIDs", "_exteriorCellIDs",
+                      "_interiorFaces", "_exteriorFaces")
+    _savedScalars = ("dim", "numberOfFaces", "numberOfCells",
+                     "globalNumberOfFaces", "globalNumberOfCells",
+                     "_lengthScale", "_areaScale", "_volumeScale")
+
+    def save(self, filename):
+        """
+        Store the `Mesh` in a NumPy ``.npz`` file.
+
+        Unlike pickling, which only stores the vertices, faces, and cells,
+        the file also holds the derived topology and whatever geometry has
+        been calculated, so that `Mesh.load` does not need to recalculate
+        them. The face-vertex and cell-face IDs are stored as the offsets
+        and indices that the `Mesh` holds, and each masked array is stored
+        with its mask and fill value.
+
+            >>> from fipy import *
+            >>> import os, tempfile
+            >>> mesh = Tri2D(nx=3, ny=2) + Grid2D(nx=2, ny=2, dx=0.5) + ((3,), (0,))
+            >>> (f, filename) = tempfile.mkstemp('.npz')
+            >>> os.close(f)
+            >>> mesh.save(filename)
+            >>> from fipy.meshes.mesh import Mesh
+            >>> loaded = Mesh.load(filename)
+            >>> os.remove(filename)
+            >>> print loaded.__class__.__name__
+            Mesh2D
+            >>> print numerix.allequal(mesh.cellCenters, loaded.cellCenters)
+            True
+            >>> print numerix.allequal(mesh.faceCellIDs, loaded.faceCellIDs)
+            True
+            >>> print numerix.allequal(mesh.exteriorFaces, loaded.exteriorFaces)
+            True
+
+        The triangles of this mixed-element mesh have one face fewer than
+        the squares, so their missing face is masked
+
+            >>> print loaded.cellFaceIDs[..., 22:26]
+            [[4 5 41 42]
+             [21 22 47 48]
+             [27 28 43 44]
+             [-- -- 9 47]]
+            >>> for name in ("vertexCoords", "faceVertexIDs", "cellFaceIDs", "faceCellIDs",
+            ...              "_cellToFaceOrientations", "_cellToCellIDs", "_cellToCellIDsFilled"):
+            ...     original, restored = getattr(mesh, name), getattr(loaded, name)
+            ...     print name, (numerix.allequal(MA.getmaskarray(original),
+            ...                                   MA.getmaskarray(restored))
+            ...                  and numerix.allequal(MA.filled(original, 0),
+            ...                                       MA.filled(restored, 0)))
+            vertexCoords True
+            faceVertexIDs True
+            cellFaceIDs True
+            faceCellIDs True
+            _cellToFaceOrientations True
+            _cellToCellIDs True
+            _cellToCellIDsFilled True
+
+        The arrays of the file are mapped into memory, copy-on-write,
+        rather than read, including the offsets and indices of the IDs
+
+            >>> offsets, indices, depth = loaded.__dict__["cellFaceIDsCSR"]
+            >>> print isinstance(indices.base, numerix.memmap), depth
+            True 4
+            >>> print isinstance(loaded.vertexCoords.base, numerix.memmap)
+            True
+
+        The loaded `Mesh` can be used like the original
+
+            >>> def solve(mesh):
+            ...     var = CellVariable(mesh=mesh)
+            ...     var.constrain(1., mesh.facesLeft)
+            ...     DiffusionTerm().solve(var)
+            ...     return var
+            >>> print numerix.allclose(solve(mesh), solve(loaded)) # doctest: +SERIAL
+            True
+
+        Only the generic `Mesh`, `Mesh1D`, or `Mesh2D` is restored, as when
+        unpickling a `Mesh`.
+
+        :Parameters:
+          - `filename`: The path of the file to write.
+        """
+        from fipy.meshes.mesh1D import Mesh1D
+        from fipy.meshes.mesh2D import Mesh2D
+        from fipy.variables.faceVariable import FaceVariable
+
+        for meshClass in (Mesh1D, Mesh2D, Mesh):
+            if isinstance(self, meshClass):
+                break
+
+        arrays = {}
+        kinds = {}
+
+        def saveArray(name, value):
+            if isinstance(value, MA.MaskedArray):
+                arrays[name] = MA.filled(value)
+                arrays[name + "__mask"] = MA.getmaskarray(value)
+                arrays[name + "__fill"] = numerix.array(value.fill_value)
+                return "MaskedArray"
+            else:
+                arrays[name] = numerix.asarray(value)
+                return "ndarray"
+
+        for name in ("faceVertexIDs", "cellFaceIDs"):
+            offsets, indices, depth = self.__dict__[name + "CSR"]
+            arrays[name + "__offsets"] = offsets
+            arrays[name + "__indices"] = indices
+            kinds[name] = ("CSR", depth)
+
+        geometry = [name for name in self._geometricQuantities if name in self.__dict__]
+        for name in self._savedTopology + tuple(geometry):
+            value = getattr(self, name)
+            if isinstance(value, FaceVariable):
+                saveArray(name, numerix.array(value.value))
+                kinds[name] = "FaceVariable"
+            elif isinstance(value, (tuple, list)):
+                kinds[name] = (value.__class__.__name__,
+                               [saveArray("%s__%d" % (name, i), item)
+                                for i, item in enumerate(value)])
+            else:
+                kinds[name] = saveArray(name, value)
+
+        for name in self._savedScalars:
+            value = getattr(self, name)
+            if isinstance(value, (bool, int, long, float, numerix.number)):
+                arrays[name] = numerix.array(value)
+                kinds[name] = "scalar"
+
+        arrays["_fixedGeometry"] = numerix.array(sorted(self._fixedGeometry) or [""])
+        kinds["_fixedGeometry"] = "frozenset"
+
+        numerix.savez(filename,
+                      meshClass=numerix.array("%s.%s" % (meshClass.__module__, meshClass.__name__)),
+                      kinds=numerix.array(repr(kinds)),
+                      **arrays)
+
+    @staticmethod
+    def load(filename, mmap=True, communicator=serialComm):
+        """
+        Restore a `Mesh` stored by `Mesh.save`.
+
+        :Parameters:
+          - `filename`: The path of the file to read.
+          - `mmap`: Whether to map the arrays into memory, copy-on-write,
+            instead of reading them.
+          - `communicator`: The communicator of the restored `Mesh`.
+        """
+        import ast
+        import zipfile
+        from fipy.meshes.mesh1D import Mesh1D
+        from fipy.meshes.mesh2D import Mesh2D
+        from fipy.meshes.topologies.meshTopology import _Mesh1DTopology, _Mesh2DTopology
+        from fipy.tools.checkpoint import _memmap
+        from fipy.variables.faceVariable import FaceVariable
+
+        archive = zipfile.ZipFile(filename, mode="r")
+        try:
+            members = dict((info.filename[:-len(".npy")], info) for info in archive.infolist())
+        finally:
+            archive.close()
+
+        data = numerix.load(filename)
+        try:
+            meshClass = dict((cls.__name__, (cls, topologyClass))
+                             for cls, topologyClass in ((Mesh, _MeshTopology),
+                                                        (Mesh1D, _Mesh1DTopology),
+                                                        (Mesh2D, _Mesh2DTopology)))
+            meshClass, topologyClass = meshClass[str(data["meshClass"]).split(".")[-1]]
+
+            mesh = meshClass.__new__(meshClass)
+            AbstractMesh.__init__(mesh, communicator=communicator,
+                                  _RepresentationClass=_MeshRepresentation,
+                                  _TopologyClass=topologyClass)
+
+            def readArray(name):
+                array = None
+                if mmap and members[name].compress_type == zipfile.ZIP_STORED:
+                    array = _memmap(filename, members[name], mode="c")
+                if array is None:
+                    return data[name]
+                # FiPy checks the types of arrays exactly
+                return numerix.asarray(array)
+
+            def loadArray(name, kind):
+                if kind == "MaskedArray":
+                    return MA.array(readArray(name),
+                                    mask=readArray(name + "__mask"),
+                                    fill_value=data[name + "__fill"][()],
+                                    copy=False)
+                else:
+                    return readArray(name)
+
+            faceVariables = {}
+            for name, kind in ast.literal_eval(str(data["kinds"])).items():
+                if kind == "FaceVariable":
+                    faceVariables[name] = readArray(name)
+                elif isinstance(kind, tuple) and kind[0] == "CSR":
+                    mesh.__dict__[name + "CSR"] = (readArray(name + "__offsets"),
+                                                   readArray(name + "__indices"),
+                                                   kind[1])
+                elif kind in ("MaskedArray", "ndarray"):
+                    setattr(mesh, name, loadArray(name, kind))
+                elif kind == "scalar":
+                    setattr(mesh, name, data[name][()])
+                elif kind == "frozenset":
+                    setattr(mesh, name, frozenset([str(item) for item in data[name] if item]))
+                else:
+                    sequence, itemKinds = kind
+                    items = [loadArray("%s__%d" % (name, i), itemKind)
+                             for i, itemKind in enumerate(itemKinds)]
+                    setattr(mesh, name, {"tuple": tuple, "list": list}[sequence](items))
+        finally:
+            data.close()
+
+        # `FaceVariable`s need the rest of the `Mesh`
+        for name, value in faceVariables.items():
+            setattr(mesh, name, FaceVariable(mesh=mesh, value=value))
+
+        return mesh
+
     @property
     def _concatenableMesh(self):
         return self
@@ -443,6 +1100,10 @@ class Mesh(AbstractMesh):
         newmesh = Mesh(newCoords, numerix.array(self.faceVertexIDs), numerix.array(self.cellFaceIDs))
         return newmesh
 
+    def _connectFaces(self, faces0, faces1):
+        self._fixGeometry()
+        super(Mesh, self)._connectFaces(faces0, faces1)
+
     def _handleFaceConnection(self):
         """
         The _faceCellToCellNormals were added to ensure faceNormals == _faceCellToCellNormals for periodic grids.
@@ -453,42 +1114,38 @@ class Mesh(AbstractMesh):
         True
 
         """
-        self._cellToCellDistances = self._calcCellToCellDist()
-        self._faceCellToCellNormals = self._calcFaceCellToCellNormals()
-        self._setFaceDependentScaledValues()
+        recalculated = ("_cellToCellDistances", "_faceCellToCellNormals") + self._faceDependentGeometry
+        self._fixedGeometry = self._fixedGeometry.difference(recalculated)
+        self._releaseGeometry(recalculated)
 
     """calc Topology methods"""
 
     def _calcFaceCellIDs(self):
-        array = MA.array(MA.indices(self.cellFaceIDs.shape, 'l')[1],
-                         mask=MA.getmask(self.cellFaceIDs))
-        faceCellIDs = MA.zeros((2, self.numberOfFaces), 'l')
-
-        ## Nasty bug: MA.put(arr, ids, values) fills its ids and
-        ## values arguments when masked!  This was not the behavior
-        ## that was assumed when used below.  It was only working
-        ## because the old fill value was 0 and the first element of
-        ## the array needed to be 0 since the cell's face was
-        ## 0. numerix.put() has been changed to deal with this
-        ## properly.
-
-##         MA.put(firstRow, cellFaceIDsFlat[::-1], array[::-1])
-##         MA.put(secondRow, cellFaceIDsFlat, array)
-        firstRow = faceCellIDs[0]
-        secondRow = faceCellIDs[1]
-
-        numerix.put(firstRow, self.cellFaceIDs[::-1,::-1], array[::-1,::-1])
-        numerix.put(secondRow, self.cellFaceIDs, array)
-
-        mask = ((False,) * self.numberOfFaces, (firstRow == secondRow))
-        return MA.sort(MA.array(faceCellIDs, mask = mask),
-                                   axis=0)
+        faceIDs, cells, numberOfCells = Mesh.cellFaceIDs.ragged(self)
+        faceCellIDs = numerix.zeros((2, self.numberOfFaces), faceIDs.dtype)
+
+        # the cells are in increasing order, so writing them backwards
+        # leaves the lowest cell of each face in the first row, and
+        # forwards the highest in the second
+        numerix.put(faceCellIDs[0], faceIDs[::-1], cells[::-1])
+        numerix.put(faceCellIDs[1], faceIDs, cells)
+
+        mask = ((False,) * self.numberOfFaces, (faceCellIDs[0] == faceCellIDs[1]))
+        return MA.array(faceCellIDs, mask=mask)
 
     """get Topology methods"""
 
     @property
     def _maxFacesPerCell(self):
-        return self.cellFaceIDs.shape[0]
+        return Mesh.cellFaceIDs.depth(self)
+
+    @property
+    def _numberOfFacesPerCell(self):
+        return numerix.array(Mesh.cellFaceIDs.counts(self), 'l')
+
+    @property
+    def _facesPerCell(self):
+        return numerix.array(Mesh.cellFaceIDs.counts(self), dtype=numerix.INT_DTYPE)
 
     @property
     def _cellVertexIDs(self):
@@ -820,6 +1477,26 @@ class Mesh(AbstractMesh):
             ... # doctest: +SERIAL
             True
 
+            The topology of a mixed element mesh, of prisms and hexahedra,
+            is only held as offsets and indices, which take less memory
+            than the padded masked arrays, even once its geometry is
+            calculated.
+
+            >>> prismMesh = (Tri2D(nx=4, ny=4)
+            ...              + (Grid2D(nx=4, ny=4, dx=[1.] * 4, dy=[1.] * 4) + ((4,), (0,)))).extrude(layers=2)
+            >>> print numerix.allclose(prismMesh.cellVolumes.sum(), 64.)
+            True
+            >>> print [name for name in ("faceVertexIDs", "cellFaceIDs")
+            ...        if name in prismMesh.__dict__]
+            []
+            >>> for name in ("faceVertexIDs", "cellFaceIDs"):
+            ...     offsets, indices, depth = prismMesh.__dict__[name + "CSR"]
+            ...     padded = getattr(prismMesh, name)
+            ...     print name, (offsets.nbytes + indices.nbytes,
+            ...                   padded.data.nbytes + MA.getmaskarray(padded).nbytes)
+            faceVertexIDs (9636, 10400)
+            cellFaceIDs (3972, 4800)
+
         """
 
 def _test():
@@ -260,11 +260,8 @@ class Mesh2D(Mesh):
 
     @property
     def _VTKCellType(self):
-        try:
-            from tvtk.api import tvtk
-        except ImportError, e:
-            from enthought.tvtk.api import tvtk
-        return tvtk.Polygon().cell_type
+        # VTK_POLYGON, as numbered by VTK, so that TVTK is not needed to find it
+        return 7
 
     def _test(self):
         """
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "renumbering.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # ###################################################################
+ ##
+
+"""
+Renumbering of the cells, faces, and vertices of a mesh, so that
+neighboring elements are stored close together.
+
+Meshes generated by Gmsh arrive in an arbitrary element order. Gathers
+between neighboring cells then jump randomly through memory and the
+bandwidth of the solution matrix is as large as the mesh. Renumbering the
+cells with either
+
+ - ``"rcm"``: the reverse Cuthill-McKee ordering of the cell adjacency
+   graph, which minimizes the bandwidth of the matrix, or
+ - ``"morton"``: the Morton (Z-order) space-filling curve through the cell
+   centers, which keeps cells that are close in space close in memory,
+
+and then numbering the faces and vertices in the order that the renumbered
+cells first use them, improves the cache reuse of the geometry and matrix
+operations and the quality of incomplete factorization preconditioners.
+
+    >>> from fipy import *
+    >>> mesh = Grid2D(nx=3, ny=3)
+    >>> cellOrder = _cellOrder(mesh.vertexCoords, mesh.faceVertexIDs, mesh.cellFaceIDs, method="rcm")
+    >>> print cellOrder
+    [8 7 5 6 4 2 3 1 0]
+    >>> print _bandwidth(mesh.cellFaceIDs, cellOrder), _bandwidth(mesh.cellFaceIDs, numerix.arange(9))
+    3 3
+
+The reverse Cuthill-McKee ordering narrows the band of a scrambled mesh
+
+    >>> scrambled = numerix.random.RandomState(1).permutation(mesh.numberOfCells)
+    >>> cellFaceIDs = mesh.cellFaceIDs[..., scrambled]
+    >>> print _bandwidth(cellFaceIDs, numerix.arange(9)) > 3
+    True
+    >>> cellOrder = _cellOrder(mesh.vertexCoords, mesh.faceVertexIDs, cellFaceIDs, method="rcm")
+    >>> print _bandwidth(cellFaceIDs, cellOrder)
+    3
+
+and the Morton ordering recovers the quadrants of the grid
+
+    >>> mesh = Grid2D(nx=4, ny=4)
+    >>> print _cellOrder(mesh.vertexCoords, mesh.faceVertexIDs, mesh.cellFaceIDs, method="morton")
+    [ 0  1  4  5  2  3  6  7  8  9 12 13 10 11 14 15]
+
+Other methods are not recognized
+
+    >>> _cellOrder(mesh.vertexCoords, mesh.faceVertexIDs, mesh.cellFaceIDs, method="hilbert")
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown renumbering method 'hilbert'; use 'rcm' or 'morton'
+"""
+__docformat__ = 'restructuredtext'
+
+__all__ = []
+
+from fipy.tools import numerix
+from fipy.tools.numerix import MA
+from fipy.meshes.mesh import _raggedIDs
+
+def _padded(IDs):
+    """
+    Mask the -1 padding of `IDs`, whether or not they are already masked.
+    """
+    return MA.masked_less(MA.filled(IDs, -1), 0)
+
+def _cellAdjacency(cellFaceIDs):
+    """
+    Return the compressed sparse rows (`indptr`, `indices`) of the cells
+    that share a face with each cell.
+
+        >>> from fipy import Grid1D
+        >>> mesh = Grid1D(nx=3)
+        >>> print _cellAdjacency(mesh.cellFaceIDs)
+        (array([0, 1, 3, 4]), array([1, 0, 2, 1]))
+    """
+    numberOfCells = numerix.shape(cellFaceIDs)[-1]
+    faces, cells = _raggedIDs(_padded(cellFaceIDs))
+    order = numerix.argsort(faces, kind='mergesort')
+    faces, cells = faces[order], cells[order]
+    shared = (faces[1:] == faces[:-1]) & (cells[1:] != cells[:-1])
+    rows = numerix.concatenate((cells[:-1][shared], cells[1:][shared]))
+    columns = numerix.concatenate((cells[1:][shared], cells[:-1][shared]))
+    order = numerix.lexsort((columns, rows))
+    indptr = numerix.concatenate(([0], numerix.cumsum(numerix.bincount(rows, minlength=numberOfCells))))
+    return indptr, columns[order]
+
+def _reverseCuthillMcKee(indptr, indices):
+    """
+    Return the reverse Cuthill-McKee ordering of the graph with compressed
+    sparse rows `indptr` and `indices`.
+
+    Each connected component is traversed breadth first from its vertex
+    of least degree, visiting neighbors in order of increasing degree.
+    """
+    numberOfVertices = len(indptr) - 1
+    degree = numerix.diff(indptr)
+    # the traversal visits every vertex once, so plain lists are faster
+    # than many small arrays
+    neighbors = numerix.split(indices, indptr[1:-1])
+    neighbors = [list(n[numerix.argsort(degree[n], kind='mergesort')]) for n in neighbors]
+    visited = [False] * numberOfVertices
+    order = []
+    for start in numerix.argsort(degree, kind='mergesort').tolist():
+        if visited[start]:
+            continue
+        visited[start] = True
+        head = len(order)
+        order.append(start)
+        while head < len(order):
+            for neighbor in neighbors[order[head]]:
+                if not visited[neighbor]:
+                    visited[neighbor] = True
+                    order.append(neighbor)
+            head += 1
+    return numerix.array(order[::-1], dtype=int)
+
+def _mortonOrder(points):
+    """
+    Return the order of `points` along the Morton (Z-order) curve.
+
+        >>> print _mortonOrder(numerix.array(((0., 1., 0., 1.), (1., 1., 0., 0.))))
+        [2 3 0 1]
+    """
+    points = numerix.asarray(points, dtype=float)
+    dim = points.shape[0]
+    bits = min(21, 63 // dim)
+    lower = points.min(axis=-1)[..., numerix.newaxis]
+    extent = numerix.maximum(points.max(axis=-1)[..., numerix.newaxis] - lower, numerix.finfo(float).tiny)
+    quantized = ((points - lower) / extent * (2**bits - 1)).astype(numerix.uint64)
+    code = numerix.zeros(points.shape[-1], dtype=numerix.uint64)
+    for bit in range(bits):
+        for d in range(dim):
+            code |= ((quantized[d] >> numerix.uint64(bit)) & numerix.uint64(1)) << numerix.uint64(bit * dim + d)
+    return numerix.argsort(code, kind='mergesort')
+
+def _cellCenters(vertexCoords, faceVertexIDs, cellFaceIDs):
+    """
+    The mean of the face centers of each cell, which is all that a
+    space-filling curve needs.
+    """
+    vertices, faces = _raggedIDs(_padded(faceVertexIDs))
+    faceCenters = numerix.array([numerix.bincount(faces, weights=coord[vertices], minlength=numerix.shape(faceVertexIDs)[-1])
+                                 for coord in vertexCoords]) / numerix.maximum(numerix.bincount(faces, minlength=numerix.shape(faceVertexIDs)[-1]), 1)
+    faces, cells = _raggedIDs(_padded(cellFaceIDs))
+    numberOfCells = numerix.shape(cellFaceIDs)[-1]
+    return numerix.array([numerix.bincount(cells, weights=coord[faces], minlength=numberOfCells)
+                          for coord in faceCenters]) / numerix.maximum(numerix.bincount(cells, minlength=numberOfCells), 1)
+
+def _cellOrder(vertexCoords, faceVertexIDs, cellFaceIDs, method="rcm", numberOfLocalCells=None):
+    """
+    Return the original IDs of the cells, in their new order.
+
+    :Parameters:
+      - `vertexCoords`, `faceVertexIDs`, `cellFaceIDs`: The mesh, as
+        passed to `Mesh`.
+      - `method`: Either ``"rcm"`` or ``"morton"``.
+      - `numberOfLocalCells`: If given, the cells beyond this number are
+        ghost cells, which stay behind the local cells.
+    """
+    if method == "rcm":
+        cellOrder = _reverseCuthillMcKee(*_cellAdjacency(cellFaceIDs))
+    elif method == "morton":
+        cellOrder = _mortonOrder(_cellCenters(vertexCoords, faceVertexIDs, cellFaceIDs))
+    else:
+        raise ValueError("Unknown renumbering method %s; use 'rcm' or 'morton'" % repr(method))
+
+    if numberOfLocalCells is not None:
+        cellOrder = cellOrder[numerix.argsort(cellOrder >= numberOfLocalCells, kind='mergesort')]
+
+    return cellOrder
+
+def _firstUses(IDs, elementOrder, numberOfIDs):
+    """
+    Return the `IDs` in the order that the elements, taken in
+    `elementOrder`, first use them. Unused IDs come last.
+
+        >>> IDs = numerix.array(((3, 0, 1), (2, 1, 4)))
+        >>> print _firstUses(IDs, numerix.array((2, 0, 1)), 6)
+        [1 4 3 2 0 5]
+    """
+    rank = numerix.empty(len(elementOrder), dtype=int)
+    rank[elementOrder] = numerix.arange(len(elementOrder))
+    used, elements = _raggedIDs(_padded(IDs))
+    used = used[numerix.argsort(rank[elements], kind='mergesort')]
+    unique, first = numerix.unique(used, return_index=True)
+    unused = numerix.ones(numberOfIDs, dtype=bool)
+    unused[unique] = False
+    return numerix.concatenate((used[numerix.sort(first)], numerix.nonzero(unused)[0]))
+
+def _relabel(IDs, order):
+    """
+    Replace the `IDs` by their positions in `order`, keeping the padding.
+
+        >>> print _relabel(MA.masked_values(((2, 0), (1, -1)), -1), numerix.array((1, 2, 0)))
+        [[1 2]
+         [0 --]]
+    """
+    inverse = numerix.empty(len(order), dtype=int)
+    inverse[order] = numerix.arange(len(order))
+    filled = numerix.asarray(MA.filled(IDs, -1))
+    return MA.masked_values(numerix.where(filled >= 0, inverse[filled], -1), -1)
+
+def _renumber(vertexCoords, faceVertexIDs, cellFaceIDs, method="rcm", numberOfLocalCells=None):
+    """
+    Renumber a mesh.
+
+    Returns the original IDs of the vertices, faces, and cells, in their
+    new order, followed by the renumbered `vertexCoords`, `faceVertexIDs`,
+    and `cellFaceIDs`. The vertices of each face and the faces of each cell
+    keep their order, so faces and cells keep their orientation.
+
+        >>> from fipy import *
+        >>> mesh = Tri2D(nx=2, ny=2)
+        >>> (vertexOrder, faceOrder, cellOrder,
+        ...  vertexCoords, faceVertexIDs, cellFaceIDs) = _renumber(mesh.vertexCoords,
+        ...                                                        mesh.faceVertexIDs,
+        ...                                                        mesh.cellFaceIDs)
+        >>> print numerix.allequal(vertexCoords, mesh.vertexCoords[..., vertexOrder])
+        True
+        >>> print numerix.allequal(vertexOrder[faceVertexIDs], mesh.faceVertexIDs[..., faceOrder])
+        True
+        >>> print numerix.allequal(faceOrder[cellFaceIDs], mesh.cellFaceIDs[..., cellOrder])
+        True
+
+    :Parameters:
+      - `vertexCoords`, `faceVertexIDs`, `cellFaceIDs`: The mesh, as
+        passed to `Mesh`.
+      - `method`: Either ``"rcm"`` or ``"morton"``.
+      - `numberOfLocalCells`: If given, the cells beyond this number are
+        ghost cells, which stay behind the local cells.
+    """
+    cellOrder = _cellOrder(vertexCoords, faceVertexIDs, cellFaceIDs,
+                           method=method, numberOfLocalCells=numberOfLocalCells)
+    faceOrder = _firstUses(cellFaceIDs, cellOrder, numerix.shape(faceVertexIDs)[-1])
+    vertexOrder = _firstUses(faceVertexIDs, faceOrder, numerix.shape(vertexCoords)[-1])
+
+    return (vertexOrder, faceOrder, cellOrder,
+            numerix.take(vertexCoords, vertexOrder, axis=-1),
+            _relabel(MA.take(faceVertexIDs, faceOrder, axis=-1), vertexOrder),
+            _relabel(MA.take(cellFaceIDs, cellOrder, axis=-1), faceOrder))
+
+def _bandwidth(cellFaceIDs, cellOrder):
+    """
+    The largest difference between the new IDs of neighboring cells.
+    """
+    indptr, indices = _cellAdjacency(cellFaceIDs)
+    rank = numerix.empty(len(cellOrder), dtype=int)
+    rank[cellOrder] = numerix.arange(len(cellOrder))
+    rows = numerix.repeat(numerix.arange(len(indptr) - 1), numerix.diff(indptr))
+    return abs(rank[rows] - rank[indices]).max()
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -43,6 +43,7 @@ def _suite():
     return _LateImportDocTestSuite(docTestModuleNames = (
         'fipy.meshes.mesh',
         'fipy.meshes.mesh2D',
+        'fipy.meshes.renumbering',
         'fipy.meshes.nonUniformGrid1D',
         'fipy.meshes.nonUniformGrid2D',
         'fipy.meshes.nonUniformGrid3D',
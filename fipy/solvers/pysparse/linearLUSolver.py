@@ -77,12 +77,11 @@ class LinearLUSolver(PysparseSolver):
         super(LinearLUSolver, self).__init__(tolerance = tolerance,
                                              iterations = iterations)
 
-    def _solve_(self, L, x, b):
+    def _factorize(self, L):
         diag = L.takeDiagonal()
         maxdiag = max(numerix.absolute(diag))
 
         L = L * (1 / maxdiag)
-        b = b * (1 / maxdiag)
 
         LU = superlu.factorize(L.matrix.to_csr())
 
@@ -90,6 +89,9 @@ class LinearLUSolver(PysparseSolver):
             import sys
             print >> sys.stderr, L.matrix
 
+        return L, LU, maxdiag
+
+    def _refine(self, L, LU, x, b):
         error0 = numerix.sqrt(numerix.sum((L * x - b)**2))
 
         for iteration in range(self.iterations):
@@ -106,3 +108,17 @@ class LinearLUSolver(PysparseSolver):
             from fipy.tools.debug import PRINT
             PRINT('iterations: %d / %d' % (iteration+1, self.iterations))
             PRINT('residual:', numerix.sqrt(numerix.sum(errorVector**2)))
+
+    def _solve_(self, L, x, b):
+        L, LU, maxdiag = self._factorize(L)
+
+        self._refine(L, LU, x, b * (1 / maxdiag))
+
+    def _solveMultiple_(self, L, xs, bs):
+        """
+        Factorize `L` once and reuse the factors for every right-hand side.
+        """
+        L, LU, maxdiag = self._factorize(L)
+
+        for x, b in zip(xs, bs):
+            self._refine(L, LU, x, b * (1 / maxdiag))
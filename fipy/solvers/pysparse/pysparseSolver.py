@@ -85,13 +85,7 @@ class PysparseSolver(_PysparseMatrixSolver):
                 PRINT('failure', self._warningList[info].__class__.__name__)
             PRINT('relres:', relres)
 
-    def _solve(self):
-
-        if self.var.mesh.communicator.Nproc > 1:
-            raise Exception("PySparse solvers cannot be used with multiple processors")
-
-        array = self.var.numericValue.ravel()
-
+    def _checkShape(self, array):
         from fipy.terms import SolutionVariableNumberError
 
         if ((self.matrix == 0)
@@ -100,9 +94,45 @@ class PysparseSolver(_PysparseMatrixSolver):
 
             raise SolutionVariableNumberError
 
+    def _solve(self):
+
+        if self.var.mesh.communicator.Nproc > 1:
+            raise Exception("PySparse solvers cannot be used with multiple processors")
+
+        array = self.var.numericValue.ravel()
+
+        self._checkShape(array)
+
         self._solve_(self.matrix, array, self.RHSvector)
         factor = self.var.unit.factor
         if factor != 1:
             array /= self.var.unit.factor
 
         self.var[:] = array.reshape(self.var.shape)
+
+    def _solveMultiple(self, vars, RHSvectors):
+        if self.var.mesh.communicator.Nproc > 1:
+            raise Exception("PySparse solvers cannot be used with multiple processors")
+
+        arrays = [var.numericValue.ravel() for var in vars]
+
+        for array in arrays:
+            self._checkShape(array)
+
+        self._solveMultiple_(self.matrix, arrays, RHSvectors)
+
+        for var, array in zip(vars, arrays):
+            factor = var.unit.factor
+            if factor != 1:
+                array /= var.unit.factor
+
+            var[:] = array.reshape(var.shape)
+
+    def _solveMultiple_(self, L, xs, bs):
+        """
+        Solve `L` for each of the right-hand sides `bs`, in place in `xs`.
+        Subclasses that can share work between right-hand sides should
+        override this method.
+        """
+        for x, b in zip(xs, bs):
+            self._solve_(L, x, b)
@@ -48,35 +48,176 @@ class LinearLUSolver(_ScipySolver):
     The `LinearLUSolver` solves a linear system of equations using
     LU-factorisation.  The `LinearLUSolver` is a wrapper class for the
     the Scipy `scipy.sparse.linalg.splu` moduleq.
+
+    With `mixedPrecision=True`, the factorization is performed in single
+    precision, halving its memory, and iterative refinement with residuals
+    computed in double precision recovers a double precision solution.
+
+    >>> from fipy import *
+    >>> from fipy.solvers.scipy.linearLUSolver import LinearLUSolver
+    >>> mesh = Grid2D(nx=20, ny=20)
+    >>> var = CellVariable(mesh=mesh)
+    >>> var.constrain(1., mesh.facesLeft)
+    >>> var.constrain(0., mesh.facesRight)
+    >>> eq = DiffusionTerm(coeff=1 + mesh.x)
+    >>> eq.solve(var, solver=LinearLUSolver(tolerance=1e-12))
+    >>> double = var.copy()
+    >>> var.value = 0.
+    >>> eq.solve(var, solver=LinearLUSolver(tolerance=1e-12, mixedPrecision=True))
+    >>> print numerix.allclose(var, double, rtol=1e-10, atol=1e-10)
+    True
+
+    When the matrix is too ill-conditioned for single precision factors,
+    refinement stagnates far from the tolerance, so the matrix is
+    refactorized in double precision and the solution refined again.
+
+    >>> mesh = Grid1D(nx=100)
+    >>> var = CellVariable(mesh=mesh)
+    >>> eq = (DiffusionTerm(coeff=1 + mesh.x / 7.)
+    ...       == ImplicitSourceTerm(coeff=1e-7) - mesh.x)
+    >>> eq.solve(var, solver=LinearLUSolver(tolerance=1e-12))
+    >>> double = var.copy()
+    >>> var.value = 0.
+    >>> eq.solve(var, solver=LinearLUSolver(tolerance=1e-12, mixedPrecision=True))
+    >>> print numerix.allclose(var, double, rtol=1e-6, atol=0)
+    True
     """
 
-    def _solve_(self, L, x, b):
+    def __init__(self, tolerance=1e-10, iterations=1000, precon=None, mixedPrecision=False):
+        """
+        :Parameters:
+          - `tolerance`: The required error tolerance.
+          - `iterations`: The maximum number of iterative refinements to perform.
+          - `precon`: not used but maintains a common interface.
+          - `mixedPrecision`: If `True`, factorize in single precision and
+            refine the solution in double precision.
+        """
+        super(LinearLUSolver, self).__init__(tolerance=tolerance, iterations=iterations, precon=precon)
+        self.mixedPrecision = mixedPrecision
+
+    @property
+    def _maxRefinements(self):
+        # single precision factors need more corrections to reach double
+        # precision, but refinement stops as soon as it stagnates
+        if self.mixedPrecision:
+            return min(self.iterations, 50)
+        else:
+            return min(self.iterations, 10)
+
+    def _factorize(self, L, mixedPrecision):
         diag = L.takeDiagonal()
         maxdiag = max(numerix.absolute(diag))
 
         L = L * (1 / maxdiag)
-        b = b * (1 / maxdiag)
-
-        LU = splu(L.matrix.asformat("csc"), diag_pivot_thresh=1.,
-                                            drop_tol=0.,
-                                            relax=1,
-                                            panel_size=10,
-                                            permc_spec=3)
-
-        error0 = numerix.sqrt(numerix.sum((L * x - b)**2))
 
-        for iteration in range(min(self.iterations, 10)):
-            errorVector = L * x - b
-
-            if (numerix.sqrt(numerix.sum(errorVector**2)) / error0)  <= self.tolerance:
+        A = L.matrix.asformat("csc")
+        if mixedPrecision:
+            A = A.astype(numerix.float32)
+
+        LU = splu(A, diag_pivot_thresh=1.,
+                     drop_tol=0.,
+                     relax=1,
+                     panel_size=10,
+                     permc_spec=3)
+
+        return L, LU, maxdiag
+
+    def _correction(self, LU, errorVector, mixedPrecision):
+        if mixedPrecision:
+            # scale each residual so that it neither underflows nor
+            # overflows in single precision
+            scale = numerix.amax(numerix.absolute(errorVector), axis=0)
+            scale = scale + (scale == 0)
+            xError = LU.solve((errorVector / scale).astype(numerix.float32))
+            return xError.astype(numerix.float64) * scale
+        else:
+            return LU.solve(errorVector)
+
+    def _refine(self, L, LU, X, B, mixedPrecision):
+        """
+        Iteratively refine the solution `X` for one or more right-hand
+        sides `B`, stored as columns. Refinement stops when every column
+        has either converged or stopped improving by at least a factor of
+        two per iteration. With single precision factors, it also stops
+        at the double precision rounding level of the product `L X`,
+        which double precision factors could not improve on either.
+
+        Returns the refined `X`, the relative residual of each column and
+        whether each column reached the rounding level.
+        """
+        def norm(errorVector):
+            return numerix.sqrt(numerix.sum(errorVector**2, axis=0))
+
+        A = L.matrix
+        absA = abs(A)
+        eps = numerix.finfo(numerix.float64).eps
+
+        error0 = norm(A * X - B)
+        error0 = error0 + (error0 == 0)
+        errorPrev = None
+
+        for iteration in range(self._maxRefinements):
+            errorVector = A * X - B
+            error = norm(errorVector)
+
+            rounded = error <= eps * norm(absA * abs(X) + abs(B))
+            done = error <= self.tolerance * error0
+            if mixedPrecision:
+                done = done | rounded
+            if errorPrev is not None:
+                done = done | (error > 0.5 * errorPrev)
+
+            if numerix.all(done):
                 break
 
-            xError = LU.solve(errorVector)
-            x[:] = x - xError
+            X[:] = X - self._correction(LU, errorVector, mixedPrecision)
+            errorPrev = error
 
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
             from fipy.tools.debug import PRINT
             PRINT('iterations: %d / %d' % (iteration+1, self.iterations))
-            PRINT('residual:', numerix.sqrt(numerix.sum(errorVector**2)))
+            PRINT('residual:', error)
+            PRINT('rounding level:', eps * norm(absA * abs(X) + abs(B)))
+
+        return X, error / error0, rounded
+
+    def _solveFactorized(self, L, X, B):
+        mixedPrecision = self.mixedPrecision
+        try:
+            L, LU, maxdiag = self._factorize(L, mixedPrecision)
+        except RuntimeError:
+            if not mixedPrecision:
+                raise
+            # rounding to single precision made the matrix singular
+            mixedPrecision = False
+            L, LU, maxdiag = self._factorize(L, mixedPrecision)
+        B = B * (1 / maxdiag)
+        X, relres, rounded = self._refine(L, LU, X, B, mixedPrecision)
+
+        if mixedPrecision and numerix.any((relres > self.tolerance) & ~rounded):
+            # single precision factors of an ill-conditioned matrix stall
+            # short of the tolerance, so finish with double precision ones
+            if 'FIPY_VERBOSE_SOLVER' in os.environ:
+                from fipy.tools.debug import PRINT
+                PRINT('refinement stagnated; refactorizing in double precision')
+            LU = self._factorize(L, False)[1]
+            X, relres, rounded = self._refine(L, LU, X, B, False)
+
+        stagnated = (relres > self.tolerance) & ~rounded
+        if numerix.any(stagnated):
+            from fipy.solvers.solver import StagnatedSolverWarning
+            import warnings
+            warnings.warn(StagnatedSolverWarning(self, self._maxRefinements,
+                                                 numerix.amax(relres[stagnated])),
+                          stacklevel=4)
+
+        return X
+
+    def _solve_(self, L, x, b):
+        return self._solveFactorized(L, x, b)
 
-        return x
+    def _solveMultiple_(self, L, X, B):
+        """
+        Factorize `L` once and solve for all right-hand sides together.
+        """
+        return self._solveFactorized(L, X, B)
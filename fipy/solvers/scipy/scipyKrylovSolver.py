@@ -41,6 +41,7 @@ __all__ = []
 import os
 
 from fipy.solvers.scipy.scipySolver import _ScipySolver
+from fipy.tools import numerix
 
 class _ScipyKrylovSolver(_ScipySolver):
     """
@@ -49,20 +50,35 @@ class _ScipyKrylovSolver(_ScipySolver):
     .. attention:: This class is abstract. Always create one of its subclasses.
     """
 
-    def _solve_(self, L, x, b):
-        A = L.matrix
+    def _preconditionerFor(self, A):
         if self.preconditioner is None:
-            M = None
+            return None
         else:
-            M = self.preconditioner._applyToMatrix(A)
+            return self.preconditioner._applyToMatrix(A)
+
+    def _solve_(self, L, x, b, M=None):
+        A = L.matrix
+        if M is None:
+            M = self._preconditionerFor(A)
 
-        x, info = self.solveFnc(A, b, x,
+        x, info = self.solveFnc(self._operatorFor(A), b, x,
                                 tol=self.tolerance,
                                 maxiter=self.iterations,
                                 M=M)
 
         if 'FIPY_VERBOSE_SOLVER' in os.environ:
             if info < 0:
+                from fipy.tools.debug import PRINT
                 PRINT('failure', self._warningList[info].__class__.__name__)
 
         return x
+
+    def _solveMultiple_(self, L, X, B):
+        """
+        SciPy provides no block Krylov methods, but the preconditioner is
+        only constructed once for all right-hand sides.
+        """
+        M = self._preconditionerFor(L.matrix)
+
+        return numerix.array([self._solve_(L, X[..., i].copy(), B[..., i], M=M)
+                              for i in range(B.shape[-1])]).transpose()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "scipyNonlinearSolver.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+import os
+
+from scipy.sparse.linalg import LinearOperator, gmres, splu
+
+from fipy.solvers.scipy.scipySolver import _ScipySolver
+from fipy.tools import numerix
+
+__all__ = ["ScipyNonlinearSolver"]
+
+class ScipyNonlinearSolver(_ScipySolver):
+    r"""
+    The `ScipyNonlinearSolver` solves the nonlinear system
+    :math:`\vec{F}(\vec{x}) = \mathsf{L}(\vec{x}) \vec{x} - \vec{b}(\vec{x}) = 0`
+    with a Jacobian-free Newton-Krylov method. It is a counterpart to
+    `TrilinosNonlinearSolver` that only requires Scipy.
+
+    Residuals are evaluated with
+    :meth:`~fipy.terms.term.Term.justResidualVector` and Jacobian-vector
+    products are approximated by finite differences of the residual. The
+    Newton direction is found with `scipy.sparse.linalg.gmres`,
+    preconditioned by an LU factorization of the Picard matrix
+    :math:`\mathsf{L}(\vec{x})` assembled along with the residual. The
+    same factorization provides a few initial Picard steps,
+    :math:`\vec{x} - \mathsf{L}(\vec{x})^{-1} \vec{F}(\vec{x})`, to move
+    the iterate towards the solution, and a backtracking line search
+    safeguards each Newton step.
+
+    >>> from fipy import *
+    >>> from fipy.solvers.scipy.scipyNonlinearSolver import ScipyNonlinearSolver
+    >>> mesh = Grid1D(nx=50, dx=1. / 50)
+    >>> def makeProblem():
+    ...     var = CellVariable(mesh=mesh, value=0.)
+    ...     var.constrain(0., mesh.facesLeft)
+    ...     var.constrain(1., mesh.facesRight)
+    ...     eq = DiffusionTerm(coeff=numerix.exp(4 * var), var=var) \
+    ...       == ImplicitSourceTerm(coeff=10 * var**2, var=var) - 1.
+    ...     return var, eq
+
+    >>> var, eq = makeProblem()
+    >>> solver = ScipyNonlinearSolver(eq, tolerance=1e-8)
+    >>> res = solver.solve() # doctest: +SERIAL
+    >>> print solver.converged # doctest: +SERIAL
+    True
+
+    converges in far fewer iterations than sweeping the equation
+
+    >>> var2, eq2 = makeProblem()
+    >>> sweeps = 0
+    >>> res = 1.
+    >>> while res > 1e-8:
+    ...     res = eq2.sweep(var2)
+    ...     sweeps += 1
+    >>> print solver.iterationsPerformed < sweeps / 3
+    True
+    >>> print numerix.allclose(var, var2, atol=1e-8) # doctest: +SERIAL
+    True
+
+    Coupled equations are handled in the same way
+
+    >>> u = CellVariable(mesh=mesh, value=0.)
+    >>> v = CellVariable(mesh=mesh, value=0.)
+    >>> u.constrain(1., mesh.facesLeft)
+    >>> v.constrain(1., mesh.facesRight)
+    >>> eqU = DiffusionTerm(coeff=1 + v**2, var=u) == ImplicitSourceTerm(coeff=v**2, var=u)
+    >>> eqV = DiffusionTerm(coeff=1 + u**2, var=v) == ImplicitSourceTerm(coeff=u**2, var=v)
+    >>> solver = ScipyNonlinearSolver(eqU & eqV, tolerance=1e-8)
+    >>> res = solver.solve() # doctest: +SERIAL
+    >>> print solver.converged # doctest: +SERIAL
+    True
+    >>> print numerix.allclose(u, v[::-1]) # doctest: +SERIAL
+    True
+
+    Like any other solver, it can also be passed to `Term.sweep`, where it
+    takes a Picard step by solving the linearized system directly
+
+    >>> var3, eq3 = makeProblem()
+    >>> solver = ScipyNonlinearSolver(eq3)
+    >>> res = 1.
+    >>> while res > 1e-8:
+    ...     res = eq3.sweep(var3, solver=solver)
+    >>> print numerix.allclose(var, var3, atol=1e-8) # doctest: +SERIAL
+    True
+
+    """
+
+    def __init__(self, equation, tolerance=1e-10, iterations=50,
+                 relativeTolerance=None, linearTolerance=1e-4, linearIterations=20,
+                 precondition=True, picardSweeps=3, maxBacktracks=10, armijo=1e-4):
+        """
+        :Parameters:
+          - `equation`: The `Term` whose residual is to be driven to zero.
+          - `tolerance`: Converge when the :math:`L^2`-norm of the residual
+            drops below this value.
+          - `iterations`: The maximum number of Newton steps to perform.
+          - `relativeTolerance`: If not `None`, also converge when the
+            residual falls below this fraction of its initial value.
+          - `linearTolerance`: The relative tolerance of each inner GMRES solve.
+          - `linearIterations`: The maximum number of GMRES iterations per
+            Newton step.
+          - `precondition`: If `True`, precondition GMRES with an LU
+            factorization of the Picard matrix.
+          - `picardSweeps`: The number of Picard steps to take before
+            switching to Newton steps. Picard steps converge from a wider
+            range of initial conditions. Ignored if `precondition` is `False`.
+          - `maxBacktracks`: The maximum number of times the line search
+            halves the Newton step.
+          - `armijo`: The sufficient decrease parameter of the line search.
+        """
+        super(ScipyNonlinearSolver, self).__init__(tolerance=tolerance, iterations=iterations)
+
+        self.equation = equation
+        self.relativeTolerance = relativeTolerance
+        self.linearTolerance = linearTolerance
+        self.linearIterations = linearIterations
+        self.precondition = precondition
+        self.maxBacktracks = maxBacktracks
+        self.armijo = armijo
+        self.picardSweeps = picardSweeps
+
+        self.converged = False
+        self.iterationsPerformed = 0
+
+    def _residual(self, var, x, dt):
+        var.value = numerix.reshape(x, var.shape)
+        return numerix.array(self.equation.justResidualVector(var=None, solver=self, dt=dt)).ravel()
+
+    def _preconditioner(self):
+        if not self.precondition:
+            return None
+
+        try:
+            LU = splu(self.matrix.matrix.asformat("csc"))
+        except RuntimeError:
+            # the Picard matrix is singular at this iterate
+            return None
+
+        return LinearOperator(self.matrix.matrix.shape, matvec=LU.solve, dtype=float)
+
+    def _jacobian(self, var, x, F, dt, M=None):
+        xnorm = numerix.L2norm(x)
+
+        def matvec(v):
+            v = numerix.array(v).ravel()
+            if M is not None:
+                v = M.matvec(v)
+            vnorm = numerix.L2norm(v)
+            if vnorm == 0:
+                return numerix.zeros(len(x), 'd')
+            eps = numerix.sqrt(numerix.finfo(float).eps) * (1 + xnorm) / vnorm
+            return (self._residual(var, x + eps * v, dt) - F) / eps
+
+        return LinearOperator((len(x), len(x)), matvec=matvec, dtype=float)
+
+    def solve(self, dt=None):
+        """
+        Perform Newton iterations until the residual satisfies the
+        convergence criteria or `iterations` steps have been taken.
+
+        :Parameters:
+          - `dt`: The time step size.
+
+        :Returns: the :math:`L^2`-norm of the final residual
+        """
+        var = self.equation._verifyVar(None)
+
+        self.converged = False
+        self.iterationsPerformed = 0
+
+        x = numerix.array(var).ravel().copy()
+        F = self._residual(var, x, dt)
+        norm = initialNorm = numerix.L2norm(F)
+        forcing = self.linearTolerance
+
+        while not self._hasConverged(norm, initialNorm):
+            if self.iterationsPerformed >= self.iterations:
+                break
+
+            # the Picard matrix at x is still stored from the last residual evaluation
+            M = self._preconditioner()
+
+            normPrev = norm
+            if self.iterationsPerformed < self.picardSweeps and M is not None:
+                # Picard steps, x - L(x)^{-1} F(x), are more robust far
+                # from the solution
+                x = x - M.matvec(F)
+                F = self._residual(var, x, dt)
+                norm = numerix.L2norm(F)
+                info = 0
+            else:
+                J = self._jacobian(var, x, F, dt, M)
+
+                # right preconditioning, so that GMRES measures the true
+                # linear residual
+                y, info = gmres(J, -F, tol=forcing, maxiter=self.linearIterations)
+                if M is None:
+                    dx = y
+                else:
+                    dx = M.matvec(y)
+
+                x, F, norm = self._lineSearch(var, x, dx, F, norm, dt)
+
+            # Eisenstat-Walker forcing term, tightening the linear
+            # tolerance as the Newton iteration converges
+            forcing = max(min(self.linearTolerance, 0.9 * (norm / normPrev)**2), 1e-12)
+
+            self.iterationsPerformed += 1
+
+            if 'FIPY_VERBOSE_SOLVER' in os.environ:
+                from fipy.tools.debug import PRINT
+                PRINT('Newton iteration %d, residual: %g, GMRES info: %d' % (self.iterationsPerformed, norm, info))
+
+        self.converged = self._hasConverged(norm, initialNorm)
+
+        var.value = numerix.reshape(x, var.shape)
+
+        if not self.converged:
+            from fipy.solvers.solver import MaximumIterationWarning
+            import warnings
+            warnings.warn(MaximumIterationWarning(self, self.iterationsPerformed, norm), stacklevel=2)
+
+        return norm
+
+    def _lineSearch(self, var, x, dx, F, norm, dt):
+        """
+        Backtrack along `dx` until the residual norm is sufficiently reduced.
+        """
+        step = 1.
+        for backtrack in range(self.maxBacktracks + 1):
+            xNew = x + step * dx
+            FNew = self._residual(var, xNew, dt)
+            normNew = numerix.L2norm(FNew)
+            if normNew <= (1 - self.armijo * step) * norm:
+                break
+            step /= 2.
+
+        return xNew, FNew, normNew
+
+    def _hasConverged(self, norm, initialNorm):
+        if norm <= self.tolerance:
+            return True
+        elif self.relativeTolerance is not None:
+            return norm <= self.relativeTolerance * initialNorm
+        else:
+            return False
+
+    def _solve_(self, L, x, b):
+        r"""
+        Solve the Picard system :math:`\mathsf{L}(\vec{x}) \vec{x} = \vec{b}`
+        assembled by `Term.sweep`, with the same LU factorization that
+        preconditions the Newton steps.
+        """
+        return splu(L.matrix.asformat("csc")).solve(b)
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
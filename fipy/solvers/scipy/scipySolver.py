@@ -38,6 +38,8 @@ __docformat__ = 'restructuredtext'
 
 __all__ = []
 
+import os
+
 from fipy.matrices.scipyMatrix import _ScipyMeshMatrix
 from fipy.solvers.solver import Solver
 from fipy.tools import numerix
@@ -46,16 +48,81 @@ class _ScipySolver(Solver):
     """
     The base `ScipySolver` class.
 
+    Matrix-vector products in the Krylov iterations and in the residual
+    calculation are split across `threads` threads. The default is taken
+    from the `FIPY_SCIPY_THREADS` environment variable, or `1`, which uses
+    SciPy's serial kernels. It can be changed for all SciPy solvers by
+    setting `_ScipySolver.threads` or for a single solver by setting its
+    `threads` attribute.
+
     .. attention:: This class is abstract. Always create one of its subclasses.
     """
 
+    threads = int(os.environ.get('FIPY_SCIPY_THREADS', 1))
+
     @property
     def _matrixClass(self):
         return _ScipyMeshMatrix
 
+    def _operatorFor(self, A):
+        """
+        Return `A`, wrapped in a thread-parallel `LinearOperator` when more
+        than one thread is requested.
+
+        The operator is kept until the solver is given another matrix, so
+        that the solution of several right-hand sides and the residual that
+        follows a solution do not partition `A` again.
+        """
+        if self.threads > 1:
+            from fipy.solvers.scipy.threadedOperator import _ThreadedCSROperator
+            operator = getattr(self, "_threadedOperator", None)
+            if operator is None or not operator.wraps(A, threads=self.threads):
+                operator = _ThreadedCSROperator(A, threads=self.threads)
+                self._threadedOperator = operator
+            return operator
+        else:
+            return A
+
+    def _residualAndNorm(self):
+        return self._operatorFor(self.matrix.matrix).residualAndNorm(numerix.array(self.var).ravel(),
+                                                                     numerix.array(self.RHSvector))
+
+    def _calcResidualVector(self, residualFn=None):
+        if residualFn is None and self.threads > 1:
+            return self._residualAndNorm()[0]
+        else:
+            return super(_ScipySolver, self)._calcResidualVector(residualFn=residualFn)
+
+    def _calcResidual(self, residualFn=None):
+        if residualFn is None and self.threads > 1:
+            return self._residualAndNorm()[1]
+        else:
+            return super(_ScipySolver, self)._calcResidual(residualFn=residualFn)
+
     def _solve(self):
 
          if self.var.mesh.communicator.Nproc > 1:
              raise Exception("SciPy solvers cannot be used with multiple processors")
 
          self.var[:] = numerix.reshape(self._solve_(self.matrix, self.var.ravel(), numerix.array(self.RHSvector)), self.var.shape)
+
+    def _solveMultiple(self, vars, RHSvectors):
+        if self.var.mesh.communicator.Nproc > 1:
+            raise Exception("SciPy solvers cannot be used with multiple processors")
+
+        X = numerix.array([numerix.array(var).ravel() for var in vars]).transpose()
+        B = numerix.array([numerix.array(RHSvector).ravel() for RHSvector in RHSvectors]).transpose()
+
+        X = self._solveMultiple_(self.matrix, X, B)
+
+        for i, var in enumerate(vars):
+            var[:] = numerix.reshape(X[..., i], var.shape)
+
+    def _solveMultiple_(self, L, X, B):
+        """
+        Solve `L` for each column of `B`, using the corresponding column of
+        `X` as the initial guess. Subclasses that can share work between
+        right-hand sides should override this method.
+        """
+        return numerix.array([self._solve_(L, X[..., i].copy(), B[..., i])
+                              for i in range(B.shape[-1])]).transpose()
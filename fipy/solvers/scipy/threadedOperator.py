@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "threadedOperator.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+__all__ = []
+
+from multiprocessing.pool import ThreadPool
+
+import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator
+
+from fipy.tools import numerix
+
+_threadPools = {}
+
+def _threadPool(threads):
+    """
+    Thread pools are kept for the life of the process, so that threads are
+    not started and stopped for every product.
+    """
+    if threads not in _threadPools:
+        _threadPools[threads] = ThreadPool(threads)
+    return _threadPools[threads]
+
+class _ThreadedCSROperator(LinearOperator):
+    """
+    A `LinearOperator` that computes sparse matrix-vector products with
+    several threads, each responsible for a contiguous block of rows with
+    roughly equal numbers of nonzeros.
+
+    The row blocks share the storage of the original CSR matrix. SciPy's
+    compiled CSR kernels release the global interpreter lock, so the blocks
+    are multiplied concurrently.
+
+    >>> from fipy.tools import numerix
+    >>> import scipy.sparse as sp
+    >>> A = sp.rand(1000, 1000, density=0.01, format='csr', random_state=1) \\
+    ...   + sp.identity(1000, format='csr')
+    >>> x = numerix.arange(1000.)
+    >>> b = numerix.ones(1000)
+    >>> op = _ThreadedCSROperator(A, threads=4)
+    >>> len(op.blocks)
+    4
+    >>> print numerix.allclose(op.matvec(x), A * x)
+    True
+    >>> print numerix.allclose(op.rmatvec(x), A.T * x)
+    True
+    >>> r, norm = op.residualAndNorm(x, b)
+    >>> print numerix.allclose(r, A * x - b)
+    True
+    >>> print numerix.allclose(norm, numerix.L2norm(A * x - b))
+    True
+
+    The operator tells whether it can stand in for a matrix, so that
+    solvers only partition each matrix once
+
+    >>> print op.wraps(A, threads=4), op.wraps(A, threads=2), op.wraps(A.copy(), threads=4)
+    True False False
+
+    A single thread covers the whole matrix
+
+    >>> print numerix.allclose(_ThreadedCSROperator(A, threads=1).matvec(x), A * x)
+    True
+
+    SciPy solvers use the operator when given more than one thread
+
+    >>> from fipy import *
+    >>> from fipy.solvers.scipy import LinearPCGSolver
+    >>> mesh = Grid2D(nx=20, ny=20)
+    >>> def solveWith(threads):
+    ...     var = CellVariable(mesh=mesh, value=0.)
+    ...     var.constrain(1., mesh.facesLeft)
+    ...     solver = LinearPCGSolver(tolerance=1e-12, iterations=1000)
+    ...     solver.threads = threads
+    ...     res = DiffusionTerm().sweep(var, solver=solver)
+    ...     return var, res
+    >>> serial, serialRes = solveWith(1)
+    >>> threaded, threadedRes = solveWith(4)
+    >>> print numerix.allclose(serial, threaded) # doctest: +SERIAL
+    True
+    >>> print numerix.allclose(serialRes, threadedRes) # doctest: +SERIAL
+    True
+
+    and keep the operator for as long as they solve the same matrix
+
+    >>> solver = LinearPCGSolver()
+    >>> solver.threads = 4
+    >>> print solver._operatorFor(A) is solver._operatorFor(A)
+    True
+    >>> print solver._operatorFor(A) is solver._operatorFor(A.copy())
+    False
+    """
+
+    def __init__(self, matrix, threads):
+        """
+        :Parameters:
+          - `matrix`: A `scipy.sparse` matrix.
+          - `threads`: The number of threads to use.
+        """
+        self.source = matrix
+        if sp.isspmatrix_csr(matrix):
+            self._storage = (matrix.data, matrix.indices, matrix.indptr)
+        else:
+            self._storage = None
+        matrix = sp.csr_matrix(matrix)
+        super(_ThreadedCSROperator, self).__init__(dtype=matrix.dtype, shape=matrix.shape)
+
+        self.csr = matrix
+        self.threads = max(1, threads)
+        self.blocks = self._partition(matrix, self.threads)
+
+    def wraps(self, matrix, threads):
+        """
+        Whether this operator still multiplies by `matrix` with `threads`
+        threads. The row blocks share the storage of a CSR `matrix`, so
+        they stay valid as long as that storage is not replaced.
+        """
+        return (matrix is self.source
+                and threads == self.threads
+                and self._storage is not None
+                and all([a is b for a, b in zip(self._storage,
+                                                (matrix.data, matrix.indices, matrix.indptr))]))
+
+    @staticmethod
+    def _partition(matrix, threads):
+        indptr = matrix.indptr
+        bounds = numerix.searchsorted(indptr, numerix.linspace(0, indptr[-1], threads + 1))
+        bounds[0] = 0
+        bounds[-1] = matrix.shape[0]
+        bounds = numerix.maximum.accumulate(numerix.minimum(bounds, matrix.shape[0]))
+
+        blocks = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if stop > start:
+                first, last = indptr[start], indptr[stop]
+                block = sp.csr_matrix((matrix.data[first:last],
+                                       matrix.indices[first:last],
+                                       indptr[start:stop + 1] - first),
+                                      shape=(stop - start, matrix.shape[1]))
+                blocks.append((start, stop, block))
+
+        return blocks
+
+    def _map(self, fn):
+        if len(self.blocks) > 1:
+            return _threadPool(self.threads).map(fn, self.blocks)
+        else:
+            return map(fn, self.blocks)
+
+    def _matvec(self, x):
+        x = numerix.asarray(x).ravel()
+        y = numerix.empty(self.shape[0], dtype=numerix.result_type(self.dtype, x.dtype))
+
+        def multiply(block):
+            start, stop, A = block
+            y[start:stop] = A * x
+
+        self._map(multiply)
+
+        return y
+
+    def _rmatvec(self, x):
+        return self.csr.T * numerix.asarray(x).ravel()
+
+    def residualAndNorm(self, x, b):
+        """
+        Compute :math:`\\vec{r} = \\mathsf{A}\\vec{x} - \\vec{b}` and its
+        :math:`L^2`-norm in a single pass over each block of rows.
+        """
+        x = numerix.asarray(x).ravel()
+        b = numerix.asarray(b).ravel()
+        r = numerix.empty(self.shape[0], dtype=numerix.result_type(self.dtype, x.dtype, b.dtype))
+
+        def residual(block):
+            start, stop, A = block
+            r[start:stop] = A * x
+            r[start:stop] -= b[start:stop]
+            return numerix.NUMERIX.dot(r[start:stop], r[start:stop])
+
+        return r, numerix.sqrt(sum(self._map(residual)))
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -127,6 +127,24 @@ class Solver(object):
     def _solve_(self, L, x, b):
         raise NotImplementedError
 
+    def _solveMultiple(self, vars, RHSvectors):
+        """
+        Solve the stored matrix for several right-hand sides.
+
+        Each `var` in `vars` provides the initial guess for, and holds the
+        solution of, the corresponding vector in `RHSvectors`. Suites that
+        can share a factorization or preconditioner between right-hand
+        sides override this method. On completion, the solver once again
+        refers to its original `var` and `RHSvector`.
+        """
+        var, RHSvector = self.var, self.RHSvector
+
+        for tmpVar, tmpRHSvector in zip(vars, RHSvectors):
+            self._storeMatrix(var=tmpVar, matrix=self.matrix, RHSvector=tmpRHSvector)
+            self._solve()
+
+        self._storeMatrix(var=var, matrix=self.matrix, RHSvector=RHSvector)
+
     def _applyUnderRelaxation(self, underRelaxation=None):
         if underRelaxation is not None:
             self.matrix.putDiagonal(self.matrix.takeDiagonal() / underRelaxation)
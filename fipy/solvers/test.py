@@ -34,12 +34,20 @@
 
 __all__ = []
 
-from fipy.tests.lateImportTest import _LateImportTestSuite
+from fipy.tests.doctestPlus import _LateImportDocTestSuite
 import fipy.tests.testProgram
+from fipy.solvers import solver
+
+if solver == 'scipy' or solver == 'pyamg':
+    docTestModuleNames = ('scipy.linearLUSolver',
+                          'scipy.scipyNonlinearSolver',
+                          'scipy.threadedOperator')
+else:
+    docTestModuleNames = ()
 
 def _suite():
-    return _LateImportTestSuite(testModuleNames = (),
-                                base = __name__)
+    return _LateImportDocTestSuite(docTestModuleNames=docTestModuleNames,
+                                   base=__name__)
 
 if __name__ == '__main__':
     fipy.tests.testProgram.main(defaultTest='_suite')
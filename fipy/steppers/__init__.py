@@ -33,8 +33,9 @@ __docformat__ = 'restructuredtext'
 from fipy.steppers.stepper import Stepper
 from fipy.steppers.pseudoRKQSStepper import PseudoRKQSStepper
 from fipy.steppers.pidStepper import PIDStepper
+from fipy.steppers.nonlinearSweeper import NonlinearSweeper
 
-__all__ = ["L1error", "L2error", "LINFerror", "sweepMonotonic"]
+__all__ = ["L1error", "L2error", "LINFerror", "sweepMonotonic", "NonlinearSweeper"]
 
 def residual(var, matrix, RHSvector):
     r"""
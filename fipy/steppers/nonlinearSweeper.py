@@ -0,0 +1,269 @@
+## -*-Pyth-*-
+ # ########################################################################
+ # FiPy - a finite volume PDE solver in Python
+ #
+ # FILE: "nonlinearSweeper.py"
+ #
+ # Author: Jonathan Guyer <guyer@nist.gov>
+ # Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ # Author: James Warren   <jwarren@nist.gov>
+ #   mail: NIST
+ #    www: <http://www.ctcms.nist.gov/fipy/>
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #
+ # ########################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+
+__all__ = ["NonlinearSweeper"]
+
+class NonlinearSweeper(object):
+    r"""
+    Accelerates the fixed-point (Picard) iteration
+
+    .. math::
+
+       \vec{x}_{k+1} = \vec{g}(\vec{x}_k) \equiv \mathsf{L}(\vec{x}_k)^{-1} \vec{b}(\vec{x}_k)
+
+    performed by repeated calls to :meth:`~fipy.terms.term.Term.sweep`.
+    The last `history` iterates and their updates
+    :math:`\vec{f}_k = \vec{g}(\vec{x}_k) - \vec{x}_k` are retained and
+    Anderson mixing is applied to the solution variable between sweeps,
+
+    .. math::
+
+       \vec{x}_{k+1} = \vec{x}_k - \Delta\mathsf{X}_k \vec{\gamma}_k
+       + \beta (\vec{f}_k - \Delta\mathsf{F}_k \vec{\gamma}_k)
+
+    where :math:`\vec{\gamma}_k` minimizes
+    :math:`\|\vec{f}_k - \Delta\mathsf{F}_k \vec{\gamma}_k\|_2`. With
+    `history=0` this reduces to plain (optionally damped) Picard iteration.
+
+    Consider the steady nonlinear diffusion problem
+
+    >>> from fipy import *
+    >>> mesh = Grid1D(nx=50, dx=1. / 50)
+    >>> def makeProblem():
+    ...     var = CellVariable(mesh=mesh, value=0.)
+    ...     var.constrain(0., mesh.facesLeft)
+    ...     var.constrain(1., mesh.facesRight)
+    ...     eq = DiffusionTerm(coeff=numerix.exp(4 * var), var=var) \
+    ...       + ImplicitSourceTerm(coeff=10 * var**2, var=var) == 1.
+    ...     return var, eq
+
+    Conventional sweeping needs many iterations
+
+    >>> var, eq = makeProblem()
+    >>> picard = NonlinearSweeper(eq, history=0, tolerance=1e-8)
+    >>> res = picard.solve()
+    >>> print picard.converged
+    True
+
+    whereas Anderson mixing converges to the same answer with fewer sweeps
+
+    >>> anderson = NonlinearSweeper(eq, history=5, tolerance=1e-8)
+    >>> var.value = 0.
+    >>> res = anderson.solve()
+    >>> print anderson.converged
+    True
+    >>> print anderson.sweeps < picard.sweeps
+    True
+    >>> var2, eq2 = makeProblem()
+    >>> res = NonlinearSweeper(eq2, history=0, tolerance=1e-8).solve()
+    >>> print numerix.allclose(var, var2, atol=1e-6)
+    True
+
+    Failure to converge within `sweeps` iterations is reported
+
+    >>> var.value = 0.
+    >>> sweeper = NonlinearSweeper(eq, history=0, sweeps=2, tolerance=1e-8,
+    ...                            raiseWarning=False)
+    >>> res = sweeper.solve()
+    >>> print sweeper.converged, sweeper.sweeps
+    False 2
+
+    """
+
+    def __init__(self, equation, var=None, solver=None, boundaryConditions=(),
+                 history=5, mixing=1., tolerance=1e-6, relativeTolerance=None,
+                 sweeps=100, residualFn=None, raiseWarning=True):
+        """
+        :Parameters:
+          - `equation`: The `Term` to sweep.
+          - `var`: The solution variable, if it cannot be inferred from `equation`.
+          - `solver`: The linear solver passed to each
+            :meth:`~fipy.terms.term.Term.sweep`.
+          - `boundaryConditions`: A tuple of boundaryConditions.
+          - `history`: The number of previous iterates retained for
+            Anderson mixing. `0` gives Picard iteration.
+          - `mixing`: The relaxation factor :math:`\\beta`. Values less than `1`
+            damp the update.
+          - `tolerance`: The sweep loop has converged when the residual
+            returned by `sweep()` drops below this value.
+          - `relativeTolerance`: If not `None`, the sweep loop has also
+            converged when the residual falls below this fraction of the
+            residual of the first sweep.
+          - `sweeps`: The maximum number of sweeps per call to `solve()`.
+          - `residualFn`: A function that takes var, matrix, and RHSvector
+            arguments, used to customize the residual calculation.
+          - `raiseWarning`: If `True`, issue a
+            `NonlinearSweeperConvergenceWarning` when `solve()` does not
+            converge.
+        """
+        self.equation = equation
+        self.var = var
+        self.solver = solver
+        self.boundaryConditions = boundaryConditions
+        self.history = history
+        self.mixing = mixing
+        self.tolerance = tolerance
+        self.relativeTolerance = relativeTolerance
+        self.maxSweeps = sweeps
+        self.residualFn = residualFn
+        self.raiseWarning = raiseWarning
+
+        self.residual = None
+        self.sweeps = 0
+        self.converged = False
+
+        self.reset()
+
+    def reset(self):
+        """
+        Discard the stored iterates. Called automatically at the start of
+        `solve()`, but should be called explicitly between calls to
+        `sweep()` that belong to different time steps.
+        """
+        self._x = None
+        self._f = None
+        self._dX = []
+        self._dF = []
+
+    @property
+    def _solutionVariable(self):
+        return self.equation._verifyVar(self.var)
+
+    def _mix(self, x, f):
+        if self._x is not None:
+            self._dX.append(x - self._x)
+            self._dF.append(f - self._f)
+            if len(self._dX) > self.history:
+                del self._dX[0]
+                del self._dF[0]
+
+        self._x = x
+        self._f = f
+
+        if len(self._dF) == 0:
+            return x + self.mixing * f
+
+        dX = numerix.array(self._dX).transpose()
+        dF = numerix.array(self._dF).transpose()
+
+        gamma = numerix.linalg.lstsq(dF, f, rcond=-1)[0]
+
+        return x - numerix.NUMERIX.dot(dX, gamma) + self.mixing * (f - numerix.NUMERIX.dot(dF, gamma))
+
+    def sweep(self, dt=None, underRelaxation=None):
+        """
+        Perform one sweep of `equation`, followed by Anderson mixing of the
+        solution variable.
+
+        :Parameters:
+          - `dt`: The time step size.
+          - `underRelaxation`: Passed to :meth:`~fipy.terms.term.Term.sweep`.
+
+        :Returns: the residual of the sweep
+        """
+        var = self._solutionVariable
+
+        x = numerix.array(var).ravel().copy()
+
+        self.residual = self.equation.sweep(var=self.var, solver=self.solver,
+                                            boundaryConditions=self.boundaryConditions,
+                                            dt=dt, underRelaxation=underRelaxation,
+                                            residualFn=self.residualFn)
+        self.sweeps += 1
+
+        if self.history > 0 or self.mixing != 1.:
+            f = numerix.array(var).ravel() - x
+            var.value = numerix.reshape(self._mix(x, f), var.shape)
+
+        return self.residual
+
+    def _hasConverged(self, residual, initialResidual):
+        if residual <= self.tolerance:
+            return True
+        elif self.relativeTolerance is not None:
+            return residual <= self.relativeTolerance * initialResidual
+        else:
+            return False
+
+    def solve(self, dt=None, underRelaxation=None):
+        """
+        Sweep `equation` until the residual satisfies the convergence
+        criteria or `sweeps` iterations have been performed.
+
+        :Parameters:
+          - `dt`: The time step size.
+          - `underRelaxation`: Passed to :meth:`~fipy.terms.term.Term.sweep`.
+
+        :Returns: the final residual
+        """
+        self.reset()
+        self.sweeps = 0
+        self.converged = False
+
+        initialResidual = None
+        while self.sweeps < self.maxSweeps:
+            residual = self.sweep(dt=dt, underRelaxation=underRelaxation)
+            if initialResidual is None:
+                initialResidual = residual
+            if self._hasConverged(residual, initialResidual):
+                self.converged = True
+                break
+
+        if not self.converged and self.raiseWarning:
+            import warnings
+            warnings.warn(NonlinearSweeperConvergenceWarning(self, self.sweeps, self.residual), stacklevel=2)
+
+        return self.residual
+
+    def __repr__(self):
+        return '%s(history=%d, mixing=%g, tolerance=%g, sweeps=%d)' \
+            % (self.__class__.__name__, self.history, self.mixing, self.tolerance, self.maxSweeps)
+
+class NonlinearSweeperConvergenceWarning(Warning):
+    def __init__(self, sweeper, sweeps, residual):
+        self.sweeper = sweeper
+        self.sweeps = sweeps
+        self.residual = residual
+
+    def __str__(self):
+        return "%s failed. Sweeps: %d. Residual: %g" % (str(self.sweeper), self.sweeps, self.residual)
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -48,6 +48,11 @@ class PIDStepper(Stepper):
            year =    2005,
            pages =   {201-231},
         }
+
+    The controller acts on the largest residual of the equations, as
+    returned by the default `Stepper.sweepFn`. To control the relative
+    error instead, which the solver finds in the same batched call as the
+    solution, opt in with ``step(..., sweepFn=Stepper.errorSweepFn)``.
     """
     def __init__(self, vardata=(), proportional=0.075, integral=0.175, derivative=0.01):
         Stepper.__init__(self, vardata=vardata)
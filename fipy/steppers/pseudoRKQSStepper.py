@@ -42,6 +42,13 @@ class PseudoRKQSStepper(Stepper):
 
     Not really appropriate, since we're not doing Runge-Kutta steps
     in the first place, but works OK.
+
+    The error of each step is whatever `sweepFn` returns, by default the
+    largest residual of the equations. Passing
+    ``sweepFn=Stepper.errorSweepFn`` to `step` instead returns the
+    relative error of each equation, solved together with the solution in
+    one batched call. This is not the default, so as not to change the
+    step sizes chosen for existing scripts.
     """
     def __init__(self, vardata=(), safety=0.9, pgrow=-0.2, pshrink=-0.25, errcon=1.89e-4):
         Stepper.__init__(self, vardata=vardata)
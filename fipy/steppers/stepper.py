@@ -46,6 +46,42 @@ class Stepper:
         return residual
     sweepFn = staticmethod(sweepFn)
 
+    def errorSweepFn(vardata, dt, errorTolerance=1., *args, **kwargs):
+        r"""
+        Alternative to `sweepFn` for error-controlled steppers. Each
+        equation is swept with `cacheError=True`, so the error vector and
+        the solution are solved together, and the largest relative error
+
+        .. math::
+
+           \frac{\|\vec{e}\|_\infty}{\|\mathtt{var}^\text{old}\|_\infty}
+
+        scaled by `errorTolerance` is returned.
+
+        >>> from fipy import *
+        >>> from fipy.steppers import PseudoRKQSStepper, Stepper
+        >>> m = Grid1D(nx=10)
+        >>> v = CellVariable(mesh=m, value=1., hasOld=True)
+        >>> v.constrain(0., m.facesLeft)
+        >>> eq = TransientTerm() == DiffusionTerm()
+        >>> stepper = PseudoRKQSStepper(vardata=((v, eq, ()),))
+        >>> dt, dtNext = stepper.step(dt=1., dtTry=1., sweepFn=Stepper.errorSweepFn,
+        ...                           errorTolerance=0.1)
+        >>> print dt < 1.
+        True
+        >>> print 0 < float(min(v)) < 1
+        True
+        """
+        from fipy.tools.numerix import LINFnorm
+        error = 0
+        for var, eqn, bcs in vardata:
+            eqn.sweep(var=var, dt=dt, boundaryConditions=bcs, cacheError=True)
+            denom = LINFnorm(var.old)
+            error = max(error, LINFnorm(eqn.errorVector) / (denom + (denom == 0)))
+
+        return error / errorTolerance
+    errorSweepFn = staticmethod(errorSweepFn)
+
     def successFn(vardata, dt, dtPrev, elapsed, *args, **kwargs):
         pass
     successFn = staticmethod(successFn)
@@ -100,3 +136,10 @@ class Stepper:
             dtTry = max(dtTry, self.dtMin)
 
         return dtSave or dtPrev, dtSave or dtTry
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -217,7 +217,20 @@ class Term(object):
               :math:`\vec{r}=\mathsf{L}\vec{x} - \vec{b}` in the `residualVector` member of `Term`
            - `cacheError`: If `True`, use the residual vector :math:`\vec{r}`
               to solve :math:`\mathsf{L}\vec{e}=\vec{r}` for the error vector :math:`\vec{e}`
-              and store it in the `errorVector` member of `Term`
+              and store it in the `errorVector` member of `Term`. The error
+              and the solution are solved together, sharing any factorization
+              or preconditioner.
+
+        >>> from fipy import *
+        >>> m = Grid1D(nx=10)
+        >>> v = CellVariable(mesh=m, value=1.)
+        >>> v.constrain(0., m.facesLeft)
+        >>> eq = TransientTerm() == DiffusionTerm()
+        >>> v0 = v.copy()
+        >>> res = eq.sweep(v, dt=1., cacheError=True)
+        >>> e = eq.justErrorVector(v0, dt=1.)
+        >>> print numerix.allclose(eq.errorVector, e)
+        True
 
         """
         solver = self._prepareLinearSystem(var=var, solver=solver, boundaryConditions=boundaryConditions, dt=dt)
@@ -228,18 +241,16 @@ class Term(object):
             self.residualVector = solver._calcResidualVector(residualFn=residualFn)
 
         if cacheError:
+            # solve for the error and the solution against the same matrix
             self.errorVector = solver.var.copy()
-            var_tmp = solver.var
-            RHS_tmp = solver.RHSvector
-            solver._storeMatrix(var=self.errorVector, matrix=solver.matrix, RHSvector=self.residualVector)
+            solver._solveMultiple(vars=(self.errorVector, solver.var),
+                                  RHSvectors=(self.residualVector, solver.RHSvector))
+        else:
             solver._solve()
-            solver._storeMatrix(var=var_tmp, matrix=solver.matrix, RHSvector=RHS_tmp)
 
         if not cacheResidual:
             self.residualVector = None
 
-        solver._solve()
-
         return residual
 
     def justResidualVector(self, var=None, solver=None, boundaryConditions=(), dt=None, underRelaxation=None, residualFn=None):
@@ -40,6 +40,7 @@ import fipy.tests.testProgram
 def _suite():
     return _LateImportTestSuite(testModuleNames = (
         'solvers.test',
+        'steppers.test',
         'terms.test',
         'tools.test',
         'matrices.test',
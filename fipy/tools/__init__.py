@@ -109,20 +109,26 @@ for M in (2, 3):
                          why="not running on processor %d of %d" % (N, M),
                          skipWarning=False)
 
+import fipy.tools.checkpoint
 import fipy.tools.dump
 import fipy.tools.numerix
 import fipy.tools.vector
 from dimensions.physicalField import PhysicalField
 from fipy.tools.numerix import *
 from fipy.tools.vitals import Vitals
+from fipy.tools.asyncWriter import AsyncWriter
+from fipy.tools.monitor import Monitor
 
 __all__ = ["serialComm",
            "parallelComm",
+           "checkpoint",
            "dump",
            "numerix",
            "vector",
            "PhysicalField",
            "Vitals",
+           "AsyncWriter",
+           "Monitor",
            "serial",
            "parallel"]
 
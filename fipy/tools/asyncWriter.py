@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "asyncWriter.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+import atexit
+import cPickle
+import collections
+import gzip
+import sys
+import threading
+import weakref
+
+from fipy.tools import numerix
+from fipy.tools import parallelComm
+from fipy.variables.variable import _threadValues
+
+__all__ = ["AsyncWriter"]
+
+class AsyncWriter(object):
+    """
+    Writes output in a background thread, so that the time loop does not
+    wait on formatting, compression, and disk writes.
+
+    `plot` copies the values of a viewer's variables and `dump` pickles
+    its data before they return. The mesh is not copied, as it does not
+    change. Everything else happens in the background, in the order the
+    calls were made.
+
+    The copies that have not been written yet are limited to `maxBytes`.
+    When that limit would be exceeded, `plot` and `dump` wait for earlier
+    output to be written. `flush` waits for all of it, and it is flushed
+    when Python exits.
+
+    Any exception raised while writing is raised again by the next call
+    to `plot`, `dump`, or `flush`.
+
+        >>> import os
+        >>> import shutil
+        >>> from tempfile import mkdtemp
+        >>> dname = mkdtemp()
+
+        >>> from fipy import CellVariable, Grid1D, TSVViewer
+        >>> from fipy.tools import dump
+        >>> mesh = Grid1D(nx=3)
+        >>> var = CellVariable(mesh=mesh, name="var", value=0.)
+        >>> viewer = TSVViewer(vars=var)
+
+        >>> writer = AsyncWriter()
+        >>> for step in range(3):
+        ...     var.value = step
+        ...     writer.plot(viewer, os.path.join(dname, "%d.tsv" % step))
+        ...     writer.dump({"var": var}, os.path.join(dname, "%d.gz" % step))
+        >>> var[0] = 10.
+        >>> writer.flush()
+
+        The output is what the variables held when it was requested
+
+        >>> print open(os.path.join(dname, "1.tsv")).read(), # doctest: +NORMALIZE_WHITESPACE
+        var
+        x   var
+        0.5 1
+        1.5 1
+        2.5 1
+        >>> print dump.read(os.path.join(dname, "2.gz"))["var"].value
+        [ 2.  2.  2.]
+
+        and the viewer still displays the variables
+
+        >>> viewer.vars[0] is var
+        True
+
+        so writers that know their variables by identity, like `HDF5Writer`
+        or a `VTKXMLCellViewer` of an unnamed variable, write each step
+
+        >>> from fipy import HDF5Writer
+        >>> h5 = HDF5Writer(vars=var, filename=os.path.join(dname, "var.h5")) # doctest: +H5PY
+        >>> for step in range(3):
+        ...     var.value = step
+        ...     writer.plot(h5, time=step / 10.) # doctest: +H5PY
+        >>> var.value = 10.
+        >>> writer.flush()
+        >>> import h5py # doctest: +H5PY
+        >>> f = h5py.File(os.path.join(dname, "var.h5"), "r") # doctest: +H5PY
+        >>> print f["time"][:], f["cells/var"][:, 0] # doctest: +H5PY
+        [ 0.   0.1  0.2] [ 0.  1.  2.]
+        >>> f.close() # doctest: +H5PY
+
+        >>> from fipy.viewers.vtkViewer import VTKXMLCellViewer
+        >>> from fipy.viewers.vtkViewer.vtkXMLViewer import _readVTKXML
+        >>> unnamed = CellVariable(mesh=mesh, value=mesh.x)
+        >>> vtk = VTKXMLCellViewer(vars=unnamed)
+        >>> writer.plot(vtk, os.path.join(dname, "unnamed.vtr")) # doctest: +SERIAL
+        >>> unnamed.value = 0.
+        >>> writer.flush()
+        >>> arrays = _readVTKXML(os.path.join(dname, "unnamed.vtr")) # doctest: +SERIAL
+        >>> print arrays["CellVariable #%d" % id(unnamed)] # doctest: +SERIAL
+        [ 0.5  1.5  2.5]
+
+        Errors are reported to the caller
+
+        >>> writer.plot(viewer, os.path.join(dname, "missing", "3.tsv"))
+        >>> writer.flush() # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+            ...
+        IOError: [Errno 2] No such file or directory: '...3.tsv'
+        >>> writer.flush()
+
+        Copies wait for room when more than `maxBytes` are pending
+
+        >>> import time
+        >>> writer = AsyncWriter(maxBytes=var.value.nbytes)
+        >>> writer.submit(time.sleep, (0.2,), nbytes=var.value.nbytes)
+        >>> start = time.time()
+        >>> writer.plot(viewer, os.path.join(dname, "4.tsv"))
+        >>> time.time() - start > 0.1
+        True
+        >>> writer.close()
+        >>> writer.plot(viewer, os.path.join(dname, "5.tsv"))
+        Traceback (most recent call last):
+            ...
+        RuntimeError: the AsyncWriter is closed
+
+        >>> shutil.rmtree(dname)
+    """
+    def __init__(self, maxBytes=2**28):
+        """
+        :Parameters:
+          maxBytes
+            the most memory to hold in copies that have not been written
+        """
+        self.maxBytes = maxBytes
+
+        self._tasks = collections.deque()
+        self._unfinished = 0
+        self._pendingBytes = 0
+        self._error = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+        reference = weakref.ref(self)
+        def _closeAtExit():
+            writer = reference()
+            if writer is not None:
+                writer.close()
+        atexit.register(_closeAtExit)
+
+    def submit(self, function, args=(), kwargs={}, nbytes=0):
+        """
+        Call `function(*args, **kwargs)` in the background.
+
+        :Parameters:
+          function
+            the callable to run
+          args, kwargs
+            its arguments, which must not be changed until it has run
+          nbytes
+            the memory held by the arguments, counted against `maxBytes`
+        """
+        self._condition.acquire()
+        try:
+            self._raiseError()
+            if self._closed:
+                raise RuntimeError("the %s is closed" % self.__class__.__name__)
+
+            # let one task through, however large, when nothing else is pending
+            while self._unfinished > 0 and self._pendingBytes + nbytes > self.maxBytes:
+                self._condition.wait()
+                self._raiseError()
+
+            self._tasks.append((function, args, kwargs, nbytes))
+            self._unfinished += 1
+            self._pendingBytes += nbytes
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="AsyncWriter")
+                self._thread.daemon = True
+                self._thread.start()
+
+            self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+    def plot(self, viewer, *args, **kwargs):
+        """
+        Copy the values of the variables of `viewer` and call
+        `viewer.plot(*args, **kwargs)` with them in the background.
+
+        `viewer` keeps its own variables; while it plots, their `value` is
+        the copy, in the background thread only. `viewer` should only write
+        files; GUI viewers must be plotted from the main thread. In
+        parallel, a viewer that communicates, like `TSVViewer`, needs an MPI
+        that allows calls from several threads.
+        """
+        vars = list(viewer.vars)
+        values = {}
+        for var in vars:
+            value = var.value
+            if hasattr(value, "copy"):
+                value = value.copy()
+            values[id(var)] = value
+        nbytes = sum([numerix.asarray(value).nbytes for value in values.values()])
+
+        # `vars` keeps the variables, and so their `id()`, alive until written
+        self.submit(self._plot, (viewer, vars, values, args, kwargs), nbytes=nbytes)
+
+    @staticmethod
+    def _plot(viewer, vars, values, args, kwargs):
+        _threadValues.values = values
+        try:
+            viewer.plot(*args, **kwargs)
+        finally:
+            _threadValues.values = None
+
+    def dump(self, data, filename, communicator=parallelComm):
+        """
+        Pickle `data` now and write it to `filename` in the background,
+        like `fipy.tools.dump.write`.
+
+        :Parameters:
+          data
+            the object to pickle
+          filename
+            the name of the gzipped file to write
+          communicator
+            object with `procID` and `Nproc` attributes
+        """
+        # every processor pickles, in case pickling communicates
+        pickled = cPickle.dumps(data, 0)
+        if communicator.procID == 0:
+            self.submit(_writeGzip, (pickled, filename), nbytes=len(pickled))
+
+    def flush(self):
+        """
+        Wait for all output to be written.
+        """
+        self._condition.acquire()
+        try:
+            while self._unfinished > 0:
+                self._condition.wait()
+            self._raiseError()
+        finally:
+            self._condition.release()
+
+    def close(self):
+        """
+        Flush the output and stop the background thread.
+        """
+        try:
+            self.flush()
+        finally:
+            self._condition.acquire()
+            try:
+                self._closed = True
+                self._condition.notifyAll()
+            finally:
+                self._condition.release()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+    def _raiseError(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error[0], error[1], error[2]
+
+    def _run(self):
+        while True:
+            self._condition.acquire()
+            try:
+                while len(self._tasks) == 0 and not self._closed:
+                    self._condition.wait()
+                if len(self._tasks) == 0:
+                    return
+                function, args, kwargs, nbytes = self._tasks.popleft()
+            finally:
+                self._condition.release()
+
+            try:
+                function(*args, **kwargs)
+            except Exception:
+                error = sys.exc_info()
+            else:
+                error = None
+
+            self._condition.acquire()
+            try:
+                if error is not None and self._error is None:
+                    self._error = error
+                self._unfinished -= 1
+                self._pendingBytes -= nbytes
+                self._condition.notifyAll()
+            finally:
+                self._condition.release()
+
+def _copy(var):
+    """
+    Return a `CellVariable` or `FaceVariable` holding a copy of the value
+    of `var`, on the same mesh.
+    """
+    from fipy.variables.cellVariable import CellVariable
+    from fipy.variables.faceVariable import FaceVariable
+
+    for cls in (CellVariable, FaceVariable):
+        if isinstance(var, cls):
+            return cls(mesh=var.mesh, name=var.name, value=var.value, rank=var.rank)
+
+    return var.copy()
+
+def _writeGzip(data, filename):
+    fileStream = gzip.GzipFile(filename=filename, mode='w', fileobj=None)
+    try:
+        fileStream.write(data)
+    finally:
+        fileStream.close()
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,618 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "checkpoint.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+
+from numpy.lib import format as npyFormat
+
+from fipy.tools import numerix
+from fipy.tools.numerix import MA
+from fipy.tools import parallelComm
+
+__all__ = ["write", "read", "restore", "IncrementalCheckpoint", "restoreIncremental"]
+
+_metadataName = "checkpoint.json"
+
+def _meshHash(mesh):
+    """
+    Return a digest of the vertices, faces, and cells of `mesh`, which
+    identifies it without storing it.
+
+        >>> from fipy.meshes import Grid2D
+        >>> _meshHash(Grid2D(nx=2, ny=3)) == _meshHash(Grid2D(nx=2, ny=3))
+        True
+        >>> _meshHash(Grid2D(nx=2, ny=3)) == _meshHash(Grid2D(nx=3, ny=2))
+        False
+        >>> from fipy.meshes import Grid1D
+        >>> _meshHash(Grid1D(nx=3)) == _meshHash(Grid1D(nx=3, dx=2.))
+        False
+    """
+    # a uniform 1D grid has no `faceVertexIDs`, as its faces are its vertices
+    arrays = [mesh.vertexCoords, mesh.cellFaceIDs]
+    if hasattr(mesh, "faceVertexIDs"):
+        arrays.append(mesh.faceVertexIDs)
+
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = numerix.ascontiguousarray(MA.filled(array, -1))
+        digest.update(str(array.shape))
+        digest.update(array.astype(array.dtype.newbyteorder("<")).tostring())
+    return digest.hexdigest()
+
+def _compressor(compress):
+    if not compress:
+        return None
+    if compress is True:
+        try:
+            import lz4.frame
+            return "lz4"
+        except ImportError:
+            return "zlib"
+    if compress not in ("zlib", "lz4"):
+        raise ValueError("Unknown compression %s; use 'zlib' or 'lz4'" % compress)
+    return compress
+
+def _compress(data, compressor):
+    if compressor == "lz4":
+        import lz4.frame
+        return lz4.frame.compress(data)
+    else:
+        return zlib.compress(data, 1)
+
+def _decompress(data, compressor):
+    if compressor == "lz4":
+        import lz4.frame
+        return lz4.frame.decompress(data)
+    else:
+        return zlib.decompress(data)
+
+def _filename(filename, communicator):
+    if communicator.Nproc > 1:
+        root, ext = os.path.splitext(filename)
+        filename = "%s-%d%s" % (root, communicator.procID, ext)
+    return filename
+
+def write(filename, vars, time=None, step=None, mesh=None, compress=False, communicator=parallelComm):
+    """
+    Record the values of `CellVariable` objects for a restart.
+
+    Only the arrays are stored, not the `Variable` objects, their
+    equations, or the mesh, which the restarted script builds again. The
+    mesh is identified by a digest of its vertices, faces, and cells, so
+    that `restore` can check that it is the same.
+
+    The file is a ``.npz`` archive. Without compression, `read` maps its
+    arrays into memory rather than reading them. With compression, each
+    array is compressed with lz4, if available, or zlib at level 1.
+
+    In parallel, each processor writes the values of its own cells to
+    its own file, named with its `procID`.
+
+    :Parameters:
+      - `filename`: The path of the file to write.
+      - `vars`: A `dict` of `CellVariable` objects by name, or a sequence
+        of named `CellVariable` objects, all on the same mesh.
+      - `time`: The time of the simulation.
+      - `step`: The number of the time step.
+      - `mesh`: A reference to the mesh, such as the name of a file saved
+        with `Mesh.save`, that is recorded but not checked.
+      - `compress`: `True`, "zlib", or "lz4" to compress the arrays.
+      - `communicator`: Object with `procID` and `Nproc` attributes.
+    """
+    vars = _namedVars(vars)
+    compressor = _compressor(compress)
+
+    arrays, metadata = _snapshot(vars)
+    metadata.update({"time": None if time is None else float(time),
+                     "step": step,
+                     "compression": compressor})
+    metadata["mesh"]["reference"] = mesh
+
+    _writeArchive(_filename(filename, communicator), arrays, metadata)
+
+def _snapshot(vars, meshHash=None):
+    """
+    Return the arrays of `vars` by name and the metadata that describes
+    them.
+    """
+    arrays = {}
+    variables = {}
+    for name, var in vars.items():
+        arrays[name] = numerix.asarray(var.value)
+        variables[name] = {"old": var._old is not None}
+        if variables[name]["old"]:
+            arrays[name + ".old"] = numerix.asarray(var.old.value)
+
+    meshes = set([var.mesh for var in vars.values()])
+    if len(meshes) > 1:
+        raise ValueError("all variables must be on the same mesh")
+
+    if meshHash is None and vars:
+        meshHash = _meshHash(meshes.pop())
+
+    metadata = {"format": 1,
+                "mesh": {"hash": meshHash},
+                "variables": variables}
+
+    return arrays, metadata
+
+def _writeArchive(filename, arrays, metadata):
+    compressor = metadata["compression"]
+    archive = zipfile.ZipFile(filename, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True)
+    try:
+        archive.writestr(_metadataName, json.dumps(metadata, sort_keys=True))
+        directory = tempfile.mkdtemp()
+        try:
+            for name, array in sorted(arrays.items()):
+                npy = os.path.join(directory, "array.npy")
+                numerix.save(npy, array)
+                if compressor is None:
+                    archive.write(npy, arcname=name + ".npy")
+                else:
+                    f = open(npy, "rb")
+                    try:
+                        data = f.read()
+                    finally:
+                        f.close()
+                    archive.writestr("%s.npy.%s" % (name, compressor), _compress(data, compressor))
+                os.remove(npy)
+        finally:
+            shutil.rmtree(directory)
+    finally:
+        archive.close()
+
+def _namedVars(vars):
+    if isinstance(vars, dict):
+        return dict(vars)
+    if type(vars) not in [type([]), type(())]:
+        vars = [vars]
+    named = {}
+    for var in vars:
+        if not var.name:
+            raise ValueError("variables must be named, or given as a dict")
+        if var.name in named:
+            raise ValueError("more than one variable is named %s" % var.name)
+        named[var.name] = var
+    return named
+
+def _memmap(filename, info, mode="r"):
+    """
+    Map the array of an uncompressed ``.npy`` member of a ``.npz``
+    archive into memory, with the `mode` of `numerix.memmap`, or return
+    `None` if it cannot be mapped.
+    """
+    f = open(filename, "rb")
+    try:
+        f.seek(info.header_offset)
+        header = f.read(30)
+        nameLength, extraLength = struct.unpack("<HH", header[26:30])
+        f.seek(info.header_offset + 30 + nameLength + extraLength)
+        version = npyFormat.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = npyFormat.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = npyFormat.read_array_header_2_0(f)
+        offset = f.tell()
+    finally:
+        f.close()
+
+    if dtype.hasobject or numerix.prod(shape) == 0:
+        return None
+
+    return numerix.memmap(filename, dtype=dtype, mode=mode, shape=shape,
+                          order=["C", "F"][fortran], offset=offset)
+
+def read(filename, mmap=True, communicator=parallelComm):
+    """
+    Read the arrays and the metadata written by `write`.
+
+    Returns a `dict` of arrays, with the values of each variable under its
+    name and its old values under its name followed by ".old", and a
+    `dict` of metadata, with the "time", the "step", and the "mesh".
+
+    :Parameters:
+      - `filename`: The path of the file to read.
+      - `mmap`: Whether to map uncompressed arrays into memory, read-only,
+        instead of reading them.
+      - `communicator`: Object with `procID` and `Nproc` attributes.
+    """
+    return _readArchive(_filename(filename, communicator), mmap=mmap)
+
+def _readArchive(filename, mmap=True):
+    archive = zipfile.ZipFile(filename, mode="r")
+    try:
+        metadata = json.loads(archive.read(_metadataName))
+        compressor = metadata["compression"]
+
+        arrays = {}
+        for info in archive.infolist():
+            if info.filename == _metadataName:
+                continue
+            if compressor is None:
+                name = info.filename[:-len(".npy")]
+                array = None
+                if mmap and info.compress_type == zipfile.ZIP_STORED:
+                    array = _memmap(filename, info)
+                if array is None:
+                    array = npyFormat.read_array(archive.open(info))
+            else:
+                name = info.filename[:-len(".npy.%s" % compressor)]
+                data = _decompress(archive.read(info), compressor)
+                array = numerix.load(_StringIO(data))
+            arrays[name] = array
+    finally:
+        archive.close()
+
+    return arrays, metadata
+
+def _StringIO(data):
+    import StringIO
+    return StringIO.StringIO(data)
+
+def restore(filename, vars, communicator=parallelComm):
+    """
+    Set the values, and old values, of `CellVariable` objects to those
+    written by `write`, and return its metadata.
+
+        >>> import os
+        >>> from tempfile import mkstemp
+        >>> from fipy import CellVariable, Grid2D
+        >>> f, fname = mkstemp(".npz")
+        >>> os.close(f)
+
+        >>> mesh = Grid2D(nx=3, ny=2)
+        >>> x, y = mesh.cellCenters
+        >>> phi = CellVariable(mesh=mesh, name="phi", value=x, hasOld=True)
+        >>> phi.updateOld()
+        >>> phi.value = x * y
+        >>> psi = CellVariable(mesh=mesh, name="psi", rank=1, value=(y, x))
+
+        >>> for compress in (False, "zlib"):
+        ...     write(fname, (phi, psi), time=0.25, step=10, compress=compress)
+        ...     arrays, metadata = read(fname)
+        ...     print sorted(arrays.keys()), metadata["step"], metadata["compression"]
+        ...     print numerix.allequal(arrays["psi"], psi.value), isinstance(arrays["psi"], numerix.memmap)
+        ['phi', 'phi.old', 'psi'] 10 None
+        True True
+        ['phi', 'phi.old', 'psi'] 10 zlib
+        True False
+        >>> del arrays
+
+        A restarted script builds the mesh and the variables again
+
+        >>> mesh = Grid2D(nx=3, ny=2)
+        >>> phi = CellVariable(mesh=mesh, name="phi", hasOld=True)
+        >>> psi = CellVariable(mesh=mesh, name="psi", rank=1)
+        >>> metadata = restore(fname, (phi, psi))
+        >>> print metadata["time"], metadata["step"]
+        0.25 10
+        >>> print numerix.allclose(phi.value, x * y), numerix.allclose(phi.old.value, x)
+        True True
+        >>> print numerix.allclose(psi.value, (y, x))
+        True
+
+        and they must be on the same mesh
+
+        >>> restore(fname, {"phi": CellVariable(mesh=Grid2D(nx=2, ny=3))})
+        Traceback (most recent call last):
+            ...
+        ValueError: the variables are not on the mesh that was written
+        >>> restore(fname, {"chi": phi})
+        Traceback (most recent call last):
+            ...
+        KeyError: 'chi'
+
+        >>> os.remove(fname)
+
+    :Parameters:
+      - `filename`: The path of the file to read.
+      - `vars`: A `dict` of `CellVariable` objects by name, or a sequence
+        of named `CellVariable` objects, all on the mesh that was written.
+      - `communicator`: Object with `procID` and `Nproc` attributes.
+    """
+    arrays, metadata = read(filename, communicator=communicator)
+
+    _restoreArrays(_namedVars(vars), arrays, metadata)
+
+    return metadata
+
+def _restoreArrays(vars, arrays, metadata):
+    for mesh in set([var.mesh for var in vars.values()]):
+        if _meshHash(mesh) != metadata["mesh"]["hash"]:
+            raise ValueError("the variables are not on the mesh that was written")
+
+    for name, var in vars.items():
+        var.value = arrays[name]
+        if var._old is not None and name + ".old" in arrays:
+            var._old.value = arrays[name + ".old"]
+
+class IncrementalCheckpoint(object):
+    """
+    Writes a series of checkpoints that only store the parts of the
+    variables that have changed.
+
+    The values of each variable are divided into chunks of `chunkSize`
+    elements. The first checkpoint is a full base snapshot, written like
+    `write`. Each later one is a delta that only holds the chunks whose
+    digest has changed since the previous checkpoint. Every
+    `compactEvery` deltas, a new base replaces the old base and its
+    deltas. An index file, ``<filename>.json``, always lists the current
+    base and its deltas, and `restoreIncremental` replays them.
+
+        >>> import os
+        >>> import shutil
+        >>> from tempfile import mkdtemp
+        >>> from fipy import CellVariable, Grid1D
+        >>> dname = mkdtemp()
+        >>> fname = os.path.join(dname, "run")
+
+        >>> mesh = Grid1D(nx=100)
+        >>> phi = CellVariable(mesh=mesh, name="phi", hasOld=True)
+        >>> checkpoints = IncrementalCheckpoint(fname, phi, chunkSize=10, compactEvery=3)
+        >>> for step in range(5):
+        ...     phi.updateOld()
+        ...     phi[step * 20] = step + 1
+        ...     checkpoints.write(time=step / 10., step=step)
+        ...     print checkpoints.changedChunks
+        {'phi': 10, 'phi.old': 10}
+        {'phi': 1, 'phi.old': 1}
+        {'phi': 1, 'phi.old': 1}
+        {'phi': 1, 'phi.old': 1}
+        {'phi': 10, 'phi.old': 10}
+        >>> print sorted(os.listdir(dname))
+        ['run-000004.npz', 'run.json']
+
+        >>> phi.updateOld()
+        >>> phi[90:] = -1
+        >>> checkpoints.write(time=0.5, step=5)
+        >>> print checkpoints.changedChunks
+        {'phi': 1, 'phi.old': 1}
+
+        A restarted script replays the base and the deltas
+
+        >>> restarted = CellVariable(mesh=Grid1D(nx=100), name="phi", hasOld=True)
+        >>> metadata = restoreIncremental(fname, restarted)
+        >>> print metadata["time"], metadata["step"]
+        0.5 5
+        >>> print numerix.allequal(restarted.value, phi.value)
+        True
+        >>> print numerix.allequal(restarted.old.value, phi.old.value)
+        True
+
+        and carries on from the checkpoints listed in the index, removing
+        any that the index does not list, such as one left behind by a
+        crash before the index was updated
+
+        >>> open(os.path.join(dname, "run-000007.npz"), "w").close()
+        >>> checkpoints = IncrementalCheckpoint(fname, restarted, chunkSize=10, compactEvery=3)
+        >>> print sorted(os.listdir(dname))
+        ['run-000004.npz', 'run-000005.npz', 'run.json']
+        >>> restarted.updateOld()
+        >>> restarted[0] = 0
+        >>> checkpoints.write(time=0.6, step=6)
+        >>> print checkpoints.changedChunks
+        {'phi': 10, 'phi.old': 10}
+        >>> print sorted(os.listdir(dname))
+        ['run-000006.npz', 'run.json']
+        >>> print restoreIncremental(fname, phi)["step"]
+        6
+        >>> print numerix.allequal(restarted.value, phi.value)
+        True
+
+        >>> shutil.rmtree(dname)
+    """
+    def __init__(self, filename, vars, chunkSize=2**16, compactEvery=10, compress=False, communicator=parallelComm):
+        """
+        :Parameters:
+          - `filename`: The root of the names of the files to write.
+          - `vars`: A `dict` of `CellVariable` objects by name, or a
+            sequence of named `CellVariable` objects, all on the same mesh.
+          - `chunkSize`: The number of elements in each chunk.
+          - `compactEvery`: The number of deltas after which a new base is
+            written.
+          - `compress`: `True`, "zlib", or "lz4" to compress the arrays.
+          - `communicator`: Object with `procID` and `Nproc` attributes.
+        """
+        self.root = os.path.splitext(_filename(filename, communicator))[0]
+        self.vars = _namedVars(vars)
+        self.chunkSize = chunkSize
+        self.compactEvery = compactEvery
+        self.compressor = _compressor(compress)
+
+        meshes = set([var.mesh for var in self.vars.values()])
+        self.meshHash = _meshHash(meshes.pop()) if meshes else None
+
+        self.count = 0
+        self.base = None
+        self.deltas = []
+        self.digests = {}
+        self._shapes = None
+        self.changedChunks = {}
+
+        self._resume()
+
+    def _resume(self):
+        """
+        Continue the numbering after the checkpoints listed in an existing
+        index, so that the first write replaces them with a new base, and
+        remove the checkpoints that it does not list.
+        """
+        directory, prefix = os.path.split(self.root)
+        listed = []
+        if os.path.exists(self.root + ".json"):
+            f = open(self.root + ".json", "r")
+            try:
+                index = json.load(f)
+            finally:
+                f.close()
+            listed = [index["base"]] + index["deltas"]
+            self.base = os.path.join(directory, index["base"])
+            self.deltas = [os.path.join(directory, delta) for delta in index["deltas"]]
+
+        pattern = re.compile(re.escape(prefix) + r"-(\d{6})\.npz$")
+        for name in os.listdir(directory or os.curdir):
+            match = pattern.match(name)
+            if match is None:
+                continue
+            if name in listed:
+                self.count = max(self.count, int(match.group(1)) + 1)
+            else:
+                os.remove(os.path.join(directory, name))
+
+    def _digests(self, array):
+        data = numerix.ascontiguousarray(array).ravel()
+        return [hashlib.sha1(buffer(data[start:start + self.chunkSize])).digest()
+                for start in range(0, len(data), self.chunkSize)]
+
+    def write(self, time=None, step=None):
+        """
+        Write the next checkpoint.
+
+        :Parameters:
+          - `time`: The time of the simulation.
+          - `step`: The number of the time step.
+        """
+        arrays, metadata = _snapshot(self.vars, meshHash=self.meshHash)
+        metadata.update({"time": None if time is None else float(time),
+                         "step": step,
+                         "compression": self.compressor})
+
+        digests = dict((name, self._digests(array)) for name, array in arrays.items())
+        shapes = dict((name, (array.shape, array.dtype.str)) for name, array in arrays.items())
+
+        filename = "%s-%06d.npz" % (self.root, self.count)
+        if (self.base is None
+            or len(self.deltas) >= self.compactEvery
+            or shapes != self._shapes):
+            _writeArchive(filename, arrays, metadata)
+            self.changedChunks = dict((name, len(digest)) for name, digest in digests.items())
+            obsolete = [self.base] + self.deltas
+            self.base, self.deltas = filename, []
+        else:
+            chunks = {}
+            for name, array in arrays.items():
+                changed = [index for index, (new, old) in enumerate(zip(digests[name], self.digests[name]))
+                           if new != old]
+                data = numerix.ascontiguousarray(array).ravel()
+                chunks[name + ".chunks"] = numerix.array(changed, dtype="int64")
+                chunks[name + ".data"] = numerix.concatenate([data[index * self.chunkSize:(index + 1) * self.chunkSize]
+                                                              for index in changed] or [data[:0]])
+                self.changedChunks[name] = len(changed)
+            metadata["chunkSize"] = self.chunkSize
+            _writeArchive(filename, chunks, metadata)
+            obsolete = []
+            self.deltas.append(filename)
+
+        self._writeIndex()
+
+        # only once the index no longer refers to them
+        for name in obsolete:
+            if name is not None:
+                os.remove(name)
+
+        self.digests = digests
+        self._shapes = shapes
+        self.count += 1
+
+    def _writeIndex(self):
+        index = self.root + ".json"
+        temporary = index + ".tmp"
+        f = open(temporary, "w")
+        try:
+            json.dump({"format": 1,
+                       "base": os.path.basename(self.base),
+                       "deltas": [os.path.basename(delta) for delta in self.deltas]}, f)
+        finally:
+            f.close()
+        if os.name == "nt" and os.path.exists(index):
+            os.remove(index)
+        os.rename(temporary, index)
+
+def restoreIncremental(filename, vars, communicator=parallelComm):
+    """
+    Set the values, and old values, of `CellVariable` objects to those of
+    the last checkpoint written by an `IncrementalCheckpoint`, and return
+    its metadata.
+
+    :Parameters:
+      - `filename`: The root of the names of the files that were written.
+      - `vars`: A `dict` of `CellVariable` objects by name, or a sequence
+        of named `CellVariable` objects, all on the mesh that was written.
+      - `communicator`: Object with `procID` and `Nproc` attributes.
+    """
+    root = os.path.splitext(_filename(filename, communicator))[0]
+    directory = os.path.dirname(root)
+
+    f = open(root + ".json", "r")
+    try:
+        index = json.load(f)
+    finally:
+        f.close()
+
+    arrays, metadata = _readArchive(os.path.join(directory, index["base"]), mmap=False)
+
+    for delta in index["deltas"]:
+        chunks, metadata = _readArchive(os.path.join(directory, delta), mmap=False)
+        chunkSize = metadata["chunkSize"]
+        for name, array in arrays.items():
+            flat = array.reshape(-1)
+            data = chunks[name + ".data"]
+            start = 0
+            for chunk in chunks[name + ".chunks"]:
+                stop = start + len(flat[chunk * chunkSize:(chunk + 1) * chunkSize])
+                flat[chunk * chunkSize:(chunk + 1) * chunkSize] = data[start:stop]
+                start = stop
+
+    _restoreArrays(_namedVars(vars), arrays, metadata)
+
+    return metadata
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
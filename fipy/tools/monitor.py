@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "monitor.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+
+__docformat__ = 'restructuredtext'
+
+import os
+import struct
+
+from numpy.lib import format as npyFormat
+
+from fipy.tools import numerix
+
+__all__ = ["Monitor"]
+
+class Monitor(object):
+    """
+    Record probes of scalar `CellVariable` objects at every step.
+
+    Probes sample a variable at a point, or integrate, average, take the
+    L2 norm of, or find the extrema of a variable over a region of its
+    mesh. The cells and weights of every probe are found once, the first
+    time the probes are recorded, so recording evaluates each variable
+    once and finds all the probes of that variable with a few array
+    operations.
+
+    Each call to `record` stores a row of the step number, the time and
+    the probe values in a buffer of `length` rows. When the buffer is
+    full, the oldest rows are overwritten or, if `filename` is given,
+    the buffer is first appended to that `.npy` file of records, which
+    `numerix.load` reads.
+
+        >>> import os
+        >>> from tempfile import mkstemp
+        >>> fid, fname = mkstemp(".npy")
+        >>> os.close(fid)
+
+        >>> from fipy import CellVariable, Grid2D
+        >>> mesh = Grid2D(nx=4, ny=4)
+        >>> x, y = mesh.cellCenters
+        >>> phi = CellVariable(mesh=mesh, name="phi", value=x)
+
+        >>> monitor = Monitor(filename=fname, length=3)
+        >>> monitor.point(phi, (1.5, 0.5))
+        >>> monitor.point(phi, (1.2, 0.5), order=1, name="phi1")
+        >>> monitor.integral(phi, where=x < 2)
+        >>> monitor.average(phi)
+        >>> monitor.norm(phi)
+        >>> monitor.minimum(phi)
+        >>> monitor.maximum(phi, where=y > 2)
+        >>> print monitor.names
+        ['step', 'time', 'phi(1.5, 0.5)', 'phi1', 'phi_integral', 'phi_average', 'phi_norm', 'phi_minimum', 'phi_maximum']
+
+        >>> for step in range(5):
+        ...     phi.value = x * (step + 1)
+        ...     monitor.record(time=step * 0.1)
+
+        The buffer holds the last `length` rows
+
+        >>> print monitor["step"]
+        [ 2.  3.  4.]
+        >>> print monitor["phi(1.5, 0.5)"]
+        [ 4.5  6.   7.5]
+        >>> print monitor["phi1"]
+        [ 3.6  4.8  6. ]
+        >>> print monitor["phi_integral"], monitor["phi_average"]
+        [ 24.  32.  40.] [  6.   8.  10.]
+        >>> print monitor["phi_norm"]**2 / 84
+        [  9.  16.  25.]
+        >>> print monitor["phi_minimum"], monitor["phi_maximum"]
+        [ 1.5  2.   2.5] [ 10.5  14.   17.5]
+
+        and the file holds the rows that have been flushed
+
+        >>> print numerix.load(fname)["step"]
+        [ 0.  1.  2.]
+        >>> monitor.close()
+        >>> records = numerix.load(fname)
+        >>> print records["step"]
+        [ 0.  1.  2.  3.  4.]
+        >>> print records["time"]
+        [ 0.   0.1  0.2  0.3  0.4]
+        >>> print records["phi_integral"]
+        [  8.  16.  24.  32.  40.]
+
+        Probes cannot be added once recording has started
+
+        >>> monitor.maximum(phi)
+        Traceback (most recent call last):
+            ...
+        RuntimeError: probes must be added before the first record
+        >>> Monitor().norm(phi.grad)
+        Traceback (most recent call last):
+            ...
+        TypeError: probes need a scalar CellVariable
+
+        >>> os.remove(fname)
+    """
+    def __init__(self, filename=None, length=1000):
+        """
+        :Parameters:
+          filename
+            the `.npy` file to write the records to, or `None` to keep
+            only the last `length` of them
+          length
+            the number of records to hold between writes to `filename`
+        """
+        self.filename = filename
+        self.length = length
+
+        self._probes = []
+        self.names = ["step", "time"]
+        self._groups = None
+        self._buffer = None
+        self._count = 0
+        self._flushed = 0
+
+    def point(self, var, point, order=0, name=None):
+        """
+        Probe the value of `var` at `point`, interpolated like
+        `CellVariable.__call__`.
+
+        :Parameters:
+          var
+            the scalar `CellVariable` to probe
+          point
+            the coordinates of the point, e.g., `(x, y)`
+          order
+            0 for the value of the nearest cell, 1 to correct it with the
+            gradient in that cell
+          name
+            the name of the record, by default `var.name` and `point`
+        """
+        point = numerix.array(point, dtype=float).reshape((-1, 1))
+        if name is None:
+            name = "%s(%s)" % (var.name, ", ".join(["%g" % x for x in point[..., 0]]))
+        if order not in (0, 1):
+            raise ValueError, 'order should be either 0 or 1'
+        self._addProbe("point", var, name, point=point, order=order)
+
+    def integral(self, var, where=None, name=None):
+        """
+        Probe the volume integral of `var` over the cells `where` is true,
+        or over all cells.
+        """
+        self._addProbe("integral", var, name, where=where)
+
+    def average(self, var, where=None, name=None):
+        """
+        Probe the cell-volume-weighted average of `var` over the cells
+        `where` is true, or over all cells.
+        """
+        self._addProbe("average", var, name, where=where)
+
+    def norm(self, var, where=None, name=None):
+        """
+        Probe the L2 norm, the square root of the volume integral of
+        `var**2`, over the cells `where` is true, or over all cells.
+        """
+        self._addProbe("norm", var, name, where=where)
+
+    def minimum(self, var, where=None, name=None):
+        """
+        Probe the smallest value of `var` in the cells `where` is true,
+        or in all cells.
+        """
+        self._addProbe("minimum", var, name, where=where)
+
+    def maximum(self, var, where=None, name=None):
+        """
+        Probe the largest value of `var` in the cells `where` is true,
+        or in all cells.
+        """
+        self._addProbe("maximum", var, name, where=where)
+
+    def _addProbe(self, kind, var, name, **kwargs):
+        from fipy.variables.cellVariable import CellVariable
+
+        if self._groups is not None:
+            raise RuntimeError("probes must be added before the first record")
+        if not isinstance(var, CellVariable) or var.rank != 0:
+            raise TypeError("probes need a scalar CellVariable")
+        if name is None:
+            name = "%s_%s" % (var.name, kind)
+        if name in self.names:
+            raise ValueError("there is already a probe named %r" % name)
+
+        self.names.append(name)
+        self._probes.append((kind, var, kwargs))
+
+    @property
+    def _dtype(self):
+        return numerix.dtype([(name, float) for name in self.names])
+
+    def _prepare(self):
+        """
+        Find the local cells and weights of every probe.
+
+        Sums (points, integrals, averages, and norms) are accumulated
+        into one vector with `numerix.bincount` and extrema into another,
+        so that in parallel both are combined with a single `allgather`.
+        """
+        groups = []
+        sumColumns = []
+        extremaColumns = []
+        extremaSigns = []
+        normColumns = []
+
+        for column, (kind, var, kwargs) in enumerate(self._probes):
+            column += 2
+            for group in groups:
+                if group["var"] is var:
+                    break
+            else:
+                group = dict(var=var, ids=[], weights=[], squared=[], segments=[],
+                             gradIDs=[], displacements=[], gradSegments=[], extrema=[])
+                groups.append(group)
+
+            mesh = var.mesh
+            cellIDs = mesh._localNonOverlappingCellIDs
+
+            if kind == "point":
+                segment = len(sumColumns)
+                sumColumns.append(column)
+
+                globalID = mesh._getNearestCellID(kwargs["point"])[0]
+                local = cellIDs[mesh._globalOverlappingCellIDs[cellIDs] == globalID]
+                group["ids"].append(local)
+                group["weights"].append(numerix.ones(len(local)))
+                group["squared"].append(numerix.zeros(len(local), dtype=bool))
+                group["segments"].append(numerix.zeros(len(local), dtype=int) + segment)
+                if kwargs["order"] == 1:
+                    center = numerix.array(mesh.cellCenters)[..., local]
+                    group["gradIDs"].append(local)
+                    group["displacements"].append(kwargs["point"] - center)
+                    group["gradSegments"].append(numerix.zeros(len(local), dtype=int) + segment)
+                continue
+
+            where = kwargs["where"]
+            if where is not None:
+                where = numerix.array(where, dtype=bool)
+                cellIDs = cellIDs[where[cellIDs]]
+
+            if kind in ("minimum", "maximum"):
+                group["extrema"].append((len(extremaColumns), cellIDs, {"minimum": -1, "maximum": 1}[kind]))
+                extremaColumns.append(column)
+                extremaSigns.append({"minimum": -1, "maximum": 1}[kind])
+            else:
+                segment = len(sumColumns)
+                sumColumns.append(column)
+
+                weights = numerix.array(mesh.cellVolumes)[cellIDs]
+                if kind == "average":
+                    weights = weights / self._reduce(mesh.communicator, numerix.array([weights.sum()]), 1)[0][0]
+                elif kind == "norm":
+                    normColumns.append(column)
+                group["ids"].append(cellIDs)
+                group["weights"].append(weights)
+                group["squared"].append(numerix.zeros(len(cellIDs), dtype=bool) + (kind == "norm"))
+                group["segments"].append(numerix.zeros(len(cellIDs), dtype=int) + segment)
+
+        def _concatenate(arrays, shape=(0,), dtype=float):
+            if len(arrays) == 0:
+                return numerix.zeros(shape, dtype=dtype)
+            return numerix.concatenate(arrays, axis=-1)
+
+        for group in groups:
+            group["ids"] = _concatenate(group["ids"], dtype=int)
+            group["weights"] = _concatenate(group["weights"])
+            group["squared"] = _concatenate(group["squared"], dtype=bool)
+            group["segments"] = _concatenate(group["segments"], dtype=int)
+            group["gradIDs"] = _concatenate(group["gradIDs"], dtype=int)
+            group["displacements"] = _concatenate(group["displacements"],
+                                                  shape=(group["var"].mesh.dim, 0))
+            group["gradSegments"] = _concatenate(group["gradSegments"], dtype=int)
+
+        self._groups = groups
+        self._sumColumns = numerix.array(sumColumns, dtype=int)
+        self._normColumns = numerix.array(normColumns, dtype=int)
+        self._extremaColumns = numerix.array(extremaColumns, dtype=int)
+        self._extremaSigns = numerix.array(extremaSigns, dtype=float)
+        if len(self._probes) > 0:
+            self._communicator = self._probes[0][1].mesh.communicator
+        else:
+            self._communicator = None
+        self._buffer = numerix.empty((self.length, len(self.names)))
+
+    @staticmethod
+    def _reduce(communicator, sums, nSums):
+        """
+        Add the first `nSums` entries and take the largest of the rest
+        over all processors.
+        """
+        if communicator is not None and communicator.Nproc > 1:
+            gathered = numerix.array(communicator.allgather(sums))
+            return gathered[:, :nSums].sum(axis=0), gathered[:, nSums:].max(axis=0)
+        return sums[:nSums], sums[nSums:]
+
+    def record(self, time=None):
+        """
+        Evaluate every probe and store them as the next row.
+
+        :Parameters:
+          time
+            the time to record with the probes
+        """
+        if self._groups is None:
+            self._prepare()
+
+        nSums = len(self._sumColumns)
+        values = numerix.zeros(nSums + len(self._extremaColumns))
+        sums = values[:nSums]
+        extrema = values[nSums:]
+
+        for group in self._groups:
+            value = numerix.array(group["var"].value)
+
+            if len(group["ids"]) > 0:
+                contributions = value[group["ids"]]
+                contributions = numerix.where(group["squared"],
+                                              contributions**2, contributions) * group["weights"]
+                sums += numerix.bincount(group["segments"], weights=contributions, minlength=nSums)
+
+            if len(group["gradIDs"]) > 0:
+                grad = numerix.array(group["var"].grad.value)[..., group["gradIDs"]]
+                corrections = (group["displacements"] * grad).sum(axis=0)
+                sums += numerix.bincount(group["gradSegments"], weights=corrections, minlength=nSums)
+
+            for index, ids, sign in group["extrema"]:
+                if len(ids) > 0:
+                    extrema[index] = (sign * value[ids]).max()
+                else:
+                    extrema[index] = -numerix.inf
+
+        sums, extrema = self._reduce(self._communicator, values, nSums)
+
+        row = self._buffer[self._count % self.length]
+        row[0] = self._count
+        row[1] = numerix.nan if time is None else float(time)
+        row[self._sumColumns] = sums
+        row[self._normColumns] = numerix.sqrt(row[self._normColumns])
+        row[self._extremaColumns] = self._extremaSigns * extrema
+        self._count += 1
+
+        if self.filename is not None and self._count - self._flushed == self.length:
+            self.flush()
+
+    @property
+    def history(self):
+        """
+        The records in the buffer, oldest first, as an array with a field
+        for each of `names`.
+        """
+        if self._buffer is None:
+            return numerix.zeros((0,), dtype=self._dtype)
+        n = min(self._count, self.length)
+        rows = numerix.arange(self._count - n, self._count) % self.length
+        return self._buffer[rows].view(self._dtype).reshape((n,))
+
+    def __getitem__(self, name):
+        return self.history[name]
+
+    def flush(self):
+        """
+        Append the records that have not been written to `filename`.
+        """
+        if self.filename is None or self._count == self._flushed:
+            return
+
+        if self._communicator is None or self._communicator.procID == 0:
+            rows = numerix.arange(self._flushed, self._count) % self.length
+            _appendRecords(self.filename, self._buffer[rows].view(self._dtype),
+                           self._flushed, self._count)
+
+        self._flushed = self._count
+
+    def close(self):
+        """
+        Write the remaining records.
+        """
+        self.flush()
+
+def _npyHeader(dtype, rows):
+    """
+    Return a `.npy` header for `rows` records of `dtype`, with room for
+    the number of rows to grow without moving the records.
+    """
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (npyFormat.dtype_to_descr(dtype), rows)
+    magic = npyFormat.magic(1, 0)
+    length = len(header) - len(str(rows)) + 20 + 1
+    length += -(len(magic) + 2 + length) % 16
+    return magic + struct.pack("<H", length) + header.ljust(length - 1) + "\n"
+
+def _appendRecords(filename, records, start, stop):
+    """
+    Write `records` as rows `start` to `stop` of the `.npy` file
+    `filename`, which is started over when `start` is 0.
+    """
+    if start == 0:
+        f = open(filename, "wb")
+    else:
+        f = open(filename, "r+b")
+    try:
+        f.seek(0, os.SEEK_END)
+        if start == 0:
+            f.write(_npyHeader(records.dtype, stop))
+        f.write(records.astype(records.dtype.newbyteorder("<")).tostring())
+        f.seek(0)
+        f.write(_npyHeader(records.dtype, stop))
+    finally:
+        f.close()
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
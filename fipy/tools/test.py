@@ -42,6 +42,9 @@ def _suite():
             'dimensions.physicalField',
             'numerix',
             'dump',
+            'asyncWriter',
+            'checkpoint',
+            'monitor',
             'vector',
         ), base = __name__)
 
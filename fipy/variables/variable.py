@@ -35,6 +35,7 @@
 __docformat__ = 'restructuredtext'
 
 import os
+import threading
 
 from fipy.tools.dimensions import physicalField
 from fipy.tools import numerix
@@ -43,6 +44,10 @@ from fipy.tools import inline
 
 __all__ = ["Variable"]
 
+# values, keyed by `id()`, that `Variable.value` reports instead of its own
+# in the thread that set them, so output can be written from a snapshot
+_threadValues = threading.local()
+
 class Variable(object):
     """
     Lazily evaluated quantity with units.
@@ -507,6 +512,9 @@ class Variable(object):
             7
 
         """
+        snapshot = getattr(_threadValues, "values", None)
+        if snapshot is not None and id(self) in snapshot:
+            return snapshot[id(self)]
 
         if self.stale or not self._isCached() or self._value is None:
             value = self._calcValue()
@@ -17,10 +17,12 @@ except:
 from fipy.viewers.multiViewer import *
 from fipy.viewers.tsvViewer import *
 from fipy.viewers.vtkViewer import *
+from fipy.viewers.hdf5Writer import *
 
 __all__.extend(multiViewer.__all__)
 __all__.extend(tsvViewer.__all__)
 __all__.extend(vtkViewer.__all__)
+__all__.extend(hdf5Writer.__all__)
 
 # what about vector variables?
 
@@ -0,0 +1,492 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "hdf5Writer.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+import os
+from xml.sax.saxutils import quoteattr, escape
+
+from fipy.tools import numerix
+from fipy.tools.numerix import MA
+from fipy.tests.doctestPlus import register_skipper
+from fipy.viewers.viewer import AbstractViewer
+from fipy.variables.cellVariable import CellVariable
+from fipy.variables.faceVariable import FaceVariable
+
+__all__ = ["HDF5Writer"]
+
+def _checkForH5py():
+    hasH5py = True
+    try:
+        import h5py
+    except Exception:
+        hasH5py = False
+    return hasH5py
+
+register_skipper(flag="H5PY",
+                 test=_checkForH5py,
+                 why="the `h5py` package cannot be imported")
+
+# XDMF topology types, as numbered in a "Mixed" topology
+_XDMFPolyline = 2
+_XDMFPolygon = 3
+_XDMFPolyhedron = 16
+
+# number of values in a chunk, along the element axis
+_chunkSize = 2**17
+
+def _mixedTopology(mesh, cellIDs=slice(None), vertexOffset=0):
+    """
+    Return the connectivity of the cells of `mesh` as an XDMF "Mixed"
+    topology. Each cell is a polyline, a polygon, or a polyhedron listed
+    face by face. `vertexOffset` is added to every vertex ID.
+
+    >>> from fipy.meshes import Grid1D, Grid2D, Tri2D, Grid3D
+    >>> print _mixedTopology(Grid1D(nx=2))
+    [2 2 1 0 2 2 2 1]
+    >>> print _mixedTopology(Grid2D(nx=1, ny=1) + (Tri2D(nx=1, ny=1) + ((1,), (0,))))
+    [3 4 1 3 2 0 3 3 5 4 6 3 3 3 6 5 3 3 1 6 3 3 3 4 1 6]
+    >>> print _mixedTopology(Tri2D(nx=1, ny=1), cellIDs=[0, 3], vertexOffset=10)
+    [ 3  3 13 11 14  3  3 11 10 14]
+    >>> topology = _mixedTopology(Grid3D(nx=2, ny=1, nz=1), vertexOffset=100)
+    >>> print topology[:2], topology[2:7], len(topology)
+    [16  6] [  4 100 103 109 106] 64
+    """
+    if mesh.dim == 3:
+        cellFaces = mesh.cellFaceIDs[..., cellIDs]
+        missingFaces = MA.getmaskarray(cellFaces)
+        cellFaces = MA.filled(cellFaces, 0)
+        faceVertices = mesh.faceVertexIDs
+        vertexCounts = (~MA.getmaskarray(faceVertices)).sum(axis=0)
+
+        # one block of (count, vertices...) per face of each cell
+        blocks = MA.concatenate((MA.array(vertexCounts[cellFaces])[numerix.newaxis],
+                                 faceVertices[..., cellFaces]), axis=0)
+        blocksMissing = MA.getmaskarray(blocks) | missingFaces[numerix.newaxis]
+        blocksVertices = numerix.zeros(blocks.shape, dtype=bool)
+        blocksVertices[1:] = True
+
+        numberOfCells = cellFaces.shape[-1]
+        header = numerix.array([[_XDMFPolyhedron] * numberOfCells,
+                                (~missingFaces).sum(axis=0)])
+        blocksShape = (-1, numberOfCells)
+        table = numerix.concatenate((header, MA.filled(blocks, 0).swapaxes(0, 1).reshape(blocksShape)))
+        missing = numerix.concatenate((numerix.zeros(header.shape, dtype=bool),
+                                       blocksMissing.swapaxes(0, 1).reshape(blocksShape)))
+        isVertex = numerix.concatenate((numerix.zeros(header.shape, dtype=bool),
+                                        blocksVertices.swapaxes(0, 1).reshape(blocksShape)))
+    else:
+        vertices = mesh._orderedCellVertexIDs[..., cellIDs]
+        numberOfCells = vertices.shape[-1]
+        header = numerix.array([[[_XDMFPolyline, _XDMFPolygon][mesh.dim - 1]] * numberOfCells,
+                                (~MA.getmaskarray(vertices)).sum(axis=0)])
+        table = numerix.concatenate((header, MA.filled(vertices, 0)))
+        missing = numerix.concatenate((numerix.zeros(header.shape, dtype=bool),
+                                       MA.getmaskarray(vertices)))
+        isVertex = numerix.concatenate((numerix.zeros(header.shape, dtype=bool),
+                                        numerix.ones(vertices.shape, dtype=bool)))
+
+    present = ~missing.swapaxes(0, 1)
+    topology = table.swapaxes(0, 1)[present]
+    topology[isVertex.swapaxes(0, 1)[present]] += vertexOffset
+
+    return topology
+
+class HDF5Writer(AbstractViewer):
+    """
+    Writes `CellVariable` and `FaceVariable` data to an HDF5 file, with an
+    XDMF file that describes it to ParaView or VisIt.
+
+    The mesh is stored once. Each call to `plot` appends a step to a
+    chunked dataset for each variable, whose first axis is time::
+
+        /mesh/vertexCoords      (vertices, 3)
+        /mesh/topology          XDMF "Mixed" connectivity of the cells
+        /mesh/faceCenters       (faces, 3)
+        /mesh/faceTopology      each face center as an XDMF "Polyvertex"
+        /time                   (steps,)
+        /cells/<name>           (steps, cells[, 3 or 9])
+        /faces/<name>           (steps, faces[, 3 or 9])
+
+    Vectors and tensors are padded to three dimensions. The XDMF file
+    describes the mesh once and refers back to it from each step, and
+    each `plot` only appends the new step to it. In parallel, each
+    processor writes its non-overlapping cells and faces to its own slice
+    of each dataset, through MPI-IO, so nothing is gathered to one
+    processor. This needs an `h5py` built with MPI support.
+
+    The writer requires the `h5py` package.
+    """
+    def __init__(self, vars, filename, title=None, compression=None, chunks=None, limits={}, **kwlimits):
+        """
+        Creates an `HDF5Writer` and writes the mesh to `filename`.
+
+        :Parameters:
+          vars
+            a `CellVariable`, a `FaceVariable`, or a tuple of them, all on
+            the same mesh
+          filename
+            the HDF5 file to write. The XDMF file has the same name, with
+            the extension ``.xmf``.
+          title
+            stored as an attribute of the HDF5 file
+          compression
+            passed on to `h5py`, e.g., "gzip" or "lzf"
+          chunks
+            the number of elements in a chunk of each dataset
+          limits : dict
+            a (deprecated) alternative to limit keyword arguments
+          xmin, xmax, ymin, ymax, zmin, zmax, datamin, datamax
+            ignored
+        """
+        kwlimits.update(limits)
+        AbstractViewer.__init__(self, vars=vars, title=title, **kwlimits)
+
+        self.filename = filename
+        self.xdmfFilename = os.path.splitext(filename)[0] + ".xmf"
+        self.compression = compression
+        self.chunks = chunks or _chunkSize
+        self.times = []
+
+        mesh = self.mesh
+        if mesh.communicator.Nproc > 1:
+            self._cellIDs = mesh._localNonOverlappingCellIDs
+            self._faceIDs = mesh._localNonOverlappingFaceIDs
+            numberOfCells, numberOfFaces = len(self._cellIDs), len(self._faceIDs)
+        else:
+            self._cellIDs = self._faceIDs = slice(None)
+            numberOfCells, numberOfFaces = mesh.numberOfCells, mesh.numberOfFaces
+
+        self._names = {}
+        for var in self.vars:
+            name = (var.name or "%s%d" % (var.__class__.__name__, len(self._names))).replace("/", "_")
+            while name in self._names.values():
+                name += "_"
+            self._names[var] = name
+
+        vertexCoords = mesh._toVTK3D(numerix.array(mesh.vertexCoords))
+        self._vertices = self._slice(len(vertexCoords))
+        self._cells = self._slice(numberOfCells)
+        self._faces = self._slice(numberOfFaces)
+
+        # each processor writes its own vertices, so its cells refer to them
+        topology = _mixedTopology(mesh, self._cellIDs, vertexOffset=self._vertices[0]).astype("int64")
+        self._topology = self._slice(len(topology))
+
+        f = self._open("w")
+        try:
+            if title is not None:
+                f.attrs["title"] = title
+            self._writeSlice(f, "mesh/vertexCoords", vertexCoords, self._vertices)
+            self._writeSlice(f, "mesh/topology", topology, self._topology)
+            if self._faceVars:
+                faceCenters = mesh._toVTK3D(numerix.array(mesh.faceCenters)[..., self._faceIDs])
+                self._writeSlice(f, "mesh/faceCenters", faceCenters, self._faces)
+                self._writeSlice(f, "mesh/faceTopology",
+                                 numerix.arange(self._faces[0], self._faces[1], dtype="int64"),
+                                 self._faces)
+            f.create_dataset("time", shape=(0,), maxshape=(None,), dtype=float)
+            for var in self.vars:
+                self._createDataset(f, var)
+        finally:
+            f.close()
+
+        if mesh.communicator.procID == 0:
+            self._startXDMF()
+
+    @property
+    def mesh(self):
+        return self.vars[0].mesh
+
+    @property
+    def _cellVars(self):
+        return [var for var in self.vars if isinstance(var, CellVariable)]
+
+    @property
+    def _faceVars(self):
+        return [var for var in self.vars if isinstance(var, FaceVariable)]
+
+    def _getSuitableVars(self, vars):
+        vars = AbstractViewer._getSuitableVars(self, vars)
+        vars = [var for var in vars if isinstance(var, (CellVariable, FaceVariable))]
+        if len(vars) == 0:
+            raise TypeError("%s can only write CellVariable and FaceVariable objects" % self.__class__.__name__)
+        return [var for var in vars if var.mesh is vars[0].mesh]
+
+    def _slice(self, count):
+        """
+        Return the start, the stop, and the total of this processor's
+        slice of a dataset with `count` elements from each processor.
+        """
+        comm = self.mesh.communicator
+        if comm.Nproc > 1:
+            counts = comm.allgather(count)
+            start = sum(counts[:comm.procID])
+            return start, start + count, sum(counts)
+        else:
+            return 0, count, count
+
+    def _open(self, mode):
+        import h5py
+
+        comm = self.mesh.communicator
+        if comm.Nproc > 1:
+            return h5py.File(self.filename, mode, driver="mpio", comm=comm.mpi4py_comm)
+        else:
+            return h5py.File(self.filename, mode)
+
+    def _writeSlice(self, f, name, value, (start, stop, total)):
+        dataset = f.create_dataset(name, shape=(total,) + value.shape[1:], dtype=value.dtype)
+        if stop > start:
+            dataset[start:stop] = value
+
+    def _path(self, var):
+        return "%s/%s" % (["faces", "cells"][isinstance(var, CellVariable)], self._names[var])
+
+    def _shape(self, var):
+        total = [self._faces, self._cells][isinstance(var, CellVariable)][2]
+        return (total,) + ((), (3,), (9,))[var.rank]
+
+    def _createDataset(self, f, var):
+        shape = self._shape(var)
+        chunks = (1, max(1, min(shape[0], self.chunks // numerix.prod(shape[1:])))) + shape[1:]
+        f.create_dataset(self._path(var), shape=(0,) + shape, maxshape=(None,) + shape,
+                         chunks=chunks, dtype=numerix.asarray(var.numericValue).dtype,
+                         compression=self.compression)
+
+    def _value(self, var):
+        IDs = [self._faceIDs, self._cellIDs][isinstance(var, CellVariable)]
+        value = numerix.asarray(var.numericValue)[..., IDs]
+        if var.rank > 0:
+            padded = numerix.zeros((3,) * var.rank + value.shape[var.rank:], dtype=value.dtype)
+            padded[tuple([slice(0, n) for n in value.shape[:var.rank]])] = value
+            value = padded.reshape((3**var.rank, -1)).swapaxes(0, 1)
+        return value
+
+    def plot(self, time=None):
+        """
+        Append the current values of the variables to the HDF5 file and
+        update the XDMF file.
+
+        :Parameters:
+          time
+            the time of this step. Defaults to the number of the step.
+        """
+        if time is None:
+            time = len(self.times)
+        step = len(self.times)
+
+        f = self._open("a")
+        try:
+            f["time"].resize((step + 1,))
+            f["time"][step] = time
+            for var in self.vars:
+                dataset = f[self._path(var)]
+                dataset.resize(step + 1, axis=0)
+                start, stop, total = [self._faces, self._cells][isinstance(var, CellVariable)]
+                if stop > start:
+                    dataset[step, start:stop] = self._value(var)
+        finally:
+            f.close()
+
+        self.times.append(float(time))
+
+        if self.mesh.communicator.procID == 0:
+            self._appendXDMF(step, float(time))
+
+    def _dataItem(self, path, shape, dtype, indent):
+        return ('%s<DataItem Dimensions="%s" NumberType="%s" Precision="%d" Format="HDF">%s:/%s</DataItem>'
+                % (indent, " ".join([str(n) for n in shape]),
+                   {"f": "Float", "i": "Int", "u": "UInt", "b": "UChar"}[dtype.kind],
+                   dtype.itemsize, escape(os.path.basename(self.filename)), path))
+
+    def _attribute(self, var, step, center, indent):
+        shape = self._shape(var)
+        dtype = numerix.asarray(var.numericValue).dtype
+        rank = len(shape)
+        lines = ['%s<Attribute Name=%s AttributeType="%s" Center="%s">'
+                 % (indent, quoteattr(self._names[var]), ["Scalar", "Vector", "Tensor"][min(var.rank, 2)], center),
+                 '%s  <DataItem ItemType="HyperSlab" Dimensions="%s" Type="HyperSlab">'
+                 % (indent, " ".join([str(n) for n in shape])),
+                 '%s    <DataItem Dimensions="3 %d" Format="XML">%s %s %s</DataItem>'
+                 % (indent, rank + 1,
+                    " ".join([str(step)] + ["0"] * rank),
+                    " ".join(["1"] * (rank + 1)),
+                    " ".join(["1"] + [str(n) for n in shape])),
+                 # the dataset only had `step + 1` steps when this one was
+                 # written, so that what was written never changes
+                 self._dataItem(self._path(var), (step + 1,) + shape, dtype, indent + "    "),
+                 '%s  </DataItem>' % indent,
+                 '%s</Attribute>' % indent]
+        return lines
+
+    def _grid(self, name, vars, center, step):
+        return (['        <Grid Name=%s GridType="Uniform">' % quoteattr(name),
+                 '          <Topology Reference="XML">/Xdmf/Domain/Topology[@Name="%s"]</Topology>' % name,
+                 '          <Geometry Reference="XML">/Xdmf/Domain/Geometry[@Name="%s"]</Geometry>' % name]
+                + sum([self._attribute(var, step, center, "          ") for var in vars], [])
+                + ['        </Grid>'])
+
+    _xdmfTail = '\n'.join(['    </Grid>',
+                           '  </Domain>',
+                           '</Xdmf>',
+                           ''])
+
+    def _startXDMF(self):
+        """
+        Write the mesh and an empty time series to the XDMF file.
+        """
+        integer = numerix.dtype("int64")
+        float = numerix.dtype("float64")
+
+        lines = ['<?xml version="1.0"?>',
+                 '<Xdmf Version="2.0">',
+                 '  <Domain>']
+
+        if self._cellVars:
+            lines += ['    <Topology Name="cells" TopologyType="Mixed" NumberOfElements="%d">' % self._cells[2],
+                      self._dataItem("mesh/topology", (self._topology[2],), integer, "      "),
+                      '    </Topology>',
+                      '    <Geometry Name="cells" GeometryType="XYZ">',
+                      self._dataItem("mesh/vertexCoords", (self._vertices[2], 3), float, "      "),
+                      '    </Geometry>']
+
+        if self._faceVars:
+            lines += ['    <Topology Name="faces" TopologyType="Polyvertex" NumberOfElements="%d" NodesPerElement="1">'
+                      % self._faces[2],
+                      self._dataItem("mesh/faceTopology", (self._faces[2],), integer, "      "),
+                      '    </Topology>',
+                      '    <Geometry Name="faces" GeometryType="XYZ">',
+                      self._dataItem("mesh/faceCenters", (self._faces[2], 3), float, "      "),
+                      '    </Geometry>']
+
+        lines += ['    <Grid Name="steps" GridType="Collection" CollectionType="Temporal">',
+                  '']
+        head = "\n".join(lines)
+
+        f = open(self.xdmfFilename, 'w')
+        try:
+            f.write(head + self._xdmfTail)
+        finally:
+            f.close()
+
+        self._xdmfLength = len(head)
+
+    def _appendXDMF(self, step, time):
+        """
+        Insert the grids of `step` before the closing tags of the XDMF
+        file, without rewriting the earlier steps.
+        """
+        lines = ['      <Grid Name="step %d" GridType="Collection" CollectionType="Spatial">' % step,
+                 '        <Time Value="%r"/>' % time]
+        if self._cellVars:
+            lines += self._grid("cells", self._cellVars, "Cell", step)
+        if self._faceVars:
+            lines += self._grid("faces", self._faceVars, "Node", step)
+        lines += ['      </Grid>',
+                  '']
+        grids = "\n".join(lines)
+
+        f = open(self.xdmfFilename, 'r+')
+        try:
+            f.seek(self._xdmfLength)
+            f.write(grids + self._xdmfTail)
+            f.truncate()
+        finally:
+            f.close()
+
+        self._xdmfLength += len(grids)
+
+    def _test(self):
+        """
+        >>> import os
+        >>> import shutil
+        >>> from tempfile import mkdtemp
+        >>> dname = mkdtemp()
+        >>> fname = os.path.join(dname, "out.h5")
+
+        >>> from fipy import *
+        >>> m = Grid2D(nx=3, ny=2) + Tri2D(nx=1, ny=1)
+        >>> x, y = m.cellCenters
+        >>> phi = CellVariable(mesh=m, value=x * y, name="phi")
+        >>> phiFace = phi.faceValue
+        >>> phiFace.name = "phi_face"
+        >>> writer = HDF5Writer(vars=(phi, phi.grad, phiFace),
+        ...                     filename=fname, compression="gzip") # doctest: +H5PY
+        >>> for t in range(3):
+        ...     phi.value = x * y * t
+        ...     writer.plot(time=t / 2.) # doctest: +H5PY
+
+        >>> import h5py # doctest: +H5PY
+        >>> f = h5py.File(fname, "r") # doctest: +H5PY
+        >>> print f["time"][:] # doctest: +H5PY, +SERIAL
+        [ 0.   0.5  1. ]
+        >>> f["cells/phi"].shape, f["cells/phi"].chunks[0] # doctest: +H5PY, +SERIAL
+        ((3, 10), 1)
+        >>> numerix.allclose(f["cells/phi"][2], phi.value) # doctest: +H5PY, +SERIAL
+        True
+        >>> grad = f["cells/phi_gauss_grad"] # doctest: +H5PY
+        >>> grad.shape # doctest: +H5PY, +SERIAL
+        (3, 10, 3)
+        >>> numerix.allclose(grad[2, :, :2], phi.grad.value.swapaxes(0, 1)) # doctest: +H5PY, +SERIAL
+        True
+        >>> numerix.allclose(f["faces/phi_face"][1] * 2, phiFace.value) # doctest: +H5PY, +SERIAL
+        True
+        >>> numerix.allclose(f["mesh/vertexCoords"][:, :2],
+        ...                  m.vertexCoords.swapaxes(0, 1)) # doctest: +H5PY, +SERIAL
+        True
+        >>> print (f["mesh/topology"][:] == _mixedTopology(m)).all() # doctest: +H5PY, +SERIAL
+        True
+        >>> f.close() # doctest: +H5PY
+
+        >>> xdmf = open(os.path.join(dname, "out.xmf")).read() # doctest: +H5PY
+        >>> print xdmf.count('<Time Value='), xdmf.count('<Attribute ') # doctest: +H5PY
+        3 9
+        >>> print xdmf.count('mesh/topology'), xdmf.count('<Topology Reference=') # doctest: +H5PY
+        1 6
+        >>> print [line.strip() for line in xdmf.splitlines()
+        ...        if "cells/phi<" in line][-1] # doctest: +H5PY, +SERIAL
+        <DataItem Dimensions="3 10" NumberType="Float" Precision="8" Format="HDF">out.h5:/cells/phi</DataItem>
+
+        >>> shutil.rmtree(dname)
+        """
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -50,7 +50,7 @@ class Matplotlib1DViewer(AbstractMatplotlibViewer):
 
     __doc__ += AbstractMatplotlibViewer._test1D(viewer="Matplotlib1DViewer")
 
-    def __init__(self, vars, title=None, xlog=False, ylog=False, limits={}, legend='upper left', axes=None, **kwlimits):
+    def __init__(self, vars, title=None, xlog=False, ylog=False, limits={}, legend='upper left', axes=None, fps=None, **kwlimits):
         """
 
         :Parameters:
@@ -72,9 +72,11 @@ class Matplotlib1DViewer(AbstractMatplotlibViewer):
             place a legend at the specified position, if not `None`
           axes
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
+          fps
+            if not `None`, the most frames per second to draw
         """
         kwlimits.update(limits)
-        AbstractMatplotlibViewer.__init__(self, vars=vars, title=title, axes=axes, **kwlimits)
+        AbstractMatplotlibViewer.__init__(self, vars=vars, title=title, axes=axes, fps=fps, **kwlimits)
 
         import pylab
 
@@ -140,9 +142,10 @@ class Matplotlib1DViewer(AbstractMatplotlibViewer):
 
         self.axes.set_ylim(ymin=ymin, ymax=ymax)
 
-        for line, datum in zip(self.lines, self._data):
-            line[0].set_xdata(datum[0])
-            line[0].set_ydata(datum[1])
+        # the cell centers were set when the lines were created
+        from fipy.tools.numerix import array
+        for line, var in zip(self.lines, self.vars):
+            line[0].set_ydata(array(var))
 
 if __name__ == "__main__":
     import fipy.tests.doctestPlus
@@ -50,10 +50,10 @@ class Matplotlib2DContourViewer(AbstractMatplotlib2DViewer):
     .. _Matplotlib: http://matplotlib.sourceforge.net/
     """
 
-    __doc__ += Matplotlib2DContourViewer._test2D(viewer="Matplotlib2DContourViewer")
+    __doc__ += AbstractMatplotlib2DViewer._test2D(viewer="Matplotlib2DContourViewer")
 
 
-    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, number=10, levels=None, figaspect='auto', **kwlimits):
+    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, number=10, levels=None, figaspect='auto', fps=None, **kwlimits):
         """Creates a `Matplotlib2DContourViewer`.
 
         :Parameters:
@@ -72,6 +72,8 @@ class Matplotlib2DContourViewer(AbstractMatplotlib2DViewer):
             plot a colorbar in specified orientation if not `None`
           axes
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
+          fps
+            if not `None`, the most frames per second to draw
           number
             contour `number` automatically-chosen levels
           *levels* [level0, level1, ..., leveln]
@@ -88,17 +90,20 @@ class Matplotlib2DContourViewer(AbstractMatplotlib2DViewer):
         AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title,
                                             cmap=cmap, colorbar=colorbar, axes=axes,
                                             figaspect=figaspect,
-                                            **kwlimits)
+                                            fps=fps, **kwlimits)
         self.number = number
         self.levels = levels
 
+        from matplotlib.tri import Triangulation
+        x, y = numerix.array(self.vars[0].mesh.cellCenters)
+        self._triangulation = Triangulation(x, y)
+
         self._plot()
 
     def _getSuitableVars(self, vars):
-        from fipy.meshes.mesh2D import Mesh2D
         from fipy.variables.cellVariable import CellVariable
         vars = [var for var in AbstractMatplotlib2DViewer._getSuitableVars(self, vars) \
-          if ((isinstance(var.mesh, Mesh2D) and isinstance(var, CellVariable))
+          if ((var.mesh.dim == 2 and isinstance(var, CellVariable))
               and var.rank == 0)]
         if len(vars) == 0:
             from fipy.viewers import MeshDimensionError
@@ -114,19 +119,7 @@ class Matplotlib2DContourViewer(AbstractMatplotlib2DViewer):
 ##         import gc
 ##         gc.collect()
 
-        mesh = self.vars[0].mesh
-        x, y = mesh.cellCenters
-        z = self.vars[0].value
-
-        xmin, ymin = mesh.extents['min']
-        xmax, ymax = mesh.extents['max']
-
-        from matplotlib.mlab import griddata
-
-        xi = numerix.linspace(xmin, xmax, 1000)
-        yi = numerix.linspace(ymin, ymax, 1000)
-        # grid the data.
-        zi = griddata(x, y, z, xi, yi, interp='linear')
+        z = numerix.array(self.vars[0].value)
 
         if hasattr(self, "_contourSet"):
             for collection in self._contourSet.collections:
@@ -151,13 +144,19 @@ class Matplotlib2DContourViewer(AbstractMatplotlib2DViewer):
             levels = numerix.arange(self.number + 1) * (zmax - zmin) / self.number + zmin
 
 
-        self._contourSet = self.axes.contour(xi, yi, zi, levels=levels, cmap=self.cmap)
+        # contour the linear interpolation on the triangulation of the cell
+        # centers, which is only built once
+        self._contourSet = self.axes.tricontour(self._triangulation, z, levels=levels, cmap=self.cmap)
+
+        mesh = self.vars[0].mesh
+        xmin, ymin = mesh.extents['min']
+        xmax, ymax = mesh.extents['max']
 
-        self.axes.set_xlim(xmin=self._getLimit('xmin'),
-                           xmax=self._getLimit('xmax'))
+        self.axes.set_xlim(xmin=self._getLimit('xmin', default=xmin),
+                           xmax=self._getLimit('xmax', default=xmax))
 
-        self.axes.set_ylim(ymin=self._getLimit('ymin'),
-                           ymax=self._getLimit('ymax'))
+        self.axes.set_ylim(ymin=self._getLimit('ymin', default=ymin),
+                           ymax=self._getLimit('ymax', default=ymax))
 
         if self.colorbar is not None:
             self.colorbar.plot()
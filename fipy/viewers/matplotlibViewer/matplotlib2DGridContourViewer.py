@@ -53,7 +53,7 @@ class Matplotlib2DGridContourViewer(AbstractMatplotlib2DViewer):
     __doc__ += AbstractMatplotlib2DViewer._test2D(viewer="Matplotlib2DGridContourViewer")
 
 
-    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, figaspect='auto', **kwlimits):
+    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, figaspect='auto', fps=None, **kwlimits):
         """Creates a `Matplotlib2DViewer`.
 
         :Parameters:
@@ -72,6 +72,8 @@ class Matplotlib2DGridContourViewer(AbstractMatplotlib2DViewer):
             plot a colorbar in specified orientation if not `None`
           axes
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
+          fps
+            if not `None`, the most frames per second to draw
           figaspect
             desired aspect ratio of figure. If arg is a number, use that aspect
             ratio. If arg is 'auto', the aspect ratio will be determined from
@@ -80,7 +82,12 @@ class Matplotlib2DGridContourViewer(AbstractMatplotlib2DViewer):
         kwlimits.update(limits)
         AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title,
                                             cmap=cmap, colorbar=colorbar, axes=axes, figaspect=figaspect,
-                                            **kwlimits)
+                                            fps=fps, **kwlimits)
+
+        mesh = self.vars[0].mesh
+        self._X, self._Y = [v.reshape(mesh.shape, order="FORTRAN")
+                            for v in numerix.array(mesh.cellCenters)]
+        self._contourSet = None
 
         self._plot()
 
@@ -106,11 +113,7 @@ class Matplotlib2DGridContourViewer(AbstractMatplotlib2DViewer):
 ##         import gc
 ##         gc.collect()
 
-        mesh = self.vars[0].mesh
-        shape = mesh.shape
-        X, Y = mesh.cellCenters
-        Z = self.vars[0].value
-        X, Y, Z = [v.reshape(shape, order="FORTRAN") for v in (X, Y, Z)]
+        Z = self.vars[0].value.reshape(self.vars[0].mesh.shape, order="FORTRAN")
 
         zmin, zmax = self._autoscale(vars=self.vars,
                                      datamin=self._getLimit(('datamin', 'zmin')),
@@ -128,7 +131,17 @@ class Matplotlib2DGridContourViewer(AbstractMatplotlib2DViewer):
         else:
             V = numerix.arange(numberOfContours + 1) * diff / numberOfContours + zmin
 
-        self.axes.contourf(X, Y, Z, V, cmap=self.cmap)
+        if self._contourSet is not None:
+            for collection in self._contourSet.collections:
+                try:
+                    ix = self.axes.collections.index(collection)
+                except ValueError, e:
+                    ix = None
+
+                if ix is not None:
+                    del self.axes.collections[ix]
+
+        self._contourSet = self.axes.contourf(self._X, self._Y, Z, V, cmap=self.cmap)
 
         self.axes.set_xlim(xmin=self._getLimit('xmin'),
                            xmax=self._getLimit('xmax'))
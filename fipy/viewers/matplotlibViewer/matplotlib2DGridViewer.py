@@ -49,7 +49,7 @@ class Matplotlib2DGridViewer(AbstractMatplotlib2DViewer):
 
     __doc__ += AbstractMatplotlib2DViewer._test2D(viewer="Matplotlib2DGridViewer")
 
-    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, figaspect='auto', **kwlimits):
+    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, figaspect='auto', fps=None, **kwlimits):
         """
         Creates a `Matplotlib2DGridViewer`.
 
@@ -69,6 +69,8 @@ class Matplotlib2DGridViewer(AbstractMatplotlib2DViewer):
             plot a colorbar in specified orientation if not `None`
           axes
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
+          fps
+            if not `None`, the most frames per second to draw
           figaspect
             desired aspect ratio of figure. If arg is a number, use that aspect
             ratio. If arg is 'auto', the aspect ratio will be determined from
@@ -77,7 +79,7 @@ class Matplotlib2DGridViewer(AbstractMatplotlib2DViewer):
         kwlimits.update(limits)
         AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title,
                                             cmap=cmap, colorbar=colorbar, axes=axes, figaspect=figaspect,
-                                            **kwlimits)
+                                            fps=fps, **kwlimits)
 
         xmin, ymin = self.vars[0].mesh.extents['min']
         xmax, ymax = self.vars[0].mesh.extents['max']
@@ -59,7 +59,7 @@ class Matplotlib2DViewer(AbstractMatplotlib2DViewer):
 
     __doc__ += AbstractMatplotlib2DViewer._test2Dirregular(viewer="Matplotlib2DViewer")
 
-    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, figaspect='auto', **kwlimits):
+    def __init__(self, vars, title=None, limits={}, cmap=None, colorbar='vertical', axes=None, figaspect='auto', fps=None, **kwlimits):
         """Creates a `Matplotlib2DViewer`.
 
 
@@ -79,6 +79,8 @@ class Matplotlib2DViewer(AbstractMatplotlib2DViewer):
             plot a colorbar in specified orientation if not `None`
           axes
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
+          fps
+            if not `None`, the most frames per second to draw
           figaspect
             desired aspect ratio of figure. If arg is a number, use that aspect
             ratio. If arg is 'auto', the aspect ratio will be determined from
@@ -87,7 +89,7 @@ class Matplotlib2DViewer(AbstractMatplotlib2DViewer):
         kwlimits.update(limits)
         AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title, figaspect=figaspect,
                                             cmap=cmap, colorbar=colorbar, axes=axes,
-                                            **kwlimits)
+                                            fps=fps, **kwlimits)
 
         self.mesh = self.vars[0].mesh
 
@@ -98,18 +100,10 @@ class Matplotlib2DViewer(AbstractMatplotlib2DViewer):
         xCoords = numerix.take(vertexCoords[0], vertexIDs)
         yCoords = numerix.take(vertexCoords[1], vertexIDs)
 
-        polys = []
-
-        for x, y in zip(xCoords.swapaxes(0,1), yCoords.swapaxes(0,1)):
-            if hasattr(x, 'mask'):
-                x = x.compressed()
-            if hasattr(y, 'mask'):
-                y = y.compressed()
-            polys.append(zip(x,y))
-
         from matplotlib.collections import PolyCollection
-        self.collection = PolyCollection(polys)
+        self.collection = PolyCollection(self._polygons(xCoords, yCoords))
         self.collection.set_linewidth(0.5)
+        self.collection.set_edgecolor('face')
         try:
             self.axes.add_patch(self.collection)
         except:
@@ -126,6 +120,44 @@ class Matplotlib2DViewer(AbstractMatplotlib2DViewer):
 
         self._plot()
 
+    @staticmethod
+    def _polygons(xCoords, yCoords):
+        """
+        Return the vertices of each cell as a `(cells, vertices, 2)` array,
+        or as a list of `(vertices, 2)` arrays when the cells do not all
+        have the same number of vertices.
+
+            >>> from fipy import Grid2D, Tri2D
+            >>> mesh = Grid2D(nx=2, ny=1) + ((0,), (1,)) + Tri2D(nx=1, ny=1)
+            >>> vertexIDs = mesh._orderedCellVertexIDs
+            >>> polys = Matplotlib2DViewer._polygons(numerix.take(mesh.vertexCoords[0], vertexIDs),
+            ...                                      numerix.take(mesh.vertexCoords[1], vertexIDs))
+            >>> print [poly.shape for poly in polys]
+            [(4, 2), (4, 2), (3, 2), (3, 2), (3, 2), (3, 2)]
+            >>> print polys[0]
+            [[ 1.  1.]
+             [ 1.  2.]
+             [ 0.  2.]
+             [ 0.  1.]]
+            >>> print polys[2]
+            [[ 1.   1. ]
+             [ 1.   0. ]
+             [ 0.5  0.5]]
+        """
+        mask = numerix.ma.getmaskarray(xCoords).swapaxes(0, 1)
+        xy = numerix.array([numerix.ma.filled(xCoords, 0),
+                            numerix.ma.filled(yCoords, 0)]).transpose((2, 1, 0))
+
+        if not mask.any():
+            return xy
+
+        # move the vertices of each cell ahead of its masked entries
+        cells = numerix.arange(len(mask))[..., numerix.newaxis]
+        xy = xy[cells, numerix.argsort(mask, axis=1, kind='mergesort')]
+        counts = (~mask).sum(axis=1)
+
+        return [poly[:count] for poly, count in zip(xy, counts)]
+
     def _getSuitableVars(self, vars):
         from fipy.meshes.mesh2D import Mesh2D
         from fipy.variables.cellVariable import CellVariable
@@ -146,15 +178,16 @@ class Matplotlib2DViewer(AbstractMatplotlib2DViewer):
 ##         import gc
 ##         gc.collect()
 
-        Z = self.vars[0].value
+        Z = numerix.array(self.vars[0].value)
 
         self.norm.vmin = self._getLimit(('datamin', 'zmin'))
         self.norm.vmax = self._getLimit(('datamax', 'zmax'))
+        self.norm.autoscale_None(Z)
 
-        rgba = self.cmap(self.norm(Z))
-
-        self.collection.set_facecolors(rgba)
-        self.collection.set_edgecolors(rgba)
+        # the polygons are unchanged; only their colors are updated
+        self.collection.set_norm(self.norm)
+        self.collection.set_cmap(self.cmap)
+        self.collection.set_array(Z)
 
         if self.colorbar is not None:
             self.colorbar.plot() #vmin=zmin, vmax=zmax)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "matplotlibFrameRenderer.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+import collections
+import os
+
+from fipy.tests.doctestPlus import register_skipper
+from fipy.tools import numerix
+
+__all__ = ["MatplotlibFrameRenderer"]
+
+def _checkForFFmpeg():
+    from distutils.spawn import find_executable
+    return find_executable("ffmpeg") is not None
+
+register_skipper(flag="FFMPEG",
+                 test=_checkForFFmpeg,
+                 why="the `ffmpeg` program cannot be found")
+
+class MatplotlibFrameRenderer(object):
+    """
+    Render frames of a Matplotlib viewer to PNG files in a pool of
+    processes, so that drawing them does not hold up the solution.
+
+    Each worker process creates its own viewer of copies of `vars`, with
+    the Agg backend, to draw its first frame. `capture` only copies the
+    values of `vars` and queues them to be drawn by the next free worker.
+    At most `maxPending` frames wait to be drawn; further calls to
+    `capture` wait for the oldest of them.
+
+    Give the viewer `datamin` and `datamax`, or the color scale of each
+    frame will be fit to its own data.
+
+        >>> import os
+        >>> import shutil
+        >>> from tempfile import mkdtemp
+        >>> dname = mkdtemp()
+
+        >>> from fipy import CellVariable, Grid2D
+        >>> from fipy.viewers.matplotlibViewer import Matplotlib2DGridViewer
+        >>> mesh = Grid2D(nx=20, ny=10)
+        >>> x, y = mesh.cellCenters
+        >>> var = CellVariable(mesh=mesh, name="var", value=0.)
+
+        >>> renderer = MatplotlibFrameRenderer(vars=var, directory=dname, processes=2,
+        ...                                    viewer=Matplotlib2DGridViewer,
+        ...                                    datamin=0., datamax=3.)
+        >>> for step in range(4):
+        ...     var.value = step * x / 20.
+        ...     print os.path.basename(renderer.capture(title="step %d" % step))
+        frame00000.png
+        frame00001.png
+        frame00002.png
+        frame00003.png
+        >>> renderer.close()
+
+        >>> for frame in renderer.frames:
+        ...     print open(frame, "rb").read(4) == "\\x89PNG"
+        True
+        True
+        True
+        True
+
+        The frames can be joined into a movie with `ffmpeg`
+
+        >>> renderer.assemble(os.path.join(dname, "movie.mp4"), fps=2) # doctest: +FFMPEG
+        >>> os.path.exists(os.path.join(dname, "movie.mp4")) # doctest: +FFMPEG
+        True
+
+        Errors in the workers are raised by `capture`, `wait` or `close`
+
+        >>> renderer = MatplotlibFrameRenderer(vars=var, directory=os.path.join(dname, "missing"),
+        ...                                    processes=1)
+        >>> frame = renderer.capture()
+        >>> renderer.close() # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+            ...
+        IOError: [Errno 2] No such file or directory: '...frame00000.png'
+        >>> renderer.capture()
+        Traceback (most recent call last):
+            ...
+        RuntimeError: the MatplotlibFrameRenderer is closed
+
+        >>> shutil.rmtree(dname)
+    """
+    def __init__(self, vars, directory, viewer=None, prefix="frame", processes=None, maxPending=None, **kwargs):
+        """
+        :Parameters:
+          vars
+            a `CellVariable` or `FaceVariable`, or a tuple of them, to plot
+          directory
+            where to write the frames
+          viewer
+            the Matplotlib viewer class, or a function that returns a
+            viewer, to draw the frames with. Defaults to `MatplotlibViewer`.
+          prefix
+            the start of the name of each frame, which is followed by
+            its number
+          processes
+            the number of worker processes. Defaults to the number of
+            CPUs.
+          maxPending
+            the most frames to hold in memory until they are drawn.
+            Defaults to twice the number of processes.
+          kwargs
+            the other arguments of the viewer, such as `datamin` and
+            `datamax`
+        """
+        import multiprocessing
+        from fipy.tools.asyncWriter import _copy
+
+        if type(vars) not in [type([]), type(())]:
+            vars = [vars]
+        self.vars = list(vars)
+        self.directory = directory
+        self.prefix = prefix
+
+        if viewer is None:
+            from fipy.viewers.matplotlibViewer import MatplotlibViewer
+            viewer = MatplotlibViewer
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if maxPending is None:
+            maxPending = 2 * processes
+        self.maxPending = maxPending
+
+        self.frames = []
+        self._pending = collections.deque()
+        self._pool = multiprocessing.Pool(processes,
+                                          initializer=_initializeWorker,
+                                          initargs=(viewer, [_copy(var) for var in self.vars], kwargs))
+
+    def capture(self, title=None):
+        """
+        Copy the values of `vars` and queue them to be drawn as the next
+        frame.
+
+        :Parameters:
+          title
+            if not `None`, the title of this frame
+
+        :Returns:
+          the name of the frame's file
+        """
+        if self._pool is None:
+            raise RuntimeError("the %s is closed" % self.__class__.__name__)
+
+        while len(self._pending) >= self.maxPending:
+            self._pending.popleft().get()
+
+        filename = os.path.join(self.directory, "%s%05d.png" % (self.prefix, len(self.frames)))
+        values = [numerix.array(var.value) for var in self.vars]
+        self._pending.append(self._pool.apply_async(_renderFrame, (values, filename, title)))
+        self.frames.append(filename)
+
+        return filename
+
+    def wait(self):
+        """
+        Wait for all of the captured frames to be drawn.
+        """
+        while len(self._pending) > 0:
+            self._pending.popleft().get()
+
+    def close(self):
+        """
+        Wait for all of the captured frames to be drawn and stop the
+        worker processes.
+        """
+        if self._pool is None:
+            return
+
+        try:
+            self.wait()
+        finally:
+            self._pending.clear()
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def assemble(self, filename, fps=10, options=("-pix_fmt", "yuv420p")):
+        """
+        Close the renderer and join its frames into the movie `filename`
+        with the `ffmpeg` program.
+
+        :Parameters:
+          filename
+            the movie to write; its extension chooses the format
+          fps
+            the frames per second of the movie
+          options
+            more arguments for `ffmpeg`, before `filename`
+        """
+        import subprocess
+
+        self.close()
+
+        subprocess.check_call(["ffmpeg", "-y", "-loglevel", "error",
+                               "-framerate", str(fps),
+                               "-i", os.path.join(self.directory, self.prefix + "%05d.png")]
+                              + list(options) + [filename])
+
+_worker = {}
+
+def _initializeWorker(viewer, vars, kwargs):
+    import matplotlib.pyplot
+    matplotlib.pyplot.switch_backend("Agg")
+
+    _worker["vars"] = vars
+    _worker["viewer"] = None
+    _worker["arguments"] = (viewer, kwargs)
+
+def _renderFrame(values, filename, title):
+    for var, value in zip(_worker["vars"], values):
+        var.value = value
+
+    # the viewer is created here, rather than by `_initializeWorker`, so
+    # that its errors are returned to `capture` instead of killing the worker
+    if _worker["viewer"] is None:
+        viewer, kwargs = _worker["arguments"]
+        _worker["viewer"] = viewer(vars=_worker["vars"], **kwargs)
+
+    viewer = _worker["viewer"]
+    if title is not None:
+        viewer.axes.set_title(title)
+    viewer.plot(filename=filename)
+
+    return filename
+
+if __name__ == "__main__":
+    import fipy.tests.doctestPlus
+    fipy.tests.doctestPlus.execButNoTest()
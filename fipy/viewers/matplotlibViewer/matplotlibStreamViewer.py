@@ -66,7 +66,7 @@ class MatplotlibStreamViewer(AbstractMatplotlib2DViewer):
     def __init__(self, vars, title=None, log=False, limits={}, axes=None, figaspect='auto',
                  density=1, linewidth=None, color=None, cmap=None, norm=None, arrowsize=1,
                  arrowstyle='-|>', minlength=0.1,
-                 **kwlimits):
+                 fps=None, **kwlimits):
         """Creates a `MatplotlibStreamViewer`.
 
         :Parameters:
@@ -83,6 +83,8 @@ class MatplotlibStreamViewer(AbstractMatplotlib2DViewer):
             a (default) value of `None` will autoscale.
           axes
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
+          fps
+            if not `None`, the most frames per second to draw
           figaspect
             desired aspect ratio of figure. If arg is a number, use that aspect
             ratio. If arg is 'auto', the aspect ratio will be determined from
@@ -114,7 +116,7 @@ class MatplotlibStreamViewer(AbstractMatplotlib2DViewer):
 
         """
         kwlimits.update(limits)
-        AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title, axes=axes, figaspect=figaspect, **kwlimits)
+        AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title, axes=axes, figaspect=figaspect, fps=fps, **kwlimits)
 
         self.log = log
         self.kwargs = dict(density=density, cmap=cmap, norm=norm, arrowsize=arrowsize,
@@ -124,6 +126,26 @@ class MatplotlibStreamViewer(AbstractMatplotlib2DViewer):
 
         self._stream = None
 
+        var = self.vars[0]
+        mesh = var.mesh
+
+        xmin, ymin = mesh.extents['min']
+        xmax, ymax = mesh.extents['max']
+
+        N = 100
+        self._X = numerix.linspace(xmin, xmax, N)
+        self._Y = numerix.linspace(ymin, ymax, N)
+
+        self._grid = tuple(numerix.mgrid[xmin:xmax:N*1j, ymin:ymax:N*1j])
+
+        if isinstance(var, FaceVariable):
+            C = mesh.faceCenters
+        elif isinstance(var, CellVariable):
+            C = mesh.cellCenters
+
+        from scipy.spatial import Delaunay
+        self._triangulation = Delaunay(C.value.T)
+
         self._plot()
 
     def _getSuitableVars(self, vars):
@@ -142,39 +164,34 @@ class MatplotlibStreamViewer(AbstractMatplotlib2DViewer):
         return [vars[0]]
 
     def _plot(self):
-        from scipy.interpolate import griddata
+        from scipy.interpolate import CloughTocher2DInterpolator
 
         var = self.vars[0]
-        mesh = var.mesh
 
-        xmin, ymin = mesh.extents['min']
-        xmax, ymax = mesh.extents['max']
+        fields = [var.value[0], var.value[1]]
 
-        N = 100
-        X = numerix.linspace(xmin, xmax, N)
-        Y = numerix.linspace(ymin, ymax, N)
+        lw = self.linewidth
+        if isinstance(lw, (FaceVariable, CellVariable)):
+            fields.append(lw.value)
 
-        grid_x, grid_y = numerix.mgrid[xmin:xmax:N*1j, ymin:ymax:N*1j]
+        color = self.color
+        if isinstance(color, (FaceVariable, CellVariable)):
+            fields.append(color.value)
 
-        if isinstance(var, FaceVariable):
-            C = mesh.faceCenters
-        elif isinstance(var, CellVariable):
-            C = mesh.cellCenters
+        # interpolate all the fields at once, on the triangulation that was
+        # built when the viewer was created
+        interpolator = CloughTocher2DInterpolator(self._triangulation, numerix.array(fields).T)
+        gridded = interpolator(self._grid)
 
-        U = griddata(C.value.T, var.value[0],
-                     (grid_x, grid_y), method='cubic')
-        V = griddata(C.value.T, var.value[1],
-                     (grid_x, grid_y), method='cubic')
+        U = gridded[..., 0]
+        V = gridded[..., 1]
 
-        lw = self.linewidth
         if isinstance(lw, (FaceVariable, CellVariable)):
-            lw = griddata(C.value.T, lw.value,
-                          (grid_x, grid_y), method='cubic')
+            lw = gridded[..., 2]
 
-        color = self.color
         if isinstance(color, (FaceVariable, CellVariable)):
-            color = griddata(C.value.T, color.value,
-                             (grid_x, grid_y), method='cubic', fill_value=color.min())
+            color = gridded[..., -1]
+            color = numerix.where(numerix.isnan(color), float(self.color.min()), color)
 
         U = U.T
         V = V.T
@@ -201,7 +218,7 @@ class MatplotlibStreamViewer(AbstractMatplotlib2DViewer):
 #             self._stream.lines.remove()
 
         self.axes.cla()
-        self._stream = self.axes.streamplot(X, Y, U, V, linewidth=lw, color=color, **self.kwargs)
+        self._stream = self.axes.streamplot(self._X, self._Y, U, V, linewidth=lw, color=color, **self.kwargs)
 
         self.axes.set_xlim(xmin=self._getLimit('xmin'),
                            xmax=self._getLimit('xmax'))
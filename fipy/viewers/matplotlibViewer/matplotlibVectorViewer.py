@@ -63,7 +63,7 @@ class MatplotlibVectorViewer(AbstractMatplotlib2DViewer):
     """
     __doc__ += AbstractMatplotlib2DViewer._test2DvectorIrregular(viewer="MatplotlibVectorViewer")
 
-    def __init__(self, vars, title=None, scale=None, sparsity=None, log=False, limits={}, axes=None, figaspect='auto', **kwlimits):
+    def __init__(self, vars, title=None, scale=None, sparsity=None, log=False, limits={}, axes=None, figaspect='auto', fps=None, **kwlimits):
         """Creates a `Matplotlib2DViewer`.
 
         :Parameters:
@@ -85,13 +85,15 @@ class MatplotlibVectorViewer(AbstractMatplotlib2DViewer):
             a (default) value of `None` will autoscale.
           axes
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
+          fps
+            if not `None`, the most frames per second to draw
           figaspect
             desired aspect ratio of figure. If arg is a number, use that aspect
             ratio. If arg is 'auto', the aspect ratio will be determined from
             the Variable's mesh.
         """
         kwlimits.update(limits)
-        AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title, axes=axes, figaspect=figaspect, **kwlimits)
+        AbstractMatplotlib2DViewer.__init__(self, vars=vars, title=title, axes=axes, figaspect=figaspect, fps=fps, **kwlimits)
 
         self.quiver(sparsity=sparsity, scale=scale)
         self.log = log
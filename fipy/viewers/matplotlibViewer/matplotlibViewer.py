@@ -50,7 +50,7 @@ class AbstractMatplotlibViewer(AbstractViewer):
     .. _Matplotlib: http://matplotlib.sourceforge.net/
     """
 
-    def __init__(self, vars, title=None, figaspect=1.0, cmap=None, colorbar=None, axes=None, log=False, **kwlimits):
+    def __init__(self, vars, title=None, figaspect=1.0, cmap=None, colorbar=None, axes=None, log=False, fps=None, **kwlimits):
         """
         Create a `AbstractMatplotlibViewer`.
 
@@ -76,6 +76,10 @@ class AbstractMatplotlibViewer(AbstractViewer):
             if not `None`, `vars` will be plotted into this Matplotlib `Axes` object
           log
             whether to logarithmically scale the data
+          fps
+            if not `None`, the most frames per second to draw; calls to
+            `plot()` sooner than `1 / fps` seconds after the last frame was
+            drawn return without drawing, unless they save a file
         """
         if self.__class__ is AbstractMatplotlibViewer:
             raise NotImplementedError, "can't instantiate abstract base class"
@@ -114,6 +118,9 @@ class AbstractMatplotlibViewer(AbstractViewer):
         self.norm = None
         self.log = log
 
+        self.fps = fps
+        self._lastFrame = None
+
         try:
             # Plotting needs to work differently for inline
             # integration in the IPython notebook.
@@ -147,7 +154,35 @@ class AbstractMatplotlibViewer(AbstractViewer):
 
     log = property(**log())
 
+    def _throttled(self):
+        """
+        Whether a frame was drawn less than `1 / fps` seconds ago.
+
+            >>> from fipy import CellVariable, Grid1D
+            >>> from fipy.viewers.matplotlibViewer import Matplotlib1DViewer
+            >>> var = CellVariable(mesh=Grid1D(nx=10), value=0.)
+            >>> viewer = Matplotlib1DViewer(vars=var, datamin=0., datamax=1., fps=0.01)
+            >>> print viewer._throttled(), viewer._throttled()
+            False True
+            >>> viewer.fps = None
+            >>> print viewer._throttled()
+            False
+        """
+        if self.fps is None:
+            return False
+
+        import time
+        now = time.time()
+        if self._lastFrame is not None and now - self._lastFrame < 1. / self.fps:
+            return True
+
+        self._lastFrame = now
+        return False
+
     def plot(self, filename = None):
+        if filename is None and self._throttled():
+            return
+
         import pylab
 
         fig = pylab.figure(self.id)
@@ -46,7 +46,9 @@ def _suite():
         'matplotlib2DViewer',
         'matplotlib2DGridViewer',
         'matplotlib2DGridContourViewer',
+        'matplotlib2DContourViewer',
         'matplotlibVectorViewer',
+        'matplotlibFrameRenderer',
         ), base = __name__)
 
 if __name__ == '__main__':
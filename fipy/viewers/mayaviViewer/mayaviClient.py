@@ -80,10 +80,14 @@ class MayaviClient(AbstractViewer):
         """
         self.fps = fps
 
-        self.vtkdir = tempfile.mkdtemp()
+        # keep the files in memory, where the system allows it
+        if os.path.isdir("/dev/shm"):
+            self.vtkdir = tempfile.mkdtemp(dir="/dev/shm")
+        else:
+            self.vtkdir = tempfile.mkdtemp()
         self.vtkcellfname = os.path.join(self.vtkdir, "cell.vtk")
         self.vtkfacefname = os.path.join(self.vtkdir, "face.vtk")
-        self.vtklockfname = os.path.join(self.vtkdir, "lock")
+        self.feedfname = os.path.join(self.vtkdir, "feed")
 
         from fipy.viewers.vtkViewer import VTKCellViewer, VTKFaceViewer
 
@@ -103,7 +107,15 @@ class MayaviClient(AbstractViewer):
 
         AbstractViewer.__init__(self, vars=cell_vars + face_vars, title=title, **kwlimits)
 
-        self.plot()
+        # the mesh is only written once; later frames are fed to the
+        # daemon through shared memory
+        if self.vtkCellViewer is not None:
+            self.vtkCellViewer.plot(filename=self.vtkcellfname)
+        if self.vtkFaceViewer is not None:
+            self.vtkFaceViewer.plot(filename=self.vtkfacefname)
+
+        from fipy.viewers.mayaviViewer.sharedFeed import SharedFeed
+        self.feed = SharedFeed(self.feedfname, arrays=self._arrays())
 
         from pkg_resources import Requirement, resource_filename
         daemon_file = (daemon_file
@@ -112,8 +124,8 @@ class MayaviClient(AbstractViewer):
 
         cmd = ["python",
                daemon_file,
-               "--lock",
-               self.vtklockfname,
+               "--feed",
+               self.feedfname,
                "--fps",
                str(self.fps)]
 
@@ -136,7 +148,8 @@ class MayaviClient(AbstractViewer):
         self.daemon = subprocess.Popen(cmd)
 
     def __del__(self):
-        for fname in [self.vtkcellfname, self.vtkfacefname, self.vtklockfname]:
+        self.feed.close()
+        for fname in [self.vtkcellfname, self.vtkfacefname, self.feedfname]:
             if fname and os.path.isfile(fname):
                 os.unlink(fname)
         os.rmdir(self.vtkdir)
@@ -163,24 +176,30 @@ class MayaviClient(AbstractViewer):
         else:
             return []
 
+    def _arrays(self):
+        """
+        Return the names and VTK values of the variables, as they are
+        known to the daemon.
+        """
+        arrays = []
+        for kind, viewer in (("cell", self.vtkCellViewer), ("face", self.vtkFaceViewer)):
+            if viewer is not None:
+                for var in viewer.vars:
+                    name, rank, value = viewer._nameRankValue(var)
+                    arrays.append(("%s/%s" % (kind, name), value))
+        return arrays
+
     def plot(self, filename=None):
         start = time.time()
         plotted = False
         while not plotted:
-            if not os.path.isfile(self.vtklockfname):
-                if self.vtkCellViewer is not None:
-                    self.vtkCellViewer.plot(filename=self.vtkcellfname)
-                if self.vtkFaceViewer is not None:
-                    self.vtkFaceViewer.plot(filename=self.vtkfacefname)
-                lock = file(self.vtklockfname, 'w')
-                if filename is not None:
-                    lock.write(filename)
-                lock.close()
-                plotted = True
-
-            if (time.time() - start > 30. / self.fps) and not plotted:
-                print "viewer: NOT READY"
-                start = time.time()
+            plotted = self.feed.write(self._arrays(), filename=filename)
+
+            if not plotted:
+                if time.time() - start > 30. / self.fps:
+                    print "viewer: NOT READY"
+                    start = time.time()
+                time.sleep(0.01 / self.fps)
         if not plotted:
             print "viewer: SKIPPED"
 
@@ -42,7 +42,7 @@
  ##
 
 
-"""A simple script that polls a data file for changes and then updates
+"""A simple script that polls a shared feed for new data and then updates
 the mayavi pipeline automatically.
 
 This script is based heavily on the poll_file.py exampe in the mayavi distribution.
@@ -83,14 +83,15 @@ except ImportError, e:
 
 # FiPy library imports
 from fipy.tools.numerix import array, concatenate, where, zeros
+from fipy.viewers.mayaviViewer.sharedFeed import SharedFeed
 
 __all__ = ["MayaviDaemon"]
 
 ######################################################################
 class MayaviDaemon(Mayavi):
-    """Given a file name and a mayavi2 data reader object, this class
-    polls the file for any changes and automatically updates the
-    mayavi pipeline.
+    """Given VTK files of the mesh and a `SharedFeed` of the variables,
+    this class polls the feed for new values, copies them into the
+    mayavi pipeline in place, and automatically updates it.
     """
 
     _viewers = []
@@ -109,8 +110,8 @@ class MayaviDaemon(Mayavi):
         usage = "usage: %prog [options]"
         parser = OptionParser(usage)
 
-        parser.add_option("-l", "--lock", action="store", dest="lock", type="string", default=None,
-                          help="path of lock file")
+        parser.add_option("--feed", action="store", dest="feed", type="string", default=None,
+                          help="path of shared feed file")
 
         parser.add_option("-c", "--cell", action="store", dest="cell", type="string", default=None,
                           help="path of cell vtk file")
@@ -147,7 +148,7 @@ class MayaviDaemon(Mayavi):
 
         (options, args) = parser.parse_args(argv)
 
-        self.lockfname = options.lock
+        self.feedfname = options.feed
         self.cellfname = options.cell
         self.facefname = options.face
         self.bounds = [options.xmin, options.xmax,
@@ -212,12 +213,14 @@ class MayaviDaemon(Mayavi):
 
         self.view_data()
 
-        # Poll the lock file.
-        self.timer = Timer(1000 / self.fps, self.poll_file)
+        self.feed = SharedFeed(self.feedfname)
+
+        # Poll the feed.
+        self.timer = Timer(1000 / self.fps, self.poll_feed)
 
     def __del__(self):
         dir = None
-        for fname in [self.cellfname, self.facefname, self.lockfname]:
+        for fname in [self.cellfname, self.facefname, self.feedfname]:
             if fname and os.path.isfile(fname):
                 os.unlink(fname)
                 if not dir:
@@ -231,16 +234,39 @@ class MayaviDaemon(Mayavi):
             viewer.__del__()
         raise SystemExit("MayaviDaemon cleaned up")
 
-    def poll_file(self):
-        if os.path.isfile(self.lockfname):
-            self.update_pipeline(self.cellsource)
-            self.update_pipeline(self.facesource)
-            lock = file(self.lockfname, 'r')
-            filename = lock.read()
-            lock.close()
+    def poll_feed(self):
+        frame = self.feed.read()
+        if frame is not None:
+            arrays, filename = frame
+            if self.update_arrays(self.cellsource, "cell", arrays):
+                self.update_pipeline(self.cellsource)
+            if self.update_arrays(self.facesource, "face", arrays):
+                self.update_pipeline(self.facesource)
             if len(filename) > 0:
                 mlab.savefig(filename)
-            os.unlink(self.lockfname)
+            self.feed.acknowledge()
+
+    def update_arrays(self, source, kind, arrays):
+        """Copy the changed `arrays` of `kind` ("cell" or "face") into the
+        data of `source`, in place.  Returns whether any were changed.
+        """
+        changed = False
+        if source is not None:
+            for key, value in arrays.items():
+                arrayKind, name = key.split("/", 1)
+                if arrayKind != kind:
+                    continue
+                for out in source.outputs:
+                    if kind == "cell":
+                        data = out.cell_data
+                    else:
+                        data = out.point_data
+                    array = data.get_array(name)
+                    if array is not None:
+                        array.to_array()[:] = value
+                        array.modified()
+                        changed = True
+        return changed
 
     def update_pipeline(self, source):
         """Override this to do something else if needed.
@@ -248,10 +274,8 @@ class MayaviDaemon(Mayavi):
         if source is not None:
             source.scene.disable_render = True
             source.scene.anti_aliasing_frames = 0
-            # Force the reader to re-read the file.
-            source.reader.modified()
-            source.update()
-            # Propagate the changes in the pipeline.
+            # The data were changed in place, so the reader must not
+            # re-read the file; just propagate the changes in the pipeline.
             source.data_changed = True
             source.scene.disable_render = False
 
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "sharedFeed.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Stiles  <daniel.stiles@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+__docformat__ = 'restructuredtext'
+
+import json
+import mmap
+import os
+import struct
+
+from fipy.tools import numerix
+
+__all__ = ["SharedFeed"]
+
+class SharedFeed(object):
+    """
+    Passes frames of named arrays from one process to another through a
+    memory-mapped file, without network services.
+
+    The writer creates the feed with the first value of each array, which
+    fixes their names, shapes, and types. Each call to `write` copies
+    only the arrays that have changed, and then publishes the frame. It
+    returns `False`, without writing, until the reader has called
+    `acknowledge` for the previous frame. `read` returns the arrays that
+    changed since the last frame it read, as views of the shared memory,
+    or `None` when there is no new frame.
+
+    Put the file on a memory file system, like `/dev/shm`, to avoid
+    touching the disk at all.
+
+        >>> import os
+        >>> import shutil
+        >>> from tempfile import mkdtemp
+        >>> dname = mkdtemp()
+        >>> fname = os.path.join(dname, "feed")
+
+        >>> writer = SharedFeed(fname, arrays=[("cell/phi", numerix.zeros(3)),
+        ...                                    ("face/flux", numerix.zeros((4, 3)))])
+        >>> reader = SharedFeed(fname)
+        >>> print reader.read()
+        None
+
+        >>> writer.write([("cell/phi", numerix.arange(3.)),
+        ...               ("face/flux", numerix.zeros((4, 3)))], filename="frame.png")
+        True
+        >>> arrays, filename = reader.read()
+        >>> print arrays.keys(), filename
+        ['cell/phi'] frame.png
+        >>> print arrays["cell/phi"]
+        [ 0.  1.  2.]
+
+        The next frame waits for the reader
+
+        >>> writer.write([("face/flux", numerix.ones((4, 3)))])
+        False
+        >>> reader.acknowledge()
+        >>> writer.write([("face/flux", numerix.ones((4, 3)))])
+        True
+        >>> arrays, filename = reader.read()
+        >>> print arrays.keys(), repr(filename)
+        ['face/flux'] ''
+        >>> print arrays["face/flux"].sum()
+        12.0
+        >>> reader.acknowledge()
+        >>> print reader.read()
+        None
+
+        >>> reader.close()
+        >>> writer.close()
+        >>> shutil.rmtree(dname)
+    """
+    _magic = "FIPYFEED"
+    # magic, frames written, frames read, layout length, filename length
+    _header = struct.Struct("<8sQQII")
+    _filenameLength = slice(28, 32)
+    _filenameSize = 1024
+
+    def __init__(self, path, arrays=None):
+        """
+        :Parameters:
+          path
+            the file that holds the feed
+          arrays
+            a list of `(name, value)` pairs to create a new feed with,
+            or `None` to open the existing feed at `path`
+        """
+        if arrays is not None:
+            self._create(path, arrays)
+
+        f = open(path, "r+b")
+        try:
+            self._map = mmap.mmap(f.fileno(), 0)
+        finally:
+            f.close()
+
+        magic, written, read, layoutLength, filenameLength = self._header.unpack_from(self._map[:self._header.size])
+        if magic != self._magic:
+            raise ValueError("%s is not a shared feed" % path)
+
+        layoutOffset = self._header.size + self._filenameSize
+        layout = json.loads(self._map[layoutOffset:layoutOffset + layoutLength])
+
+        self._counters = numerix.ndarray((2,), dtype="<u8", buffer=self._map, offset=8)
+        self._versions = numerix.ndarray((len(layout),), dtype="<u8", buffer=self._map,
+                                         offset=self._align(layoutOffset + layoutLength))
+        self.names = [str(entry["name"]) for entry in layout]
+        self.arrays = [numerix.ndarray(entry["shape"], dtype=str(entry["dtype"]),
+                                       buffer=self._map, offset=entry["offset"])
+                       for entry in layout]
+        self._lastRead = int(self._counters[0])
+
+    @staticmethod
+    def _align(offset):
+        return offset + (-offset % 8)
+
+    def _create(self, path, arrays):
+        arrays = [(name, numerix.ascontiguousarray(value)) for name, value in arrays]
+
+        # the offsets are only known once the layout, which holds them, is
+        # written, so leave room for the longest offsets that could be needed
+        start = self._header.size + self._filenameSize
+        layout = [dict(name=name, dtype=value.dtype.str, shape=value.shape, offset=2**62)
+                  for name, value in arrays]
+        offset = self._align(self._align(start + len(json.dumps(layout))) + 8 * len(arrays))
+        for entry, (name, value) in zip(layout, arrays):
+            entry["offset"] = offset
+            offset = self._align(offset + value.nbytes)
+        layoutString = json.dumps(layout)
+
+        f = open(path, "wb")
+        try:
+            f.write(self._header.pack(self._magic, 0, 0, len(layoutString), 0))
+            f.write("\0" * self._filenameSize)
+            f.write(layoutString)
+            f.write("\0" * (self._align(start + len(layoutString)) - start - len(layoutString)))
+            f.write(numerix.zeros((len(arrays),), dtype="<u8").tostring())
+            for entry, (name, value) in zip(layout, arrays):
+                f.write("\0" * (entry["offset"] - f.tell()))
+                f.write(value.tostring())
+        finally:
+            f.close()
+
+    @property
+    def ready(self):
+        """
+        Whether the reader has acknowledged every frame written.
+        """
+        return self._counters[0] == self._counters[1]
+
+    def write(self, arrays, filename=None):
+        """
+        Publish a frame.
+
+        :Parameters:
+          arrays
+            a list of `(name, value)` pairs; arrays that are not listed,
+            or that are unchanged, are not copied
+          filename
+            a file for the reader to save the frame to, if not `None`
+
+        :Returns:
+          `False` if the reader has not acknowledged the last frame, in
+          which case nothing is written
+        """
+        if not self.ready:
+            return False
+
+        frame = int(self._counters[0]) + 1
+        for name, value in arrays:
+            i = self.names.index(name)
+            value = numerix.asarray(value).reshape(self.arrays[i].shape)
+            if not numerix.array_equal(self.arrays[i], value):
+                self.arrays[i][...] = value
+                self._versions[i] = frame
+
+        filename = filename or ""
+        if len(filename) > self._filenameSize:
+            raise ValueError("the filename is longer than %d characters" % self._filenameSize)
+        self._map[self._header.size:self._header.size + len(filename)] = filename
+        self._map[self._filenameLength] = struct.pack("<I", len(filename))
+
+        # publish the frame once everything else is in place
+        self._counters[0] = frame
+
+        return True
+
+    def read(self):
+        """
+        Return the arrays that changed since the last frame read, as a
+        dictionary of views of the shared memory, and the file name to
+        save the frame to, or `None` if there is no new frame.
+        """
+        frame = int(self._counters[0])
+        if frame == self._lastRead:
+            return None
+
+        changed = self._versions > self._lastRead
+        arrays = dict([(name, array) for name, array, isChanged
+                       in zip(self.names, self.arrays, changed) if isChanged])
+        filenameLength, = struct.unpack("<I", self._map[self._filenameLength])
+        filename = self._map[self._header.size:self._header.size + filenameLength]
+        self._lastRead = frame
+
+        return arrays, filename
+
+    def acknowledge(self):
+        """
+        Tell the writer that the last frame read has been used.
+        """
+        self._counters[1] = self._lastRead
+
+    def close(self):
+        # the views must go before the map can be closed
+        self.arrays = self._versions = self._counters = None
+        self._map.close()
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
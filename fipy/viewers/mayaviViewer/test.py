@@ -42,6 +42,7 @@ import fipy.tests.testProgram
 def _suite():
     return _LateImportDocTestSuite(docTestModuleNames=(
         'mayaviClient',
+        'sharedFeed',
     ), base = __name__)
 
 if __name__ == '__main__':
@@ -45,6 +45,7 @@ def _suite():
         'vtkViewer.test',),
                                    docTestModuleNames = (
         'tsvViewer',
+        'hdf5Writer',
         ), base = __name__)
 
 if __name__ == '__main__':
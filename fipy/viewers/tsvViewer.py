@@ -63,6 +63,9 @@ class TSVViewer(AbstractViewer):
     """
     _axis = ["x", "y", "z"]
 
+    # number of lines to format at once
+    _blockSize = 2**14
+
     def __init__(self, vars, title=None, limits={}, **kwlimits):
         """
         Creates a `TSVViewer`.
@@ -98,34 +101,40 @@ class TSVViewer(AbstractViewer):
 
 
     def _plot(self, values, f, dim):
-        for index in range(values.shape[-1]):
-            lineValues = values[...,index]
-
-            # omit any elements whose cell centers lie outside of the specified limits
-            skip = False
-            for axis in range(dim):
-                mini = self._getLimit("%smin" % self._axis[axis])
-                maxi = self._getLimit("%smax" % self._axis[axis])
-
-                if (mini and lineValues[axis] < mini) or (maxi and lineValues[axis] > maxi):
-                    skip = True
-                    break
-
-            if skip:
-                continue
-
-            # replace any values that lie outside of the specified datalimits with 'nan'
-            for valIndex in range(dim, len(lineValues)):
-                mini = self._getLimit("datamin")
-                maxi = self._getLimit("datamax")
-
-                if (mini and lineValues[valIndex] < mini) or (maxi and lineValues[valIndex] > maxi):
-                    lineValues[valIndex] = float("NaN")
-                    break
-
-            line = ["%.15g" % value for value in lineValues]
-            f.write("\t".join(line))
-            f.write("\n")
+        values = numerix.array(values, dtype=float)
+
+        # omit any elements whose cell centers lie outside of the specified limits
+        keep = numerix.ones(values.shape[-1], dtype=bool)
+        for axis in range(dim):
+            mini = self._getLimit("%smin" % self._axis[axis])
+            maxi = self._getLimit("%smax" % self._axis[axis])
+
+            if mini:
+                keep &= ~(values[axis] < mini)
+            if maxi:
+                keep &= ~(values[axis] > maxi)
+
+        values = values[..., keep]
+
+        # replace the first value of each element that lies outside
+        # of the specified datalimits with 'nan'
+        mini = self._getLimit("datamin")
+        maxi = self._getLimit("datamax")
+        outside = numerix.zeros(values[dim:].shape, dtype=bool)
+        if mini:
+            outside |= values[dim:] < mini
+        if maxi:
+            outside |= values[dim:] > maxi
+        outside &= (numerix.cumsum(outside, axis=0) == 1)
+        values[dim:][outside] = float("NaN")
+
+        # format blocks of lines at once, so that neither the loop nor the
+        # text of the whole file grow with the number of elements
+        values = values.swapaxes(0, 1)
+        line = "\t".join(["%.15g"] * values.shape[-1]) + "\n"
+        for start in range(0, len(values), self._blockSize):
+            block = values[start:start + self._blockSize]
+            f.write((line * len(block)) % tuple(block.flat))
 
     def plot(self, filename=None):
         """
@@ -152,6 +161,15 @@ class TSVViewer(AbstractViewer):
         0.05    0.45    -2      35      -3.33333333333333
         0.15    0.45    5       35      5
 
+        Cells outside of the limits are omitted and data outside of
+        the limits is replaced by `nan`
+
+        >>> TSVViewer(vars = v, xmin = 0.1, datamax = 3).plot() #doctest: +NORMALIZE_WHITESPACE
+        var
+        x       y       var
+        0.15    0.15    2
+        0.15    0.45    nan
+
         :Parameters:
           filename
             If not `None`, the name of a file to save the image into.
@@ -165,7 +183,7 @@ class TSVViewer(AbstractViewer):
             if mesh.communicator.procID == 0:
                 if os.path.splitext(filename)[1] == ".gz":
                     import gzip
-                    f = gzip.GzipFile(filename = filename, mode = 'w', fileobj = None)
+                    f = gzip.GzipFile(filename = filename, mode = 'w', fileobj = None, compresslevel = 6)
                 else:
                     f = open(filename, "w")
             else:
@@ -2,10 +2,14 @@ __docformat__ = 'restructuredtext'
 
 from fipy.viewers.vtkViewer.vtkCellViewer import VTKCellViewer
 from fipy.viewers.vtkViewer.vtkFaceViewer import VTKFaceViewer
+from fipy.viewers.vtkViewer.vtkXMLCellViewer import VTKXMLCellViewer
+from fipy.viewers.vtkViewer.vtkXMLFaceViewer import VTKXMLFaceViewer
 
-__all__ = ["VTKViewer"]
+__all__ = ["VTKViewer", "VTKXMLViewer"]
 __all__.extend(vtkCellViewer.__all__)
 __all__.extend(vtkFaceViewer.__all__)
+__all__.extend(vtkXMLCellViewer.__all__)
+__all__.extend(vtkXMLFaceViewer.__all__)
 
 def VTKViewer(vars, title=None, limits={}, **kwlimits):
     """Generic function for creating a `VTKViewer`.
@@ -37,3 +41,37 @@ def VTKViewer(vars, title=None, limits={}, **kwlimits):
         return VTKCellViewer(vars=vars, title=title, **kwlimits)
     except TypeError:
         return VTKFaceViewer(vars=vars, title=title, **kwlimits)
+
+def VTKXMLViewer(vars, title=None, series=None, compress=False, limits={}, **kwlimits):
+    """Generic function for creating a `VTKXMLViewer`.
+
+    Returns a `VTKXMLCellViewer` for `CellVariable` objects and a
+    `VTKXMLFaceViewer` for `FaceVariable` objects. Neither needs TVTK.
+
+    :Parameters:
+      vars
+        a `_MeshVariable` or tuple of `_MeshVariable` objects to plot
+      title
+        displayed at the top of the `Viewer` window
+      series
+        the path of a ``.pvd`` file that collects the files written by
+        successive calls to `plot`
+      compress
+        whether to compress the data with zlib, or the zlib level to
+        compress it with
+      limits : dict
+        a (deprecated) alternative to limit keyword arguments
+      xmin, xmax, ymin, ymax, zmin, zmax, datamin, datamax
+        displayed range of data. Any limit set to a (default) value of
+        `None` will autoscale.
+
+    """
+    if type(vars) not in [type([]), type(())]:
+        vars = [vars]
+
+    kwlimits.update(limits)
+
+    try:
+        return VTKXMLCellViewer(vars=vars, title=title, series=series, compress=compress, **kwlimits)
+    except TypeError:
+        return VTKXMLFaceViewer(vars=vars, title=title, series=series, compress=compress, **kwlimits)
@@ -42,7 +42,10 @@ import fipy.tests.testProgram
 def _suite():
     return _LateImportDocTestSuite(docTestModuleNames=(
         'vtkCellViewer',
-        'vtkFaceViewer'
+        'vtkFaceViewer',
+        'vtkXMLViewer',
+        'vtkXMLCellViewer',
+        'vtkXMLFaceViewer'
         ), base = __name__)
 
 if __name__ == '__main__':
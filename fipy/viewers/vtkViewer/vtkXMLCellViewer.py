@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "vtkXMLCellViewer.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+
+
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+from fipy.tools.numerix import MA
+from fipy.variables.cellVariable import CellVariable
+
+from fipy.viewers.vtkViewer.vtkXMLViewer import VTKXMLViewer
+
+__all__ = ["VTKXMLCellViewer"]
+
+class VTKXMLCellViewer(VTKXMLViewer):
+    """Writes `CellVariable` data to VTK XML files
+    """
+    _dataSectionName = "CellData"
+
+    @property
+    def _variableClass(self):
+        return CellVariable
+
+    def _elementIDs(self, mesh):
+        if mesh.communicator.Nproc > 1:
+            return mesh._localNonOverlappingCellIDs
+        else:
+            return slice(None)
+
+    def _unstructuredGeometry(self, mesh):
+        vertices = mesh._orderedCellVertexIDs[..., self._elementIDs(mesh)]
+        present = ~MA.getmaskarray(vertices).swapaxes(0, 1)
+        connectivity = MA.filled(vertices, 0).swapaxes(0, 1)[present]
+        offsets = numerix.cumsum(present.sum(axis=1))
+        types = numerix.empty(offsets.shape, dtype="uint8")
+        types.fill(mesh._VTKCellType)
+
+        points = mesh._toVTK3D(numerix.array(mesh.vertexCoords))
+
+        return points, connectivity, offsets, types
+
+    def _test(self):
+        """
+        >>> import os
+        >>> import shutil
+        >>> from tempfile import mkdtemp
+        >>> dname = mkdtemp()
+
+        >>> from fipy import *
+        >>> from fipy.viewers.vtkViewer import VTKXMLCellViewer
+        >>> from fipy.viewers.vtkViewer.vtkXMLViewer import _readVTKXML
+
+        >>> m = Grid1D(nx=10)
+        >>> x, = m.cellCenters
+        >>> v1 = CellVariable(mesh=m, value=x*x, name="x*x")
+        >>> v2 = CellVariable(mesh=m, value=x)
+        >>> v3 = v1.grad
+        >>> v3.name = "v1.grad"
+        >>> viewer = VTKXMLCellViewer(vars=(v1, v2, v3))
+        >>> viewer.plot(os.path.join(dname, "grid1D.vtr")) # doctest: +SERIAL
+        >>> c = _readVTKXML(os.path.join(dname, "grid1D.vtr")) # doctest: +SERIAL
+        >>> numerix.allclose(c["x"], m.vertexCoords[0]) # doctest: +SERIAL
+        True
+        >>> numerix.allclose(c["x*x"], v1.value) # doctest: +SERIAL
+        True
+        >>> numerix.allclose(c[v2.name or "CellVariable #%d" % id(v2)],
+        ...                  v2.value) # doctest: +SERIAL
+        True
+        >>> numerix.allclose(c["v1.grad"][..., 0], v3.value) # doctest: +SERIAL
+        True
+        >>> numerix.allclose(c["v1.grad"][..., 1:], 0) # doctest: +SERIAL
+        True
+
+        The same mesh can be written as an unstructured grid
+
+        >>> viewer.plot(os.path.join(dname, "grid1D.vtu")) # doctest: +SERIAL
+        >>> c = _readVTKXML(os.path.join(dname, "grid1D.vtu")) # doctest: +SERIAL
+        >>> print c["connectivity"][:6], c["offsets"][:3] # doctest: +SERIAL
+        [1 0 2 1 3 2] [2 4 6]
+        >>> numerix.allclose(c["x*x"], v1.value) # doctest: +SERIAL
+        True
+
+        but a mesh that is not a grid cannot be written as a rectilinear one
+
+        >>> m = (Grid2D(nx=5, ny=10, dx=0.1, dy=0.1)
+        ...      + (Tri2D(nx=5, ny=5, dx=0.1, dy=0.1))
+        ...      + ((0.5,), (0.2,)))
+        >>> x, y = m.cellCenters
+        >>> v1 = CellVariable(mesh=m, value=x*y, name="x*y")
+        >>> v2 = CellVariable(mesh=m, value=x > 0.5, name="x > 0.5")
+        >>> v3 = v1.grad
+        >>> v3.name = "v1.grad"
+        >>> viewer = VTKXMLCellViewer(vars=(v1, v2, v3), compress=True)
+        >>> viewer.plot(os.path.join(dname, "mixed.vtr"))
+        Traceback (most recent call last):
+            ...
+        ValueError: Mesh2D is not a rectilinear grid
+        >>> viewer.plot(os.path.join(dname, "mixed.vtu")) # doctest: +SERIAL
+        >>> c = _readVTKXML(os.path.join(dname, "mixed.vtu")) # doctest: +SERIAL
+        >>> print numerix.bincount(numerix.diff(numerix.concatenate(([0], c["offsets"]))))
+        ... # doctest: +SERIAL
+        [  0   0   0 100  50]
+        >>> numerix.allclose(c["Points"][..., :2], m.vertexCoords.swapaxes(0, 1)) # doctest: +SERIAL
+        True
+        >>> numerix.allclose(c["x*y"], v1.value) # doctest: +SERIAL
+        True
+        >>> print c["x > 0.5"].dtype, (c["x > 0.5"] == v2.value).all() # doctest: +SERIAL
+        uint8 True
+        >>> numerix.allclose(c["v1.grad"][..., :2], v3.value.swapaxes(0, 1)) # doctest: +SERIAL
+        True
+
+        Successive steps of a time series are collected in a ``.pvd`` file
+
+        >>> m = Grid3D(nx=2, ny=3, nz=4)
+        >>> x, y, z = m.cellCenters
+        >>> v1 = CellVariable(mesh=m, value=x*y*z, name="x*y*z")
+        >>> v2 = CellVariable(mesh=m, rank=2, name="xyz",
+        ...                   value=[[x, y, z], [y, z, x], [z, x, y]])
+        >>> viewer = VTKXMLCellViewer(vars=(v1, v2),
+        ...                           series=os.path.join(dname, "grid3D.pvd"))
+        >>> viewer.plot()
+        >>> v1.value = 2 * x * y * z
+        >>> viewer.plot(time=0.5)
+        >>> print open(os.path.join(dname, "grid3D.pvd")).read() # doctest: +SERIAL, +ELLIPSIS
+        <?xml version="1.0"?>
+        <VTKFile type="Collection" version="0.1" byte_order="...">
+          <Collection>
+            <DataSet timestep="0.0" group="" part="0" file="grid3D_000000.vtr"/>
+            <DataSet timestep="0.5" group="" part="0" file="grid3D_000001.vtr"/>
+          </Collection>
+        </VTKFile>
+        <BLANKLINE>
+        >>> c = _readVTKXML(os.path.join(dname, "grid3D_000001.vtr")) # doctest: +SERIAL
+        >>> [len(c[axis]) for axis in "xyz"] # doctest: +SERIAL
+        [3, 4, 5]
+        >>> numerix.allclose(c["x*y*z"], v1.value) # doctest: +SERIAL
+        True
+        >>> numerix.allclose(c["xyz"].reshape((-1, 3, 3)).transpose((1, 2, 0)),
+        ...                  v2.value) # doctest: +SERIAL
+        True
+
+        >>> shutil.rmtree(dname)
+        """
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "vtkXMLFaceViewer.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+
+
+__docformat__ = 'restructuredtext'
+
+from fipy.tools import numerix
+from fipy.variables.faceVariable import FaceVariable
+
+from fipy.viewers.vtkViewer.vtkXMLViewer import VTKXMLViewer
+
+__all__ = ["VTKXMLFaceViewer"]
+
+# VTK_VERTEX, as numbered by VTK
+_VTKVertexType = 1
+
+class VTKXMLFaceViewer(VTKXMLViewer):
+    """Writes `FaceVariable` data to VTK XML files
+
+    The data is attached to points at the face centers.
+    """
+    _dataSectionName = "PointData"
+
+    @property
+    def _variableClass(self):
+        return FaceVariable
+
+    def _elementIDs(self, mesh):
+        if mesh.communicator.Nproc > 1:
+            return mesh._localNonOverlappingFaceIDs
+        else:
+            return slice(None)
+
+    @staticmethod
+    def _rectilinearAxes(mesh):
+        # face centers never lie on a rectilinear grid
+        return None
+
+    def _unstructuredGeometry(self, mesh):
+        points = numerix.array(mesh.faceCenters)[..., self._elementIDs(mesh)]
+        points = mesh._toVTK3D(points)
+
+        connectivity = numerix.arange(len(points))
+        offsets = connectivity + 1
+        types = numerix.empty(offsets.shape, dtype="uint8")
+        types.fill(_VTKVertexType)
+
+        return points, connectivity, offsets, types
+
+    def _test(self):
+        """
+        >>> import os
+        >>> from tempfile import mkstemp
+        >>> f, fname = mkstemp(".vtu")
+        >>> os.close(f)
+
+        >>> from fipy import *
+        >>> from fipy.viewers.vtkViewer import VTKXMLFaceViewer
+        >>> from fipy.viewers.vtkViewer.vtkXMLViewer import _readVTKXML
+
+        >>> m = Grid2D(nx=2, ny=3)
+        >>> x, y = m.faceCenters
+        >>> v1 = FaceVariable(mesh=m, value=x*y, name="x*y")
+        >>> v2 = FaceVariable(mesh=m, rank=1, value=m.faceNormals, name="normals")
+        >>> VTKXMLFaceViewer(vars=(v1, v2), compress=9).plot(fname) # doctest: +SERIAL
+        >>> c = _readVTKXML(fname) # doctest: +SERIAL
+        >>> numerix.allclose(c["Points"][..., :2], m.faceCenters.value.swapaxes(0, 1)) # doctest: +SERIAL
+        True
+        >>> print c["connectivity"][:3], c["offsets"][:3], c["types"][:3] # doctest: +SERIAL
+        [0 1 2] [1 2 3] [1 1 1]
+        >>> numerix.allclose(c["x*y"], v1.value) # doctest: +SERIAL
+        True
+        >>> numerix.allclose(c["normals"][..., :2], v2.value.swapaxes(0, 1)) # doctest: +SERIAL
+        True
+        >>> print open(fname).read().split("<PointData")[1].split(">")[0]
+        ...  # doctest: +SERIAL
+         Scalars="x*y" Vectors="normals"
+
+        Faces cannot be written as a rectilinear grid
+
+        >>> VTKXMLFaceViewer(vars=v1).plot(fname[:-4] + ".vtr")
+        ... # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+            ...
+        ValueError: ...Grid2D is not a rectilinear grid
+
+        >>> os.remove(fname)
+        """
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()
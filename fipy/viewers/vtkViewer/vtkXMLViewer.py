@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+
+## -*-Pyth-*-
+ # ###################################################################
+ #  FiPy - Python-based finite volume PDE solver
+ #
+ #  FILE: "vtkXMLViewer.py"
+ #
+ #  Author: Jonathan Guyer <guyer@nist.gov>
+ #  Author: Daniel Wheeler <daniel.wheeler@nist.gov>
+ #  Author: James Warren   <jwarren@nist.gov>
+ #    mail: NIST
+ #     www: http://www.ctcms.nist.gov/fipy/
+ #
+ # ========================================================================
+ # This software was developed at the National Institute of Standards
+ # and Technology by employees of the Federal Government in the course
+ # of their official duties.  Pursuant to title 17 Section 105 of the
+ # United States Code this software is not subject to copyright
+ # protection and is in the public domain.  FiPy is an experimental
+ # system.  NIST assumes no responsibility whatsoever for its use by
+ # other parties, and makes no guarantees, expressed or implied, about
+ # its quality, reliability, or any other characteristic.  We would
+ # appreciate acknowledgement if the software is used.
+ #
+ # This software can be redistributed and/or modified freely
+ # provided that any derivative works bear some notice that they are
+ # derived from it, and any modified versions bear some notice that
+ # they have been modified.
+ # ========================================================================
+ #  See the file "license.terms" for information on usage and  redistribution
+ #  of this file, and for a DISCLAIMER OF ALL WARRANTIES.
+ #
+ # ###################################################################
+ ##
+
+
+__docformat__ = 'restructuredtext'
+
+__all__ = ["VTKXMLViewer"]
+
+import os
+import re
+import sys
+import zlib
+from xml.sax.saxutils import quoteattr, unescape
+
+from fipy.tools import numerix
+from fipy.viewers.viewer import AbstractViewer
+
+# uncompressed size of the blocks that are compressed separately
+_blockSize = 2**20
+
+_byteOrder = {"little": "LittleEndian", "big": "BigEndian"}[sys.byteorder]
+
+_VTKTypes = {"int8": "Int8", "uint8": "UInt8",
+             "int16": "Int16", "uint16": "UInt16",
+             "int32": "Int32", "uint32": "UInt32",
+             "int64": "Int64", "uint64": "UInt64",
+             "float32": "Float32", "float64": "Float64"}
+
+class VTKXMLViewer(AbstractViewer):
+    """Writes `_MeshVariable` data to VTK XML files
+
+    Unlike `VTKViewer`, which needs TVTK, only NumPy is used. The data
+    arrays are appended to the XML as raw binary, optionally compressed
+    with zlib. Meshes that are rectilinear grids are written as ``.vtr``
+    files, which store only the coordinates along each axis; all others
+    are written as ``.vtu`` files. The geometry of the mesh is encoded
+    once and reused for every file that the viewer writes.
+
+    If the viewer is given a `series`, each call to `plot` writes a new
+    file next to it and the `series` is updated to be a ParaView ``.pvd``
+    collection that lists every file with its time. In parallel, each
+    processor writes its own part of each step, without ghost cells.
+    """
+    def __init__(self, vars, title=None, series=None, compress=False, limits={}, **kwlimits):
+        """Creates a `VTKXMLViewer`
+
+        :Parameters:
+          vars
+            a `_MeshVariable` or a tuple of them
+          title
+            displayed at the top of the `Viewer` window
+          series
+            the path of a ``.pvd`` file that collects the files written by
+            successive calls to `plot`
+          compress
+            whether to compress the data with zlib, or the zlib level to
+            compress it with
+          limits : dict
+            a (deprecated) alternative to limit keyword arguments
+          xmin, xmax, ymin, ymax, zmin, zmax, datamin, datamax
+            displayed range of data. Any limit set to
+            a (default) value of `None` will autoscale.
+        """
+        kwlimits.update(limits)
+        AbstractViewer.__init__(self, vars=vars, title=title, **kwlimits)
+
+        self.series = series
+        if compress is True:
+            compress = zlib.Z_BEST_SPEED
+        self.compress = compress
+        self.steps = []
+        self._geometry = {}
+
+    @property
+    def mesh(self):
+        return self.vars[0].mesh
+
+    def plot(self, filename=None, time=None):
+        """
+        Write the current values of the variables.
+
+        :Parameters:
+          filename
+            the path of the file to write. A rectilinear grid is written
+            if the name ends in ``.vtr``, otherwise an unstructured grid.
+            If `None`, the next file of the `series` is written.
+          time
+            the time of this step of the `series`. Defaults to the number
+            of the step.
+        """
+        if filename is not None:
+            self._write(self._partName(filename),
+                        rectilinear=filename.endswith(".vtr"))
+            return
+
+        if self.series is None:
+            raise ValueError("%s needs either a `filename` or a `series`" % self.__class__.__name__)
+
+        directory, name = os.path.split(self.series)
+        root = os.path.splitext(name)[0]
+        rectilinear = self._rectilinearAxes(self.mesh) is not None
+        name = "%s_%06d%s" % (root, len(self.steps), [".vtu", ".vtr"][rectilinear])
+
+        self._write(os.path.join(directory, self._partName(name)), rectilinear=rectilinear)
+
+        if time is None:
+            time = len(self.steps)
+        comm = self.mesh.communicator
+        self.steps.append((float(time), [self._partName(name, procID=procID)
+                                         for procID in range(comm.Nproc)]))
+
+        if comm.procID == 0:
+            self._writeCollection()
+
+    def _partName(self, name, procID=None):
+        comm = self.mesh.communicator
+        if comm.Nproc > 1:
+            if procID is None:
+                procID = comm.procID
+            root, ext = os.path.splitext(name)
+            name = "%s-%d%s" % (root, procID, ext)
+        return name
+
+    def _writeCollection(self):
+        lines = ['<?xml version="1.0"?>',
+                 '<VTKFile type="Collection" version="0.1" byte_order="%s">' % _byteOrder,
+                 '  <Collection>']
+        for time, names in self.steps:
+            for part, name in enumerate(names):
+                lines.append('    <DataSet timestep="%r" group="" part="%d" file=%s/>'
+                             % (time, part, quoteattr(name)))
+        lines += ['  </Collection>',
+                  '</VTKFile>',
+                  '']
+
+        f = open(self.series, 'w')
+        try:
+            f.write("\n".join(lines))
+        finally:
+            f.close()
+
+    def _write(self, filename, rectilinear):
+        mesh = self.mesh
+
+        if rectilinear:
+            axes = self._rectilinearAxes(mesh)
+            if axes is None:
+                raise ValueError("%s is not a rectilinear grid" % mesh.__class__.__name__)
+            kind = "RectilinearGrid"
+            extent = " ".join(["0 %d" % (len(axis) - 1) for axis in axes])
+            gridAttributes = ' WholeExtent="%s"' % extent
+            pieceAttributes = ' Extent="%s"' % extent
+        else:
+            self._geometrySections(rectilinear)
+            kind = "UnstructuredGrid"
+            gridAttributes = ''
+            pieceAttributes = ' NumberOfPoints="%d" NumberOfCells="%d"' % self._unstructuredSize
+
+        sections = [self._dataSection()] + self._geometrySections(rectilinear)
+
+        lines = ['<?xml version="1.0"?>',
+                 '<VTKFile type="%s" version="1.0" byte_order="%s" header_type="UInt64"%s>'
+                 % (kind, _byteOrder, ['', ' compressor="vtkZLibDataCompressor"'][bool(self.compress)]),
+                 '  <%s%s>' % (kind, gridAttributes),
+                 '    <Piece%s>' % pieceAttributes]
+        chunks = []
+        offset = 0
+        for section, attributes, arrays in sections:
+            lines.append('      <%s%s>' % (section, attributes))
+            for arrayAttributes, arrayChunks in arrays:
+                lines.append('        <DataArray%s format="appended" offset="%d"/>' % (arrayAttributes, offset))
+                chunks.extend(arrayChunks)
+                offset += sum([len(chunk) for chunk in arrayChunks])
+            lines.append('      </%s>' % section)
+        lines += ['    </Piece>',
+                  '  </%s>' % kind,
+                  '  <AppendedData encoding="raw">',
+                  '   _']
+
+        f = open(filename, 'wb')
+        try:
+            f.write("\n".join(lines))
+            for chunk in chunks:
+                f.write(chunk)
+            f.write("\n  </AppendedData>\n</VTKFile>\n")
+        finally:
+            f.close()
+
+    def _dataSection(self):
+        active = {}
+        arrays = []
+        for var in self.vars:
+            name = var.name or "%s #%d" % (var.__class__.__name__, id(var))
+            value = numerix.asarray(var.numericValue)[..., self._elementIDs(self.mesh)]
+            components = 3**var.rank
+            if var.rank > 0:
+                # VTK vectors and tensors are always 3D
+                padded = numerix.zeros((3,) * var.rank + value.shape[var.rank:], dtype=value.dtype)
+                padded[tuple([slice(0, n) for n in value.shape[:var.rank]])] = value
+                value = padded.reshape((components, -1)).swapaxes(0, 1)
+            active.setdefault(["Scalars", "Vectors", "Tensors"][min(var.rank, 2)], name)
+            arrays.append(self._dataArray(value, Name=name, NumberOfComponents=components))
+
+        attributes = "".join([' %s=%s' % (key, quoteattr(name)) for key, name in sorted(active.items())])
+
+        return (self._dataSectionName, attributes, arrays)
+
+    def _geometrySections(self, rectilinear):
+        """
+        Encode the geometry of the mesh the first time it is written.
+        """
+        if rectilinear not in self._geometry:
+            if rectilinear:
+                axes = self._rectilinearAxes(self.mesh)
+                sections = [("Coordinates", "",
+                             [self._dataArray(axis, Name=name) for axis, name in zip(axes, "xyz")])]
+            else:
+                points, connectivity, offsets, types = self._unstructuredGeometry(self.mesh)
+                self._unstructuredSize = (len(points), len(offsets))
+                sections = [("Points", "",
+                             [self._dataArray(points, Name="Points", NumberOfComponents=3)]),
+                            ("Cells", "",
+                             [self._dataArray(connectivity, Name="connectivity"),
+                              self._dataArray(offsets, Name="offsets"),
+                              self._dataArray(types, Name="types")])]
+            self._geometry[rectilinear] = sections
+
+        return self._geometry[rectilinear]
+
+    def _dataArray(self, array, **attributes):
+        array = numerix.asarray(array)
+        if array.dtype == bool:
+            array = array.astype("uint8")
+        attributes["type"] = _VTKTypes[array.dtype.name]
+        attributes = "".join([' %s=%s' % (key, quoteattr(str(value)))
+                              for key, value in sorted(attributes.items())])
+        return attributes, self._encode(array)
+
+    def _encode(self, array):
+        """
+        Return the chunks of bytes that store `array` in the appended data.
+        """
+        data = numerix.ascontiguousarray(array)
+        nbytes = data.nbytes
+        data = buffer(data)
+
+        if not self.compress:
+            return [numerix.array([nbytes], dtype=numerix.uint64).tostring(), data]
+
+        blocks = [zlib.compress(data[start:start + _blockSize], self.compress)
+                  for start in range(0, nbytes, _blockSize)]
+        header = numerix.array([len(blocks), _blockSize, nbytes - (len(blocks) - 1) * _blockSize]
+                               + [len(block) for block in blocks], dtype=numerix.uint64)
+        if len(blocks) == 0:
+            header[2] = 0
+
+        return [header.tostring()] + blocks
+
+    @staticmethod
+    def _rectilinearAxes(mesh):
+        """
+        Return the coordinates of the vertices along each axis, if `mesh`
+        is a serial grid whose vertices and cells are both numbered with
+        `x` varying fastest. Otherwise, return `None`.
+        """
+        shape = [getattr(mesh, n, None) for n in ("nx", "ny", "nz")[:mesh.dim]]
+        if None in shape or mesh.communicator.Nproc > 1:
+            return None
+
+        shape = [int(n) for n in shape]
+        coords = numerix.asarray(mesh.vertexCoords)
+        if (mesh.numberOfCells != numerix.prod(shape)
+            or coords.shape[-1] != numerix.prod([n + 1 for n in shape])):
+            return None
+
+        # C order, so the last index is `x`
+        coords = coords.reshape((mesh.dim,) + tuple([n + 1 for n in shape[::-1]]))
+        axes = []
+        for d in range(mesh.dim):
+            index = [0] * mesh.dim
+            index[mesh.dim - 1 - d] = slice(None)
+            axis = coords[d][tuple(index)]
+            broadcast = [numerix.newaxis] * mesh.dim
+            broadcast[mesh.dim - 1 - d] = slice(None)
+            if not (coords[d] == axis[tuple(broadcast)]).all():
+                return None
+            axes.append(axis)
+
+        return axes + [numerix.zeros((1,))] * (3 - mesh.dim)
+
+    def _getSuitableVars(self, vars):
+        if type(vars) not in [type([]), type(())]:
+            vars = [vars]
+        cls = self._variableClass
+        vars = [var for var in vars if isinstance(var, cls)]
+        if len(vars) == 0:
+            raise TypeError("%s can only display %s" % (self.__class__.__name__, cls.__name__))
+        vars = [var for var in vars if var.mesh==vars[0].mesh]
+        return vars
+
+def _readVTKXML(filename):
+    """
+    Read the appended data arrays of a VTK XML file written by
+    `VTKXMLViewer`, by name.
+    """
+    f = open(filename, 'rb')
+    try:
+        content = f.read()
+    finally:
+        f.close()
+
+    head, data = content.split('<AppendedData encoding="raw">', 1)
+    data = data[data.index("_") + 1:]
+    compressed = 'compressor="vtkZLibDataCompressor"' in head
+
+    types = dict((value, key) for key, value in _VTKTypes.items())
+    arrays = {}
+    for element in re.findall(r"<DataArray([^>]*)/>", head):
+        attributes = dict(re.findall(r'(\w+)="([^"]*)"', element))
+        offset = int(attributes["offset"])
+        if compressed:
+            numberOfBlocks = int(numerix.frombuffer(data[offset:offset + 8], dtype=numerix.uint64)[0])
+            header = numerix.frombuffer(data[offset:offset + 8 * (3 + numberOfBlocks)], dtype=numerix.uint64)
+            start = offset + 8 * (3 + numberOfBlocks)
+            raw = []
+            for size in header[3:].astype(int):
+                raw.append(zlib.decompress(data[start:start + size]))
+                start += size
+            raw = "".join(raw)
+        else:
+            nbytes = int(numerix.frombuffer(data[offset:offset + 8], dtype=numerix.uint64)[0])
+            raw = data[offset + 8:offset + 8 + nbytes]
+        array = numerix.frombuffer(raw, dtype=types[attributes["type"]])
+        components = int(attributes.get("NumberOfComponents", 1))
+        if components > 1:
+            array = array.reshape((-1, components))
+        arrays[unescape(attributes["Name"], {"&quot;": '"'})] = array
+
+    return arrays
+
+def _test():
+    import fipy.tests.doctestPlus
+    return fipy.tests.doctestPlus.testmod()
+
+if __name__ == "__main__":
+    _test()